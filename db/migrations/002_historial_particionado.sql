@@ -0,0 +1,46 @@
+-- ============================================
+-- MIGRACIÓN: Historial particionado por mes
+-- DB: MySQL 8.0+
+-- Versión: 002
+-- Descripción: Particiona historial por RANGE sobre timestamp (un mes por partición)
+-- ============================================
+--
+-- Restricciones de MySQL para tablas particionadas:
+--   * No admiten FOREIGN KEY: se elimina historial -> ordenes. El borrado en
+--     cascada lo sigue haciendo el ORM (Orden.historial, cascade="all, delete-orphan").
+--   * Toda clave única debe incluir la columna de partición: la PK pasa a (id, timestamp).
+--
+-- Particiones iniciales:
+--   * p_inicial: todo el historial anterior a 2026-11 (se expira como una unidad)
+--   * p_futuro:  MAXVALUE; el servicio ParticionService la divide en meses
+--                por adelantado (HISTORIAL_PARTICION_MESES_ADELANTE)
+--
+-- Los límites se calculan en UTC, igual que UNIX_TIMESTAMP(timestamp).
+-- ============================================
+
+USE ordenes_multiarea;
+
+SET time_zone = '+00:00';
+
+-- Eliminar la foreign key (nombre generado por MySQL en 001)
+ALTER TABLE historial DROP FOREIGN KEY historial_ibfk_1;
+
+-- La columna de partición debe formar parte de la PK y no admitir NULL
+ALTER TABLE historial
+    MODIFY `timestamp` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, `timestamp`);
+
+ALTER TABLE historial
+PARTITION BY RANGE (UNIX_TIMESTAMP(`timestamp`)) (
+    PARTITION p_inicial VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p_futuro VALUES LESS THAN MAXVALUE
+);
+
+-- ============================================
+-- VERIFICACIÓN
+-- ============================================
+SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS
+FROM information_schema.PARTITIONS
+WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'historial'
+ORDER BY PARTITION_ORDINAL_POSITION;
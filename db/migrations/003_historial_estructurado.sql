@@ -0,0 +1,86 @@
+-- ============================================
+-- MIGRACIÓN: Historial con eventos estructurados
+-- DB: MySQL 8.0+
+-- Versión: 003
+-- Descripción: Columnas compactas para el tipo de evento, área, transición y
+--              segundos; el detalle legible se arma al leer (Historial.detalle)
+-- ============================================
+--
+-- Códigos de evento (src/models/historial.py, CODIGOS_EVENTO):
+--   1 CREADA, 2 AREA_ASIGNADA, 3 AREA_REMOVIDA,
+--   4 CAMBIO_ESTADO_PARCIAL, 5 CAMBIO_ESTADO_GLOBAL, 6 TIMEOUT_SLA
+--
+-- Los eventos existentes conservan codigo_evento = NULL y su detalle de texto.
+-- ============================================
+
+USE ordenes_multiarea;
+
+ALTER TABLE historial
+    ADD COLUMN codigo_evento SMALLINT UNSIGNED NULL COMMENT 'Código del tipo de evento' AFTER evento,
+    ADD COLUMN area_id INT UNSIGNED NULL COMMENT 'Área involucrada (sin FK: tabla particionada)' AFTER codigo_evento,
+    ADD COLUMN estado_desde ENUM(
+        'NUEVA', 'ASIGNADA', 'EN_PROGRESO', 'PENDIENTE',
+        'COMPLETADA', 'CERRADA_SIN_SOLUCION', 'VENCIDA'
+    ) NULL COMMENT 'Estado anterior de la transición' AFTER area_id,
+    ADD COLUMN estado_hasta ENUM(
+        'NUEVA', 'ASIGNADA', 'EN_PROGRESO', 'PENDIENTE',
+        'COMPLETADA', 'CERRADA_SIN_SOLUCION', 'VENCIDA'
+    ) NULL COMMENT 'Estado nuevo de la transición' AFTER estado_desde,
+    ADD COLUMN segundos INT UNSIGNED NULL COMMENT 'Segundos acumulados al momento del evento' AFTER estado_hasta,
+    ADD INDEX idx_historial_codigo_ts (codigo_evento, `timestamp`),
+    ADD INDEX idx_historial_area_codigo (area_id, codigo_evento);
+
+-- ============================================
+-- TRIGGERS: escribir eventos estructurados en lugar de texto
+-- ============================================
+DROP TRIGGER IF EXISTS tr_orden_creada;
+DROP TRIGGER IF EXISTS tr_orden_cambio_estado;
+DROP TRIGGER IF EXISTS tr_area_asignada;
+DROP TRIGGER IF EXISTS tr_orden_area_cambio_estado;
+
+DELIMITER $$
+
+CREATE TRIGGER tr_orden_creada
+AFTER INSERT ON ordenes
+FOR EACH ROW
+BEGIN
+    INSERT INTO historial (orden_id, evento, codigo_evento, estado_global, actor)
+    VALUES (NEW.id, 'CREADA', 1, NEW.estado_global, NEW.creador);
+END$$
+
+CREATE TRIGGER tr_orden_cambio_estado
+AFTER UPDATE ON ordenes
+FOR EACH ROW
+BEGIN
+    IF OLD.estado_global != NEW.estado_global THEN
+        INSERT INTO historial (orden_id, evento, codigo_evento, estado_desde, estado_hasta, estado_global, actor)
+        VALUES (NEW.id, 'CAMBIO_ESTADO_GLOBAL', 5, OLD.estado_global, NEW.estado_global,
+                NEW.estado_global, 'SISTEMA');
+    END IF;
+END$$
+
+CREATE TRIGGER tr_area_asignada
+AFTER INSERT ON orden_area
+FOR EACH ROW
+BEGIN
+    INSERT INTO historial (orden_id, evento, codigo_evento, area_id, detalle, actor)
+    VALUES (NEW.orden_id, 'AREA_ASIGNADA', 2, NEW.area_id, NEW.asignada_a, 'SISTEMA');
+END$$
+
+CREATE TRIGGER tr_orden_area_cambio_estado
+AFTER UPDATE ON orden_area
+FOR EACH ROW
+BEGIN
+    IF OLD.estado_parcial != NEW.estado_parcial THEN
+        INSERT INTO historial (orden_id, evento, codigo_evento, area_id, estado_desde, estado_hasta, actor)
+        VALUES (NEW.orden_id, 'CAMBIO_ESTADO_PARCIAL', 4, NEW.area_id,
+                OLD.estado_parcial, NEW.estado_parcial, COALESCE(NEW.asignada_a, 'SISTEMA'));
+    END IF;
+END$$
+
+DELIMITER ;
+
+-- ============================================
+-- VERIFICACIÓN
+-- ============================================
+SHOW COLUMNS FROM historial;
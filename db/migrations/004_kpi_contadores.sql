@@ -0,0 +1,48 @@
+-- ============================================
+-- MIGRACIÓN: Contadores incrementales de KPIs
+-- DB: MySQL 8.0+
+-- Versión: 004
+-- Descripción: /kpis y las estadísticas SLA leen contadores mantenidos en cada
+--              transición de estado (ContadoresService) en lugar de contar ordenes
+-- ============================================
+--
+-- Ámbitos:
+--   estado_global   Órdenes por estado global
+--   estado_parcial  Asignaciones (orden_area) por estado parcial
+--   sla             suma_seg_activas, cerca_limite
+--
+-- El job kpi_reconciliacion recalcula los valores reales al iniciar y cada
+-- KPI_RECONCILIACION_INTERVALO_SEG; la carga inicial de abajo es solo para
+-- tener valores correctos desde el primer arranque.
+-- ============================================
+
+USE ordenes_multiarea;
+
+CREATE TABLE IF NOT EXISTS kpi_contadores (
+    ambito VARCHAR(30) NOT NULL COMMENT 'estado_global | estado_parcial | sla',
+    clave VARCHAR(50) NOT NULL,
+    total BIGINT NOT NULL DEFAULT 0,
+    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (ambito, clave)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================
+-- CARGA INICIAL
+-- ============================================
+INSERT INTO kpi_contadores (ambito, clave, total)
+SELECT 'estado_global', estado_global, COUNT(*) FROM ordenes GROUP BY estado_global
+ON DUPLICATE KEY UPDATE total = VALUES(total);
+
+INSERT INTO kpi_contadores (ambito, clave, total)
+SELECT 'estado_parcial', estado_parcial, COUNT(*) FROM orden_area GROUP BY estado_parcial
+ON DUPLICATE KEY UPDATE total = VALUES(total);
+
+INSERT INTO kpi_contadores (ambito, clave, total)
+SELECT 'sla', 'suma_seg_activas', COALESCE(SUM(seg_acumulados), 0)
+FROM orden_area WHERE estado_parcial IN ('EN_PROGRESO', 'PENDIENTE')
+ON DUPLICATE KEY UPDATE total = VALUES(total);
+
+-- ============================================
+-- VERIFICACIÓN
+-- ============================================
+SELECT * FROM kpi_contadores ORDER BY ambito, clave;
@@ -0,0 +1,34 @@
+-- ============================================
+-- MIGRACIÓN: Rollups de KPIs y SLA por intervalo
+-- DB: MySQL 8.0+
+-- Versión: 005
+-- Descripción: Agregados por minuto y por hora para gráficos de tendencia
+--              (GET /reportes/tendencias); los alimenta RollupService
+-- ============================================
+--
+-- area_id = 0: totales de órdenes (creadas, completadas, vencidas globales)
+-- area_id > 0: eventos de las asignaciones del área
+-- promedio de seg_acumulados = suma_seg / muestras (una muestra por área activa y tick)
+--
+-- Los buckets por minuto se purgan tras ROLLUP_MINUTOS_RETENCION_HORAS; los
+-- de hora se conservan. Sin FK a areas: las filas son históricas.
+-- ============================================
+
+USE ordenes_multiarea;
+
+CREATE TABLE IF NOT EXISTS kpi_rollups (
+    granularidad VARCHAR(10) NOT NULL COMMENT 'minuto | hora',
+    bucket DATETIME NOT NULL COMMENT 'Inicio del intervalo (UTC)',
+    area_id INT UNSIGNED NOT NULL DEFAULT 0,
+    creadas INT NOT NULL DEFAULT 0,
+    completadas INT NOT NULL DEFAULT 0,
+    vencidas INT NOT NULL DEFAULT 0,
+    suma_seg BIGINT NOT NULL DEFAULT 0,
+    muestras INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularidad, bucket, area_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================
+-- VERIFICACIÓN
+-- ============================================
+SHOW COLUMNS FROM kpi_rollups;
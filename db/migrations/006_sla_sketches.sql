@@ -0,0 +1,30 @@
+-- ============================================
+-- MIGRACIÓN: Sketches de percentiles SLA
+-- DB: MySQL 8.0+
+-- Versión: 006
+-- Descripción: p50/p90/p99 de seg_acumulados y tiempo hasta completar por área
+--              y prioridad (GET /temporizador/percentiles)
+-- ============================================
+--
+-- datos: DDSketch serializado en JSON (src/utils/ddsketch.py). Cada worker
+-- acumula en memoria y el job sla_sketches lo fusiona con la fila cada
+-- SLA_SKETCH_INTERVALO_SEG. Con la tabla vacía, el job reconstruye los
+-- sketches desde orden_area al iniciar.
+-- ============================================
+
+USE ordenes_multiarea;
+
+CREATE TABLE IF NOT EXISTS sla_sketches (
+    metrica VARCHAR(30) NOT NULL COMMENT 'seg_acumulados | tiempo_completar',
+    dimension VARCHAR(20) NOT NULL COMMENT 'area | prioridad | total',
+    clave VARCHAR(50) NOT NULL,
+    datos MEDIUMTEXT NOT NULL,
+    total BIGINT NOT NULL DEFAULT 0,
+    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (metrica, dimension, clave)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================
+-- VERIFICACIÓN
+-- ============================================
+SHOW COLUMNS FROM sla_sketches;
@@ -0,0 +1,60 @@
+-- ============================================
+-- MIGRACIÓN: Índices compuestos para las consultas calientes
+-- DB: MySQL 8.0+
+-- Versión: 007
+-- Descripción: índices ajustados al tick del temporizador y al listado de
+--              órdenes; reemplazan índices de una columna que quedan cubiertos
+-- ============================================
+--
+-- orden_area (estado_parcial, seg_acumulados, orden_id)
+--   * _aplicar_timeouts: estado_parcial = 'EN_PROGRESO' AND seg_acumulados >= SLA
+--     es igualdad + rango sobre el prefijo: solo se leen las áreas vencidas,
+--     no todas las EN_PROGRESO.
+--   * _incrementar_segundos: estado_parcial IN ('EN_PROGRESO', 'PENDIENTE').
+--   * _obtener_ordenes_afectadas: SELECT DISTINCT orden_id ... estado_parcial IN
+--     (...) se resuelve solo con el índice (covering).
+--   Sustituye a idx_orden_area_estado (prefijo) e idx_orden_area_seg (sin
+--   estado no lo usaba ninguna consulta).
+--
+-- ordenes (estado_global, actualizada_en)
+--   * listar_ordenes con filtro de estado: la página (ORDER BY actualizada_en
+--     DESC LIMIT n) se lee en orden del índice, sin filesort. Sin filtro se usa
+--     idx_ordenes_actualizada_en.
+--   Sustituye a idx_ordenes_estado (prefijo).
+--
+-- historial: la línea de tiempo (orden_id = ? ORDER BY timestamp DESC, id DESC)
+--   ya la cubre idx_historial_orden (orden_id, timestamp): InnoDB agrega la
+--   clave primaria (id, timestamp) al final de cada índice secundario, así que
+--   el orden completo sale del índice. No requiere cambios.
+--
+-- ALGORITHM=INPLACE, LOCK=NONE: las tablas siguen aceptando escrituras mientras
+-- se construyen los índices.
+-- ============================================
+
+USE ordenes_multiarea;
+
+ALTER TABLE orden_area
+    ADD INDEX idx_orden_area_estado_seg (estado_parcial, seg_acumulados, orden_id),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE orden_area
+    DROP INDEX idx_orden_area_estado,
+    DROP INDEX idx_orden_area_seg,
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE ordenes
+    ADD INDEX idx_ordenes_estado_actualizada (estado_global, actualizada_en),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE ordenes
+    DROP INDEX idx_ordenes_estado,
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- ============================================
+-- VERIFICACIÓN
+-- ============================================
+EXPLAIN SELECT id, orden_id FROM orden_area
+WHERE estado_parcial = 'EN_PROGRESO' AND seg_acumulados >= 86400;
+
+EXPLAIN SELECT id FROM ordenes
+WHERE estado_global = 'EN_PROGRESO' ORDER BY actualizada_en DESC LIMIT 100;
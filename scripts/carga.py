@@ -0,0 +1,329 @@
+"""
+Prueba de carga contra la API en ejecución
+
+Reproduce la mezcla real de operaciones (crear, asignar áreas, cambiar estado
+parcial, listar, detalle y KPIs) con N clientes concurrentes mientras el
+temporizador de la aplicación sigue haciendo sus ticks, y reporta throughput
+y latencias p50/p95/p99 por operación.
+
+Dos modos:
+    cerrado (por defecto)  Cada cliente lanza la siguiente petición al
+                           terminar la anterior: mide la capacidad máxima.
+    abierto (--rps N)      Las peticiones se programan a N por segundo y la
+                           latencia se mide desde la hora programada, así las
+                           esperas en cola cuentan (sin omisión coordinada).
+
+Si la aplicación expone /metrics, el reporte incluye los ticks ejecutados
+durante la prueba y su duración media, para ver si el tick se degrada bajo
+carga (o si la carga se degrada durante los ticks).
+
+Uso (con datos de scripts/generar_datos.py):
+    python scripts/carga.py --url http://localhost:8000 --duracion 60 --clientes 32
+        [--mezcla crear=10,asignar=10,estado=20,listar=25,detalle=30,kpis=5]
+        [--rps 200] [--calentamiento 5] [--json resultado.json]
+"""
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import sys
+import time
+
+import httpx
+
+
+MEZCLA_POR_DEFECTO = "crear=10,asignar=10,estado=20,listar=25,detalle=30,kpis=5"
+PRIORIDADES = ("BAJA", "MEDIA", "MEDIA", "ALTA", "CRITICA")
+ESTADOS_LISTADO = (None, None, "EN_PROGRESO", "PENDIENTE", "ASIGNADA", "COMPLETADA")
+ESTADOS_NUEVOS = ("EN_PROGRESO", "EN_PROGRESO", "PENDIENTE", "COMPLETADA")
+MAX_IDS = 5000
+
+
+def leer_mezcla(texto: str) -> Dict[str, int]:
+    mezcla = {}
+    for parte in texto.split(","):
+        nombre, _, peso = parte.partition("=")
+        if nombre.strip() not in OPERACIONES:
+            raise argparse.ArgumentTypeError(
+                f"Operación desconocida: {nombre} (válidas: {', '.join(OPERACIONES)})"
+            )
+        mezcla[nombre.strip()] = int(peso)
+    return mezcla
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por rango más cercano sobre valores ordenados"""
+    if not valores:
+        return 0.0
+    indice = max(0, min(len(valores) - 1, math.ceil(p / 100 * len(valores)) - 1))
+    return valores[indice]
+
+
+class Estado:
+    """Ids conocidos por los clientes: órdenes, órdenes sin áreas y asignaciones"""
+
+    def __init__(self, area_ids: List[int], orden_ids: List[int]):
+        self.area_ids = area_ids
+        self.ordenes = deque(orden_ids, maxlen=MAX_IDS)
+        self.sin_asignar = deque(maxlen=MAX_IDS)
+        self.asignaciones = deque(maxlen=MAX_IDS)
+
+    def registrar_orden(self, orden: Dict):
+        self.ordenes.append(orden["id"])
+        for asignacion in orden.get("asignaciones", []):
+            if asignacion["estado_parcial"] not in ("COMPLETADA", "CERRADA_SIN_SOLUCION", "VENCIDA"):
+                self.asignaciones.append((orden["id"], asignacion["area_id"]))
+
+
+# --- Operaciones: (método, url, json) según el estado; None si no aplica ---
+
+def op_crear(estado: Estado):
+    return "POST", "/ordenes/", {
+        "titulo": f"Carga {random.randrange(10**9)}",
+        "descripcion": "Orden creada por scripts/carga.py",
+        "creador": "carga@empresa.com",
+        "prioridad": random.choice(PRIORIDADES)
+    }
+
+
+def op_asignar(estado: Estado):
+    if not estado.sin_asignar:
+        return None
+    orden_id = estado.sin_asignar.popleft()
+    areas = random.sample(estado.area_ids, min(len(estado.area_ids), random.choice((1, 2, 2, 3))))
+    return "POST", f"/ordenes/{orden_id}/asignaciones", {"area_ids": areas}
+
+
+def op_estado(estado: Estado):
+    if not estado.asignaciones:
+        return None
+    orden_id, area_id = random.choice(estado.asignaciones)
+    return "PATCH", f"/ordenes/{orden_id}/areas/{area_id}", {"nuevo_estado": random.choice(ESTADOS_NUEVOS)}
+
+
+def op_listar(estado: Estado):
+    filtro = random.choice(ESTADOS_LISTADO)
+    return "GET", "/ordenes/?limit=50" + (f"&estado={filtro}" if filtro else ""), None
+
+
+def op_detalle(estado: Estado):
+    if not estado.ordenes:
+        return None
+    return "GET", f"/ordenes/{random.choice(estado.ordenes)}", None
+
+
+def op_kpis(estado: Estado):
+    return "GET", "/kpis", None
+
+
+OPERACIONES = {
+    "crear": op_crear, "asignar": op_asignar, "estado": op_estado,
+    "listar": op_listar, "detalle": op_detalle, "kpis": op_kpis
+}
+# Si una operación todavía no tiene ids con qué trabajar, se reemplaza por la que los genera
+RESPALDO = {"asignar": "crear", "estado": "detalle", "detalle": "listar"}
+
+
+class Resultados:
+    def __init__(self):
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.rechazadas: Dict[str, int] = defaultdict(int)  # 4xx
+        self.errores: Dict[str, int] = defaultdict(int)  # 5xx, timeouts, conexión
+        self.medir = False
+
+    def registrar(self, operacion: str, segundos: float, codigo: Optional[int]):
+        if not self.medir:
+            return
+        self.latencias[operacion].append(segundos)
+        if codigo is None or codigo >= 500:
+            self.errores[operacion] += 1
+        elif codigo >= 400:
+            self.rechazadas[operacion] += 1
+
+
+async def ejecutar(
+    cliente: httpx.AsyncClient, estado: Estado, resultados: Resultados, nombre: str, inicio: float
+):
+    """Una petición de la operación (o de su respaldo); la latencia se cuenta desde `inicio`"""
+    while True:
+        peticion = OPERACIONES[nombre](estado)
+        if peticion is not None or nombre not in RESPALDO:
+            break
+        nombre = RESPALDO[nombre]
+    metodo, url, cuerpo = peticion
+
+    codigo = None
+    try:
+        respuesta = await cliente.request(metodo, url, json=cuerpo)
+        codigo = respuesta.status_code
+    except httpx.HTTPError:
+        pass
+    resultados.registrar(nombre, time.perf_counter() - inicio, codigo)
+
+    if codigo is None or codigo >= 400:
+        return
+    datos = respuesta.json()
+    if nombre == "crear":
+        estado.ordenes.append(datos["id"])
+        estado.sin_asignar.append(datos["id"])
+    elif nombre in ("asignar", "detalle"):
+        estado.registrar_orden(datos)
+    elif nombre == "listar":
+        estado.ordenes.extend(orden["id"] for orden in datos)
+
+
+async def cliente_cerrado(cliente, estado, resultados, operaciones, pesos, fin: float):
+    while time.perf_counter() < fin:
+        nombre = random.choices(operaciones, weights=pesos)[0]
+        await ejecutar(cliente, estado, resultados, nombre, time.perf_counter())
+
+
+async def cliente_abierto(cliente, estado, resultados, operaciones, pesos, fin: float, agenda):
+    while True:
+        programada = next(agenda)
+        if programada >= fin:
+            return
+        espera = programada - time.perf_counter()
+        if espera > 0:
+            await asyncio.sleep(espera)
+        nombre = random.choices(operaciones, weights=pesos)[0]
+        await ejecutar(cliente, estado, resultados, nombre, programada)
+
+
+async def leer_metricas_tick(cliente: httpx.AsyncClient) -> Optional[Dict[str, float]]:
+    """Ticks y suma de duraciones desde /metrics (None si no está habilitado)"""
+    try:
+        respuesta = await cliente.get("/metrics")
+    except httpx.HTTPError:
+        return None
+    if respuesta.status_code != 200:
+        return None
+    valores = {}
+    for nombre in ("temporizador_tick_duracion_segundos_sum", "temporizador_tick_duracion_segundos_count",
+                   "temporizador_tick_retraso_segundos"):
+        encontrado = re.search(rf"^{nombre} ([0-9.e+-]+)$", respuesta.text, re.MULTILINE)
+        valores[nombre] = float(encontrado.group(1)) if encontrado else 0.0
+    return valores
+
+
+async def correr(args) -> Dict:
+    limites = httpx.Limits(max_connections=args.clientes, max_keepalive_connections=args.clientes)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limites) as cliente:
+        area_ids = [area["id"] for area in (await cliente.get("/areas/")).json() if area.get("activo", True)]
+        orden_ids = [orden["id"] for orden in (await cliente.get("/ordenes/?limit=500")).json()]
+        if not area_ids:
+            raise SystemExit("❌ No hay áreas activas (correr scripts/generar_datos.py o cargar los seeds)")
+        estado = Estado(area_ids, orden_ids)
+        resultados = Resultados()
+        operaciones, pesos = zip(*args.mezcla.items())
+
+        ahora = time.perf_counter()
+        inicio_medicion = ahora + args.calentamiento
+        fin = inicio_medicion + args.duracion
+        if args.rps:
+            intervalo = 1 / args.rps
+            agenda = (ahora + i * intervalo for i in range(10**12))
+            tareas = [cliente_abierto(cliente, estado, resultados, operaciones, pesos, fin, agenda)
+                      for _ in range(args.clientes)]
+        else:
+            tareas = [cliente_cerrado(cliente, estado, resultados, operaciones, pesos, fin)
+                      for _ in range(args.clientes)]
+
+        async def iniciar_medicion():
+            nonlocal ticks_antes
+            await asyncio.sleep(args.calentamiento)
+            ticks_antes = await leer_metricas_tick(cliente)
+            resultados.medir = True
+            print(f"📏 Midiendo durante {args.duracion}s...")
+
+        ticks_antes = None
+        modo = f"abierto a {args.rps} peticiones/s" if args.rps else "cerrado"
+        print(f"🚦 {args.clientes} clientes, modo {modo}, mezcla {args.mezcla}, "
+              f"calentamiento {args.calentamiento}s")
+        await asyncio.gather(iniciar_medicion(), *tareas)
+        ticks_despues = await leer_metricas_tick(cliente)
+
+    return reporte(resultados, args.duracion, ticks_antes, ticks_despues)
+
+
+def reporte(resultados: Resultados, duracion: float, antes, despues) -> Dict:
+    operaciones = {}
+    todas = []
+    for nombre, latencias in sorted(resultados.latencias.items()):
+        latencias.sort()
+        todas.extend(latencias)
+        operaciones[nombre] = {
+            "peticiones": len(latencias),
+            "por_segundo": round(len(latencias) / duracion, 1),
+            "rechazadas_4xx": resultados.rechazadas[nombre],
+            "errores": resultados.errores[nombre],
+            **{f"p{p}_ms": round(percentil(latencias, p) * 1000, 1) for p in (50, 95, 99)},
+            "max_ms": round(latencias[-1] * 1000, 1)
+        }
+    todas.sort()
+    total = {
+        "peticiones": len(todas),
+        "por_segundo": round(len(todas) / duracion, 1),
+        "rechazadas_4xx": sum(resultados.rechazadas.values()),
+        "errores": sum(resultados.errores.values()),
+        **{f"p{p}_ms": round(percentil(todas, p) * 1000, 1) for p in (50, 95, 99)},
+        "max_ms": round(todas[-1] * 1000, 1) if todas else 0.0
+    }
+    resultado = {"duracion_seg": duracion, "operaciones": operaciones, "total": total}
+
+    if antes and despues:
+        delta = {clave: despues[clave] - antes[clave] for clave in antes}
+        ticks = delta["temporizador_tick_duracion_segundos_count"]
+        suma = delta["temporizador_tick_duracion_segundos_sum"]
+        resultado["ticks"] = {
+            "ejecutados": int(ticks),
+            "duracion_media_ms": round(suma / ticks * 1000, 1) if ticks else None,
+            "ultimo_retraso_seg": despues["temporizador_tick_retraso_segundos"]
+        }
+    return resultado
+
+
+def imprimir(resultado: Dict):
+    print()
+    print(f"{'operación':<10} {'peticiones':>10} {'por seg':>8} {'4xx':>6} {'errores':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    filas = list(resultado["operaciones"].items()) + [("TOTAL", resultado["total"])]
+    for nombre, datos in filas:
+        print(f"{nombre:<10} {datos['peticiones']:>10} {datos['por_segundo']:>8} {datos['rechazadas_4xx']:>6} "
+              f"{datos['errores']:>8} {datos['p50_ms']:>8} {datos['p95_ms']:>8} {datos['p99_ms']:>8} "
+              f"{datos['max_ms']:>8}")
+    ticks = resultado.get("ticks")
+    if ticks:
+        print(f"\n⏱️  Ticks durante la prueba: {ticks['ejecutados']}, duración media "
+              f"{ticks['duracion_media_ms']} ms, último retraso {ticks['ultimo_retraso_seg']:.3f}s")
+    else:
+        print("\n⏱️  /metrics no disponible: sin datos del temporizador (METRICAS_HABILITADAS=False)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga con la mezcla real de operaciones")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--duracion", type=float, default=60, help="Segundos de medición")
+    parser.add_argument("--calentamiento", type=float, default=5, help="Segundos iniciales sin medir")
+    parser.add_argument("--clientes", type=int, default=16, help="Clientes (conexiones) concurrentes")
+    parser.add_argument("--mezcla", type=leer_mezcla, default=leer_mezcla(MEZCLA_POR_DEFECTO),
+                        help=f"Pesos por operación (por defecto {MEZCLA_POR_DEFECTO})")
+    parser.add_argument("--rps", type=float, help="Modo abierto: peticiones programadas por segundo")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--json", type=Path, help="Guardar el resultado en este archivo")
+    args = parser.parse_args()
+
+    resultado = asyncio.run(correr(args))
+    imprimir(resultado)
+    if args.json:
+        args.json.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 1 if resultado["total"]["errores"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""
+Generador de datos sintéticos a escala de producción
+
+Llena areas, ordenes, orden_area e historial con distribuciones realistas:
+
+- Prioridad: BAJA 25%, MEDIA 45%, ALTA 22%, CRITICA 8%
+- Creación repartida en los últimos --dias; cuanto más vieja la orden, más
+  probable que esté cerrada, con todas sus asignaciones terminadas
+  (COMPLETADA la mayoría, algunas CERRADA_SIN_SOLUCION o vencidas por SLA).
+  Las abiertas tienen áreas ASIGNADA / EN_PROGRESO / PENDIENTE con
+  seg_acumulados por debajo de SLA_SEG, así el tick tiene trabajo real.
+- El estado global sale de EstadoService.estado_para, igual que en la API.
+- Historial coherente con las transiciones: CREADA, AREA_ASIGNADA,
+  CAMBIO_ESTADO_PARCIAL / TIMEOUT_SLA y CAMBIO_ESTADO_GLOBAL.
+
+Inserta con INSERT multi-fila (Core, executemany) en transacciones de
+--lote órdenes con ids asignados por el script, sin pasar por el ORM. Al
+terminar reconcilia los contadores de KPIs contra las tablas. Los rollups de
+tendencias no se rellenan hacia atrás; los sketches SLA se reconstruyen al
+iniciar la aplicación si la tabla sla_sketches está vacía.
+
+Uso:
+    python scripts/generar_datos.py --ordenes 1000000 --asignaciones 5000000 [--areas 200]
+        [--dias 180] [--lote 5000] [--semilla 42]
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+import argparse
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func, insert, select
+
+from src.config import settings
+from src.database import SessionLocal, engine, inicializar_sqlite
+from src.models import Area, Historial, Orden, OrdenArea
+from src.models.historial import CODIGOS_EVENTO
+from src.services.contadores_service import ContadoresService
+from src.services.estado_service import EstadoService
+
+
+PRIORIDADES = (("BAJA", 25), ("MEDIA", 45), ("ALTA", 22), ("CRITICA", 8))
+TERMINALES = (("COMPLETADA", 86), ("CERRADA_SIN_SOLUCION", 7), (settings.ESTADO_TIMEOUT, 7))
+ACTIVOS = (("ASIGNADA", 35), ("EN_PROGRESO", 40), ("PENDIENTE", 25))
+
+# Fracción de órdenes sin asignar (NUEVA) y responsables de ejemplo
+FRACCION_SIN_ASIGNAR = 0.03
+RESPONSABLES = [f"operador{i:03d}@empresa.com" for i in range(1, 201)]
+CREADORES = [f"usuario{i:04d}@empresa.com" for i in range(1, 2001)]
+
+
+def elegir(opciones, rng: random.Random) -> str:
+    valores, pesos = zip(*opciones)
+    return rng.choices(valores, weights=pesos)[0]
+
+
+def evento(orden_id: int, nombre: str, momento: datetime, **campos) -> Dict:
+    """Fila de historial con todas las columnas (executemany requiere las mismas claves)"""
+    return {
+        "orden_id": orden_id, "evento": nombre, "codigo_evento": CODIGOS_EVENTO[nombre],
+        "timestamp": momento, "actor": "GENERADOR", "detalle": None, "area_id": None,
+        "estado_desde": None, "estado_hasta": None, "estado_global": None, "segundos": None,
+        **campos
+    }
+
+
+def asegurar_areas(conexion, cantidad: int) -> List[int]:
+    """Crea las áreas sintéticas que falten hasta tener `cantidad` activas; retorna sus ids"""
+    existentes = conexion.execute(select(Area.id).where(Area.activo.is_(True))).scalars().all()
+    faltan = cantidad - len(existentes)
+    if faltan > 0:
+        numero = conexion.execute(select(func.count()).select_from(Area)).scalar()
+        conexion.execute(insert(Area.__table__), [
+            {"nombre": f"Área sintética {numero + i:05d}", "responsable": f"Responsable {numero + i:05d}",
+             "contacto": f"area{numero + i:05d}@empresa.com", "activo": True}
+            for i in range(1, faltan + 1)
+        ])
+        existentes = conexion.execute(select(Area.id).where(Area.activo.is_(True))).scalars().all()
+    return list(existentes)
+
+
+def generar_lote(
+    rng: random.Random, primer_id: int, cantidad: int, area_ids: List[int],
+    asignaciones_por_orden: float, ahora: datetime, dias: int
+):
+    """Filas de órdenes, asignaciones e historial para `cantidad` órdenes consecutivas"""
+    ordenes, asignaciones, historial = [], [], []
+    base, fraccion = int(asignaciones_por_orden), asignaciones_por_orden - int(asignaciones_por_orden)
+
+    for orden_id in range(primer_id, primer_id + cantidad):
+        edad = rng.random()  # 0 = recién creada, 1 = hace `dias` días
+        creada = ahora - timedelta(seconds=edad * dias * 86400)
+        prioridad = elegir(PRIORIDADES, rng)
+        historial.append(evento(orden_id, "CREADA", creada, estado_global="NUEVA"))
+
+        if rng.random() < FRACCION_SIN_ASIGNAR:
+            k = 0
+        else:
+            k = min(len(area_ids), max(1, base + (rng.random() < fraccion)))
+        # Orden cerrada: todas sus áreas terminaron; abierta: algunas pueden haber terminado
+        cerrada = rng.random() < 0.15 + 0.8 * edad
+        estados = []
+        ultimo = creada
+        for area_id in rng.sample(area_ids, k):
+            asignada = creada + timedelta(seconds=rng.randint(5, 900))
+            responsable = rng.choice(RESPONSABLES)
+            historial.append(evento(orden_id, "AREA_ASIGNADA", asignada, area_id=area_id, detalle=responsable))
+
+            terminada = cerrada or rng.random() < 0.3
+            estado = elegir(TERMINALES, rng) if terminada else elegir(ACTIVOS, rng)
+            fila = {
+                "orden_id": orden_id, "area_id": area_id, "asignada_a": responsable,
+                "estado_parcial": estado, "seg_acumulados": 0, "asignada_en": asignada,
+                "iniciada_en": None, "pausada_en": None, "completada_en": None, "notas": None
+            }
+            if estado == settings.ESTADO_TIMEOUT:
+                fila["seg_acumulados"] = settings.SLA_SEG + rng.randint(0, settings.N_SEG)
+                fila["iniciada_en"] = asignada + timedelta(seconds=rng.randint(1, 600))
+                momento = fila["iniciada_en"] + timedelta(seconds=fila["seg_acumulados"])
+                historial.append(evento(
+                    orden_id, "TIMEOUT_SLA", momento, area_id=area_id, estado_desde="EN_PROGRESO",
+                    estado_hasta=estado, segundos=fila["seg_acumulados"], actor="SISTEMA_TEMPORIZADOR"
+                ))
+            elif estado != "ASIGNADA":
+                # Terminadas: lognormal centrada en ~40% del SLA, algunas cerca del límite
+                if terminada:
+                    segundos = int(min(
+                        settings.SLA_SEG - 1, rng.lognormvariate(0, 0.6) * settings.SLA_SEG * 0.4
+                    ))
+                else:
+                    segundos = rng.randint(0, max(settings.SLA_SEG - settings.N_SEG - 1, 0))
+                fila["seg_acumulados"] = segundos
+                fila["iniciada_en"] = asignada + timedelta(seconds=rng.randint(1, 600))
+                momento = fila["iniciada_en"] + timedelta(seconds=segundos)
+                if estado in ("COMPLETADA", "CERRADA_SIN_SOLUCION"):
+                    fila["completada_en"] = momento
+                elif estado == "PENDIENTE":
+                    fila["pausada_en"] = momento
+                historial.append(evento(
+                    orden_id, "CAMBIO_ESTADO_PARCIAL", momento, area_id=area_id,
+                    estado_desde="ASIGNADA", estado_hasta=estado, actor=responsable
+                ))
+            else:
+                momento = asignada
+            ultimo = max(ultimo, min(momento, ahora))
+            estados.append(estado)
+            asignaciones.append(fila)
+
+        estado_global = EstadoService.estado_para(estados)
+        if estado_global != "NUEVA":
+            historial.append(evento(
+                orden_id, "CAMBIO_ESTADO_GLOBAL", ultimo, estado_desde="NUEVA",
+                estado_hasta=estado_global, estado_global=estado_global, actor="SISTEMA"
+            ))
+        ordenes.append({
+            "id": orden_id, "titulo": f"Orden sintética #{orden_id}",
+            "descripcion": "Generada por scripts/generar_datos.py", "creador": rng.choice(CREADORES),
+            "estado_global": estado_global, "prioridad": prioridad,
+            "creada_en": creada, "actualizada_en": ultimo
+        })
+    return ordenes, asignaciones, historial
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera órdenes, asignaciones e historial sintéticos")
+    parser.add_argument("--ordenes", type=int, default=100_000)
+    parser.add_argument("--asignaciones", type=int, help="Total aproximado (por defecto 5 por orden)")
+    parser.add_argument("--areas", type=int, default=50, help="Áreas activas mínimas (crea las que falten)")
+    parser.add_argument("--dias", type=int, default=180, help="Antigüedad máxima de las órdenes")
+    parser.add_argument("--lote", type=int, default=5000, help="Órdenes por transacción")
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    if settings.DATABASE_BACKEND == "sqlite":
+        if settings.SQLITE_PATH == ":memory:":
+            print("❌ Con SQLITE_PATH=:memory: los datos se pierden al terminar; usar un archivo")
+            return 1
+        inicializar_sqlite()
+
+    rng = random.Random(args.semilla)
+    asignaciones = args.asignaciones if args.asignaciones is not None else args.ordenes * 5
+    por_orden = asignaciones / max(args.ordenes, 1) / (1 - FRACCION_SIN_ASIGNAR)
+    ahora = datetime.utcnow().replace(microsecond=0)
+
+    with engine.begin() as conexion:
+        area_ids = asegurar_areas(conexion, args.areas)
+        siguiente_id = (conexion.execute(select(func.max(Orden.id))).scalar() or 0) + 1
+    if por_orden > len(area_ids):
+        print(f"⚠️  {por_orden:.1f} asignaciones por orden con {len(area_ids)} áreas: se usa el máximo posible")
+
+    print(f"🏭 Generando {args.ordenes:,} órdenes (~{asignaciones:,} asignaciones) "
+          f"sobre {len(area_ids)} áreas, desde el id {siguiente_id}")
+    inicio = time.perf_counter()
+    totales = {"ordenes": 0, "asignaciones": 0, "historial": 0}
+
+    while totales["ordenes"] < args.ordenes:
+        cantidad = min(args.lote, args.ordenes - totales["ordenes"])
+        ordenes, filas_asignaciones, historial = generar_lote(
+            rng, siguiente_id, cantidad, area_ids, por_orden, ahora, args.dias
+        )
+        # executemany: el driver lo envía como INSERT multi-fila
+        with engine.begin() as conexion:
+            conexion.execute(insert(Orden.__table__), ordenes)
+            if filas_asignaciones:
+                conexion.execute(insert(OrdenArea.__table__), filas_asignaciones)
+            conexion.execute(insert(Historial.__table__), historial)
+
+        siguiente_id += cantidad
+        totales["ordenes"] += cantidad
+        totales["asignaciones"] += len(filas_asignaciones)
+        totales["historial"] += len(historial)
+        transcurrido = time.perf_counter() - inicio
+        print(f"   {totales['ordenes']:>12,} órdenes  {totales['asignaciones']:>12,} asignaciones  "
+              f"{totales['historial']:>12,} eventos  ({totales['ordenes'] / transcurrido:,.0f} órdenes/s)")
+
+    db = SessionLocal()
+    try:
+        ContadoresService.reconciliar(db)
+    finally:
+        db.close()
+
+    print(f"✅ {totales['ordenes']:,} órdenes, {totales['asignaciones']:,} asignaciones y "
+          f"{totales['historial']:,} eventos en {time.perf_counter() - inicio:.1f}s "
+          f"(contadores de KPIs reconciliados)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
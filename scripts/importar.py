@@ -0,0 +1,50 @@
+"""
+Importación masiva de órdenes desde la línea de comandos
+
+Usa la misma lógica que POST /ordenes/importar (ImportacionService), pero
+lee el archivo directamente del disco.
+
+Uso:
+    python scripts/importar.py ordenes.ndjson [--formato csv] [--lote 1000] [--errores errores.json]
+"""
+from pathlib import Path
+import argparse
+import json
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.database import SessionLocal
+from src.services.importacion_service import ImportacionService, FORMATOS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa órdenes y asignaciones desde CSV o NDJSON")
+    parser.add_argument("archivo", type=Path)
+    parser.add_argument("--formato", choices=FORMATOS, help="Por defecto según la extensión")
+    parser.add_argument("--lote", type=int, default=1000, help="Órdenes por transacción")
+    parser.add_argument("--errores", type=Path, help="Guardar el detalle de errores en este archivo JSON")
+    args = parser.parse_args()
+
+    formato = args.formato or ImportacionService.formato_de(args.archivo.name)
+
+    db = SessionLocal()
+    try:
+        with open(args.archivo, encoding="utf-8-sig", newline="") as archivo:
+            reporte = ImportacionService.importar(db, archivo, formato, tamano_lote=args.lote)
+    finally:
+        db.close()
+
+    detalle = reporte.pop("detalle_errores")
+    print(json.dumps(reporte, indent=2))
+    if args.errores:
+        args.errores.write_text(json.dumps(detalle, indent=2, ensure_ascii=False), encoding="utf-8")
+    else:
+        for error in detalle[:20]:
+            print(f"  línea {error['linea']}: {error['error']}")
+
+    return 1 if reporte["errores"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Build de los archivos estáticos: nombres con hash y variantes precomprimidas
+
+Copia src/static a STATIC_BUILD_DIR (build/static por defecto):
+- JS y CSS se renombran con el hash de su contenido (ordenes.3fa2b1c9d0.js)
+  y se sirven con Cache-Control inmutable; un cambio genera un nombre nuevo.
+- Los HTML conservan su nombre (se revalidan) y sus referencias se
+  reescriben a las rutas con hash.
+- Cada archivo de texto se guarda también como .gz (nivel 9) y .br si el
+  paquete brotli está instalado.
+
+Uso:
+    python scripts/precomprimir_estaticos.py [origen] [destino]
+"""
+from pathlib import Path
+import gzip
+import hashlib
+import json
+import re
+import shutil
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+CON_HASH = {".js", ".css"}
+COMPRIMIBLES = {".html", ".js", ".css", ".svg", ".json", ".txt"}
+# href="css/styles.css" / src="js/ordenes.js"
+PATRON_REFERENCIA = re.compile(r'(href|src)="((?:css|js)/[^"?#]+)"')
+
+
+def nombre_con_hash(ruta: Path) -> str:
+    digest = hashlib.sha256(ruta.read_bytes()).hexdigest()[:10]
+    return f"{ruta.stem}.{digest}{ruta.suffix}"
+
+
+def precomprimir(ruta: Path):
+    datos = ruta.read_bytes()
+    ruta.with_name(ruta.name + ".gz").write_bytes(gzip.compress(datos, compresslevel=9, mtime=0))
+    if brotli is not None:
+        ruta.with_name(ruta.name + ".br").write_bytes(brotli.compress(datos, quality=11))
+
+
+def construir(origen: Path, destino: Path) -> dict:
+    """
+    Genera el build y retorna el manifest {ruta original: ruta con hash}
+    """
+    if destino.exists():
+        shutil.rmtree(destino)
+    destino.mkdir(parents=True)
+
+    manifest = {}
+    for ruta in sorted(origen.rglob("*")):
+        if not ruta.is_file():
+            continue
+        relativa = ruta.relative_to(origen)
+        if ruta.suffix in CON_HASH:
+            relativa = relativa.with_name(nombre_con_hash(ruta))
+        manifest[ruta.relative_to(origen).as_posix()] = relativa.as_posix()
+        (destino / relativa).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(ruta, destino / relativa)
+
+    def reescribir(coincidencia):
+        atributo, referencia = coincidencia.groups()
+        if referencia not in manifest:
+            return coincidencia.group(0)
+        return f'{atributo}="/static/{manifest[referencia]}"'
+
+    for html in destino.rglob("*.html"):
+        html.write_text(PATRON_REFERENCIA.sub(reescribir, html.read_text(encoding="utf-8")), encoding="utf-8")
+
+    for ruta in list(destino.rglob("*")):
+        if ruta.is_file() and ruta.suffix in COMPRIMIBLES:
+            precomprimir(ruta)
+
+    (destino / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+if __name__ == "__main__":
+    origen = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("src/static")
+    destino = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(settings.STATIC_BUILD_DIR)
+
+    manifest = construir(origen, destino)
+    print(f"📦 {len(manifest)} archivos en {destino} "
+          f"(gzip{' + brotli' if brotli is not None else ''})")
@@ -8,24 +8,98 @@ from functools import lru_cache
 class Settings(BaseSettings):
     """Configuración de la aplicación desde variables de entorno"""
     
-    # Base de datos
+    # Base de datos: mysql | sqlite (SQLITE_PATH: archivo o ":memory:")
+    DATABASE_BACKEND: str = "mysql"
+    SQLITE_PATH: str = "data/ordenes.db"
     DATABASE_HOST: str = "localhost"
     DATABASE_PORT: int = 3306
     DATABASE_NAME: str = "ordenes_multiarea"
     DATABASE_USER: str = "root"
     DATABASE_PASSWORD: str = ""
     
+    # Réplica de lectura (vacío = deshabilitada); usuario y contraseña del primario
+    DATABASE_READ_HOST: str = ""
+    DATABASE_READ_PORT: int = 3306
+    # Tras una escritura, el cliente lee del primario durante esta ventana
+    LECTURA_VENTANA_ESCRITURA_SEG: int = 5
+    
     # Aplicación
     APP_HOST: str = "0.0.0.0"
     APP_PORT: int = 8000
-    DEBUG_MODE: bool = True
+    ENTORNO: str = "desarrollo"  # desarrollo | produccion
+    DEBUG_MODE: bool = False
     LOG_LEVEL: str = "INFO"
     
+    # Pool de conexiones: pool_size + max_overflow debe cubrir los hilos que
+    # consultan a la vez (threadpool de FastAPI, 40 por defecto, más el scheduler)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SEG: int = 30
+    DB_POOL_RECYCLE_SEG: int = 1800
+    # Log de cada sentencia SQL (ignorado con ENTORNO=produccion)
+    DB_ECHO: bool = False
+    # Consultas por petición (headers X-DB-Consultas/X-DB-Tiempo-Ms, ver
+    # src/utils/consultas.py): presupuesto 0 = sin límite; una sentencia
+    # repetida DB_UMBRAL_N_MAS_1 veces se marca como N+1; en modo estricto
+    # cualquiera de los dos responde 500 en lugar de solo avisar
+    DB_PRESUPUESTO_CONSULTAS: int = 0
+    DB_UMBRAL_N_MAS_1: int = 10
+    DB_CONSULTAS_ESTRICTO: bool = False
+    # Consultas lentas (GET /admin/consultas-lentas, ver src/utils/consultas_lentas.py):
+    # umbral en ms (0 = deshabilitado), tamaño del buffer y EXPLAIN por forma
+    CONSULTAS_LENTAS_UMBRAL_MS: int = 200
+    CONSULTAS_LENTAS_MAX: int = 200
+    CONSULTAS_LENTAS_EXPLAIN: bool = True
+    
+    # Ruta async de órdenes (AsyncSession + aiomysql, ver src/database_async.py)
+    DB_ASYNC: bool = False
+    
+    # Trazas locales (spans de peticiones, servicios, SQL y tick en OTLP JSON, ver
+    # src/utils/trazas.py): últimas TRAZAS_MAX en /admin/trazas y, si se
+    # indica, una línea por traza en TRAZAS_ARCHIVO; TRAZAS_MUESTREO = fracción trazada
+    TRAZAS_HABILITADAS: bool = False
+    TRAZAS_MAX: int = 100
+    TRAZAS_ARCHIVO: str = ""
+    TRAZAS_MUESTREO: float = 1.0
+    
+    # GET /metrics (formato Prometheus) y la medición de latencia por ruta
+    METRICAS_HABILITADAS: bool = True
+    
+    # Token para los endpoints /admin (header X-Admin-Token; vacío = deshabilitados)
+    ADMIN_TOKEN: str = ""
+    
     # Temporizador
     N_SEG: int = 10
     SLA_SEG: int = 60
     ESTADO_TIMEOUT: str = "VENCIDA"
     
+    # Archivado de historial (0 días = deshabilitado)
+    HISTORIAL_RETENCION_DIAS: int = 90
+    HISTORIAL_ARCHIVO_DIR: str = "data/historial_archivo"
+    HISTORIAL_ARCHIVO_LOTE: int = 100
+    HISTORIAL_ARCHIVO_INTERVALO_SEG: int = 3600
+    HISTORIAL_SEGMENTO_MAX_MB: int = 64
+    
+    # Particiones mensuales de historial (retención 0 meses = no expirar)
+    HISTORIAL_PARTICION_MESES_ADELANTE: int = 3
+    HISTORIAL_PARTICION_RETENCION_MESES: int = 0
+    HISTORIAL_PARTICION_INTERVALO_SEG: int = 21600
+    
+    # Snapshot de KPIs: antigüedad máxima antes de recalcular en /kpis
+    KPI_CACHE_TTL_SEG: int = 5
+    # Reconciliación de los contadores incrementales contra las tablas
+    KPI_RECONCILIACION_INTERVALO_SEG: int = 300
+    # Rollups por minuto (los de hora se conservan)
+    ROLLUP_MINUTOS_RETENCION_HORAS: int = 48
+    # Sketches de percentiles SLA: error relativo y persistencia periódica
+    SLA_SKETCH_ALPHA: float = 0.01
+    SLA_SKETCH_INTERVALO_SEG: int = 60
+    
+    # Compresión de respuestas y estáticos precomprimidos
+    COMPRESION_MINIMO_BYTES: int = 1024
+    COMPRESION_NIVEL_GZIP: int = 6
+    STATIC_BUILD_DIR: str = "build/static"
+    
     # Seguridad
     SECRET_KEY: str = "dev-secret-key-change-in-production"
     CORS_ORIGINS: list = ["http://localhost:3000", "http://localhost:8000"]
@@ -33,15 +107,38 @@ class Settings(BaseSettings):
     # Zona horaria
     TIMEZONE: str = "America/Bogota"
     
+    @property
+    def db_echo(self) -> bool:
+        """El perfil de producción nunca registra SQL"""
+        return self.DB_ECHO and self.ENTORNO != "produccion"
+    
     @property
     def database_url(self) -> str:
-        """Construye la URL de conexión a MySQL"""
+        """Construye la URL de conexión (MySQL, o SQLite si DATABASE_BACKEND=sqlite)"""
+        if self.DATABASE_BACKEND == "sqlite":
+            return f"sqlite:///{self.SQLITE_PATH}"
         return (
             f"mysql+pymysql://{self.DATABASE_USER}:{self.DATABASE_PASSWORD}"
             f"@{self.DATABASE_HOST}:{self.DATABASE_PORT}/{self.DATABASE_NAME}"
             f"?charset=utf8mb4"
         )
     
+    @property
+    def database_async_url(self) -> str:
+        """URL del primario con el driver async (aiomysql o aiosqlite)"""
+        if self.DATABASE_BACKEND == "sqlite":
+            return f"sqlite+aiosqlite:///{self.SQLITE_PATH}"
+        return self.database_url.replace("mysql+pymysql://", "mysql+aiomysql://", 1)
+    
+    @property
+    def database_read_url(self) -> str:
+        """URL de la réplica de lectura (mismo esquema y credenciales)"""
+        return (
+            f"mysql+pymysql://{self.DATABASE_USER}:{self.DATABASE_PASSWORD}"
+            f"@{self.DATABASE_READ_HOST}:{self.DATABASE_READ_PORT}/{self.DATABASE_NAME}"
+            f"?charset=utf8mb4"
+        )
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
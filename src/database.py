@@ -1,23 +1,122 @@
 """
 Configuración de SQLAlchemy y sesión de base de datos
+
+Backends (DATABASE_BACKEND):
+    mysql   Producción; el esquema sale de db/migrations
+    sqlite  Archivo o ":memory:" (SQLITE_PATH) para desarrollo, pruebas y
+            benchmarks sin servicios externos; el esquema sale de los modelos
+            y se cargan los seeds (inicializar_sqlite)
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text, DateTime, TIMESTAMP
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
+from fastapi import Request
 from typing import Generator
+import os
+import time
 
 from src.config import settings
+from src.utils.consultas import instalar_contador
+from src.utils.consultas_lentas import instalar_registro_lentas
+from src.utils.instrumentacion import instalar_metricas_orm
+from src.utils.pool import pool_medido
+from src.utils.sql import dividir_sentencias, mysql_a_sqlite
 
-# Engine de SQLAlchemy
-engine = create_engine(
-    settings.database_url,
-    echo=settings.DEBUG_MODE,  # Log de queries SQL en modo debug
-    pool_pre_ping=True,  # Verificar conexión antes de usar
-    pool_recycle=3600,  # Reciclar conexiones cada hora
+
+RUTA_SEEDS = "db/seeds/seed_data.sql"
+
+# Conteo de consultas por petición (todos los engines), escrituras de historial y consultas lentas
+instalar_contador()
+instalar_metricas_orm()
+instalar_registro_lentas(
+    settings.CONSULTAS_LENTAS_UMBRAL_MS, settings.CONSULTAS_LENTAS_MAX, settings.CONSULTAS_LENTAS_EXPLAIN
 )
 
+
+class DateTimeSegundos(sqlite.DATETIME):
+    """Guarda fechas como 'YYYY-MM-DD HH:MM:SS', igual que CURRENT_TIMESTAMP y MySQL"""
+    def __init__(self, *args, **kwargs):
+        kwargs["storage_format"] = (
+            "%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+        )
+        super().__init__(*args, **kwargs)
+
+
+def crear_engine_sqlite(ruta: str, nombre_pool: str = "principal"):
+    """
+    Engine SQLite compatible con el comportamiento de MySQL de la aplicación
+    
+    - Fechas con precisión de segundos: los valores escritos por Python y por
+      server_default (CURRENT_TIMESTAMP) comparan y ordenan igual.
+    - Claves foráneas activas (ON DELETE CASCADE de los modelos).
+    - ":memory:" usa una única conexión compartida entre hilos; un archivo usa
+      WAL para que el tick no bloquee las lecturas.
+    """
+    en_memoria = ruta == ":memory:"
+    if not en_memoria and os.path.dirname(ruta):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    opciones = {"poolclass": StaticPool} if en_memoria else {
+        "poolclass": pool_medido(nombre_pool),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SEG,
+    }
+    engine_sqlite = create_engine(
+        f"sqlite:///{ruta}",
+        echo=settings.db_echo,
+        connect_args={"check_same_thread": False},
+        **opciones
+    )
+    engine_sqlite.dialect.colspecs = {
+        **engine_sqlite.dialect.colspecs, DateTime: DateTimeSegundos, TIMESTAMP: DateTimeSegundos
+    }
+
+    @event.listens_for(engine_sqlite, "connect")
+    def _configurar_conexion(conexion_dbapi, _registro):
+        cursor = conexion_dbapi.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        if not en_memoria:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+    return engine_sqlite
+
+
+# Engine de SQLAlchemy
+if settings.DATABASE_BACKEND == "sqlite":
+    engine = crear_engine_sqlite(settings.SQLITE_PATH)
+else:
+    engine = create_engine(
+        settings.database_url,
+        echo=settings.db_echo,  # Log de queries SQL (nunca en producción)
+        poolclass=pool_medido("principal"),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SEG,
+        pool_recycle=settings.DB_POOL_RECYCLE_SEG,  # Antes del wait_timeout de MySQL
+        pool_pre_ping=True,  # Verificar conexión antes de usar
+    )
+
+# Réplica de lectura opcional (DATABASE_READ_HOST vacío = todo va al primario)
+engine_lectura = create_engine(
+    settings.database_read_url,
+    echo=settings.db_echo,
+    poolclass=pool_medido("lectura"),
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SEG,
+    pool_recycle=settings.DB_POOL_RECYCLE_SEG,
+    pool_pre_ping=True,
+) if settings.DATABASE_READ_HOST else None
+
 # Sesión local
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLectura = sessionmaker(autocommit=False, autoflush=False, bind=engine_lectura or engine)
+
+# Cookie que marca la última escritura de un cliente (ver MarcaEscrituraMiddleware)
+COOKIE_ESCRITURA = "ultima_escritura"
 
 # Base para modelos
 Base = declarative_base()
@@ -32,4 +131,70 @@ def get_db() -> Generator[Session, None, None]:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def escritura_reciente(request: Request) -> bool:
+    """True si el cliente escribió dentro de la ventana de read-your-writes"""
+    marca = request.cookies.get(COOKIE_ESCRITURA)
+    if not marca:
+        return False
+    try:
+        return time.time() - float(marca) < settings.LECTURA_VENTANA_ESCRITURA_SEG
+    except ValueError:
+        return False
+
+
+def sesion_lectura_para(request: Request) -> sessionmaker:
+    """Fábrica de sesiones para una petición de solo lectura"""
+    if engine_lectura is None or escritura_reciente(request):
+        return SessionLocal
+    return SessionLectura
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """
+    Dependency para endpoints de solo lectura
+    
+    Usa la réplica si está configurada, salvo que el cliente haya escrito hace
+    menos de LECTURA_VENTANA_ESCRITURA_SEG: entonces lee del primario para
+    ver su propio cambio aunque la réplica vaya atrasada.
+    """
+    db = sesion_lectura_para(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def inicializar_sqlite(engine_sqlite=None, ruta_seeds: str = RUTA_SEEDS) -> bool:
+    """
+    Crea el esquema desde los modelos y carga los seeds si la BD está vacía
+    
+    Retorna:
+        True si se cargaron los seeds
+    """
+    import src.models  # noqa: F401 - registra las tablas en Base.metadata
+    from src.services.contadores_service import ContadoresService
+    
+    engine_sqlite = engine_sqlite or engine
+    Base.metadata.create_all(bind=engine_sqlite)
+    
+    with engine_sqlite.begin() as conexion:
+        if conexion.execute(text("SELECT COUNT(*) FROM areas")).scalar():
+            return False
+        with open(ruta_seeds, encoding="utf-8") as archivo:
+            for sentencia in dividir_sentencias(archivo.read()):
+                adaptada = mysql_a_sqlite(sentencia)
+                if adaptada:
+                    conexion.exec_driver_sql(adaptada)
+    
+    # Los seeds no pasan por los servicios: los contadores se calculan de las tablas
+    db = sessionmaker(bind=engine_sqlite)()
+    try:
+        ContadoresService.reconciliar(db)
+    finally:
+        db.close()
+    
+    print(f"🗄️  SQLite inicializado con seeds ({settings.SQLITE_PATH})")
+    return True
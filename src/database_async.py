@@ -0,0 +1,38 @@
+"""
+Engine y sesión asíncronos para la ruta async de órdenes
+
+Con DB_ASYNC=True los endpoints principales de órdenes se atienden con
+`async def` y AsyncSession sobre aiomysql (ver src/routers/ordenes_async.py):
+una petición esperando a MySQL no ocupa un hilo del threadpool, así que un
+worker sostiene miles de clientes lentos. Con DB_ASYNC=False (por defecto)
+no se crea el engine ni se requiere el driver.
+"""
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from typing import AsyncGenerator
+
+from src.config import settings
+
+_opciones_pool = {} if settings.DATABASE_BACKEND == "sqlite" else {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT_SEG,
+    "pool_recycle": settings.DB_POOL_RECYCLE_SEG,
+    "pool_pre_ping": True,
+}
+
+engine_async = create_async_engine(
+    settings.database_async_url,
+    echo=settings.db_echo,
+    **_opciones_pool
+) if settings.DB_ASYNC else None
+
+# expire_on_commit=False: los servicios async retornan dicts armados antes del cierre
+AsyncSessionLocal = async_sessionmaker(
+    engine_async, autoflush=False, expire_on_commit=False
+) if engine_async is not None else None
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency para endpoints async (Depends(get_async_db))"""
+    async with AsyncSessionLocal() as db:
+        yield db
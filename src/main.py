@@ -2,19 +2,32 @@
 Aplicación principal FastAPI
 Sistema de Enrutamiento de Órdenes Multiárea
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from sqlalchemy import func
+from sqlalchemy.orm import Session
 from contextlib import asynccontextmanager
+import os
 
 from src.config import settings
-from src.routers import ordenes_router, areas_router
+from src.routers import (
+    ordenes_router, areas_router, reportes_router, eventos_router, dashboard_router,
+    admin_router, ordenes_async_router, metricas_router
+)
 from src.routers.temporizador import router as temporizador_router
-from src.database import SessionLocal
-from src.models import Orden
+from src.database import get_read_db, engine, engine_lectura, inicializar_sqlite
+from src.migraciones import avisar_pendientes
+from src.services.estado_service import EstadoService
+from src.services.kpi_service import KpiService
+from src.services.orden_service import OrdenService
 from src.scheduler import temporizador_scheduler
+from src.utils.compresion import CompresionMiddleware
+from src.utils.consultas import ConsultasMiddleware
+from src.utils.instrumentacion import MetricasMiddleware
+from src.utils.perfilador import PerfiladorMiddleware
+from src.utils.trazas import TrazasMiddleware, instalar_trazas
+from src.utils.estaticos import EstaticosPrecomprimidos
+from src.utils.lectura import MarcaEscrituraMiddleware
 
 
 # Lifespan para iniciar/detener el scheduler
@@ -23,6 +36,10 @@ async def lifespan(app: FastAPI):
     """Maneja el ciclo de vida de la aplicación"""
     # Startup: Iniciar temporizador
     print("🚀 Iniciando aplicación...")
+    if settings.DATABASE_BACKEND == "sqlite":
+        inicializar_sqlite()
+    else:
+        avisar_pendientes(engine)
     temporizador_scheduler.iniciar()
     
     yield
@@ -49,15 +66,62 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Siguiente-Cursor", "X-DB-Consultas", "X-DB-Tiempo-Ms", "X-DB-Alerta", "X-Trace-Id"],
+)
+
+# Compresión gzip/brotli de respuestas sobre el umbral
+app.add_middleware(
+    CompresionMiddleware,
+    minimo_bytes=settings.COMPRESION_MINIMO_BYTES,
+    nivel_gzip=settings.COMPRESION_NIVEL_GZIP,
 )
 
-# Servir archivos estáticos
-app.mount("/static", StaticFiles(directory="src/static"), name="static")
+# Consultas SQL y tiempo en DB por petición; avisa (o falla, en modo estricto) ante N+1
+app.add_middleware(
+    ConsultasMiddleware,
+    presupuesto=settings.DB_PRESUPUESTO_CONSULTAS,
+    umbral_n_mas_1=settings.DB_UMBRAL_N_MAS_1,
+    estricto=settings.DB_CONSULTAS_ESTRICTO,
+    registrar_todas=settings.DEBUG_MODE,
+)
 
-# Registrar routers
+# Latencia por ruta y peticiones en curso para /metrics
+if settings.METRICAS_HABILITADAS:
+    app.add_middleware(MetricasMiddleware)
+
+# Perfilado bajo demanda desde /admin/perfilador (sin sesión activa no hace nada)
+if settings.ADMIN_TOKEN:
+    app.add_middleware(PerfiladorMiddleware)
+
+# Read-your-writes: tras una escritura el cliente lee del primario un momento
+if engine_lectura is not None:
+    app.add_middleware(MarcaEscrituraMiddleware, ventana_seg=settings.LECTURA_VENTANA_ESCRITURA_SEG)
+
+# Trazas locales: span raíz por petición (el más externo, cubre todo lo demás)
+if settings.TRAZAS_HABILITADAS:
+    instalar_trazas(
+        settings.TRAZAS_MAX, settings.TRAZAS_ARCHIVO, settings.TRAZAS_MUESTREO,
+        servicios=(OrdenService, EstadoService)
+    )
+    app.add_middleware(TrazasMiddleware)
+
+# Servir archivos estáticos: el build con hash y precomprimido si existe
+DIRECTORIO_ESTATICOS = (
+    settings.STATIC_BUILD_DIR if os.path.isdir(settings.STATIC_BUILD_DIR) else "src/static"
+)
+app.mount("/static", EstaticosPrecomprimidos(directory=DIRECTORIO_ESTATICOS), name="static")
+
+# Registrar routers (las rutas async de órdenes, si están activas, tienen precedencia)
+if settings.DB_ASYNC:
+    app.include_router(ordenes_async_router)
 app.include_router(ordenes_router)
 app.include_router(areas_router)
 app.include_router(temporizador_router)
+app.include_router(reportes_router)
+app.include_router(eventos_router)
+app.include_router(dashboard_router)
+app.include_router(admin_router)
+app.include_router(metricas_router)
 
 
 @app.get("/", tags=["Health"])
@@ -76,47 +140,31 @@ def health_check():
 @app.get("/app", tags=["Frontend"])
 def frontend():
     """Sirve la aplicación frontend"""
-    return FileResponse("src/static/index.html")
+    return FileResponse(
+        os.path.join(DIRECTORIO_ESTATICOS, "index.html"),
+        headers={"Cache-Control": "no-cache"}
+    )
 
 
 @app.get("/kpis", tags=["KPIs"])
-def obtener_kpis():
+def obtener_kpis(db: Session = Depends(get_read_db)):
     """
     KPIs básicos del sistema
     
+    Se sirven desde un snapshot en memoria (ver KpiService) que se recalcula
+    leyendo los contadores por estado global (kpi_contadores), no la tabla
+    ordenes: como máximo una lectura por intervalo, sin importar cuántos
+    dashboards consulten.
+    
     Retorna:
     - total_ordenes: Total de órdenes en el sistema
     - completadas: Órdenes con estado COMPLETADA
     - pendientes: Órdenes en estados PENDIENTE, EN_PROGRESO o ASIGNADA
     - cerradas_sin_solucion: Órdenes cerradas sin resolver
+    - vencidas: Órdenes con estado VENCIDA
     """
-    db = SessionLocal()
     try:
-        total = db.query(func.count(Orden.id)).scalar() or 0
-        
-        completadas = db.query(func.count(Orden.id)).filter(
-            Orden.estado_global == 'COMPLETADA'
-        ).scalar() or 0
-        
-        pendientes = db.query(func.count(Orden.id)).filter(
-            Orden.estado_global.in_(['PENDIENTE', 'EN_PROGRESO', 'ASIGNADA', 'NUEVA'])
-        ).scalar() or 0
-        
-        sin_solucion = db.query(func.count(Orden.id)).filter(
-            Orden.estado_global == 'CERRADA_SIN_SOLUCION'
-        ).scalar() or 0
-        
-        vencidas = db.query(func.count(Orden.id)).filter(
-            Orden.estado_global == 'VENCIDA'
-        ).scalar() or 0
-        
-        return {
-            "total_ordenes": total,
-            "completadas": completadas,
-            "pendientes": pendientes,
-            "cerradas_sin_solucion": sin_solucion,
-            "vencidas": vencidas
-        }
+        return KpiService.obtener_kpis(db)
     except Exception as e:
         return {
             "total_ordenes": 0,
@@ -126,8 +174,6 @@ def obtener_kpis():
             "vencidas": 0,
             "error": str(e)
         }
-    finally:
-        db.close()
 
 
 if __name__ == "__main__":
@@ -137,4 +183,4 @@ if __name__ == "__main__":
         host=settings.APP_HOST,
         port=settings.APP_PORT,
         reload=settings.DEBUG_MODE
-    )
\ No newline at end of file
+    )
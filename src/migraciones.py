@@ -0,0 +1,236 @@
+"""
+Runner de migraciones versionadas
+
+Aplica en orden los scripts db/migrations/NNN_descripcion.sql que falten y
+registra cada uno en la tabla schema_migraciones (versión, nombre, checksum
+y fecha). Las sentencias se separan con dividir_sentencias, así que los
+bloques DELIMITER de los triggers funcionan igual que con el cliente mysql.
+
+En MySQL el DDL hace commit implícito: cada migración se registra al
+terminar y, si una sentencia falla, el runner se detiene en esa versión sin
+marcarla. Las migraciones usan IF NOT EXISTS donde se puede para que
+reintentar sea seguro.
+
+Uso:
+    python -m src.migraciones estado
+    python -m src.migraciones aplicar [--hasta 007]
+    python -m src.migraciones marcar --hasta 006    # base instalada a mano
+
+Con DATABASE_BACKEND=sqlite el esquema sale de los modelos (create_all), así
+que el runner solo registra las versiones como aplicadas.
+"""
+from pathlib import Path
+from sqlalchemy import (
+    Column, MetaData, String, Table, TIMESTAMP, create_engine, insert, inspect, select, text
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import func
+from typing import Dict, List, NamedTuple, Optional
+import argparse
+import hashlib
+import re
+import sys
+
+from src.utils.sql import dividir_sentencias
+
+
+DIRECTORIO_MIGRACIONES = Path(__file__).resolve().parent.parent / "db" / "migrations"
+
+_PATRON_ARCHIVO = re.compile(r"^(\d{3})_(\w+)\.sql$")
+
+# Sentencias de los scripts que son propias del cliente mysql: el runner ya
+# está conectado a la base configurada (DATABASE_NAME puede no ser la de los scripts)
+_SENTENCIAS_OMITIDAS = re.compile(r"\s*(USE|CREATE\s+DATABASE)\b", re.IGNORECASE)
+
+_metadata = MetaData()
+
+tabla_migraciones = Table(
+    "schema_migraciones",
+    _metadata,
+    Column("version", String(3), primary_key=True),
+    Column("nombre", String(150), nullable=False),
+    Column("checksum", String(64), nullable=False),
+    Column("aplicada_en", TIMESTAMP, server_default=func.now())
+)
+
+
+class Migracion(NamedTuple):
+    version: str
+    nombre: str
+    ruta: Path
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.ruta.read_bytes()).hexdigest()
+
+
+def descubrir(directorio: Path = DIRECTORIO_MIGRACIONES) -> List[Migracion]:
+    """Migraciones del directorio ordenadas por versión"""
+    migraciones = []
+    for ruta in sorted(Path(directorio).glob("*.sql")):
+        coincidencia = _PATRON_ARCHIVO.match(ruta.name)
+        if coincidencia:
+            migraciones.append(Migracion(coincidencia.group(1), coincidencia.group(2), ruta))
+
+    versiones = [m.version for m in migraciones]
+    duplicadas = sorted({v for v in versiones if versiones.count(v) > 1})
+    if duplicadas:
+        raise ValueError(f"Versiones de migración duplicadas: {duplicadas}")
+    return migraciones
+
+
+def aplicadas(engine: Engine) -> Dict[str, dict]:
+    """Versiones registradas en schema_migraciones (crea la tabla si falta)"""
+    tabla_migraciones.create(engine, checkfirst=True)
+    with engine.connect() as conexion:
+        return {
+            fila.version: fila._asdict()
+            for fila in conexion.execute(select(tabla_migraciones))
+        }
+
+
+def pendientes(
+    engine: Engine,
+    directorio: Path = DIRECTORIO_MIGRACIONES,
+    hasta: Optional[str] = None
+) -> List[Migracion]:
+    """Migraciones sin registrar, hasta la versión indicada inclusive"""
+    registradas = aplicadas(engine)
+    return [
+        migracion for migracion in descubrir(directorio)
+        if migracion.version not in registradas and (hasta is None or migracion.version <= hasta)
+    ]
+
+
+def _registrar(conexion, migracion: Migracion):
+    conexion.execute(insert(tabla_migraciones).values(
+        version=migracion.version, nombre=migracion.nombre, checksum=migracion.checksum
+    ))
+
+
+def aplicar(
+    engine: Engine,
+    directorio: Path = DIRECTORIO_MIGRACIONES,
+    hasta: Optional[str] = None
+) -> List[str]:
+    """
+    Ejecuta las migraciones pendientes en orden
+
+    Retorna:
+        Versiones aplicadas
+    """
+    aplicadas_ahora = []
+    for migracion in pendientes(engine, directorio, hasta):
+        print(f"🗄️  Migración {migracion.version}_{migracion.nombre}...")
+        texto = migracion.ruta.read_text(encoding="utf-8")
+        with engine.begin() as conexion:
+            for numero, sentencia in enumerate(dividir_sentencias(texto), start=1):
+                if _SENTENCIAS_OMITIDAS.match(sentencia):
+                    continue
+                try:
+                    conexion.exec_driver_sql(sentencia)
+                except Exception as e:
+                    raise RuntimeError(
+                        f"Migración {migracion.version} falló en la sentencia {numero}: {e}"
+                    ) from e
+            _registrar(conexion, migracion)
+        aplicadas_ahora.append(migracion.version)
+    return aplicadas_ahora
+
+
+def marcar(
+    engine: Engine,
+    directorio: Path = DIRECTORIO_MIGRACIONES,
+    hasta: Optional[str] = None
+) -> List[str]:
+    """Registra las migraciones pendientes como aplicadas sin ejecutarlas"""
+    migraciones = pendientes(engine, directorio, hasta)
+    with engine.begin() as conexion:
+        for migracion in migraciones:
+            _registrar(conexion, migracion)
+    return [migracion.version for migracion in migraciones]
+
+
+def modificadas(engine: Engine, directorio: Path = DIRECTORIO_MIGRACIONES) -> List[str]:
+    """Versiones aplicadas cuyo archivo cambió después de aplicarse"""
+    registradas = aplicadas(engine)
+    return [
+        migracion.version for migracion in descubrir(directorio)
+        if migracion.version in registradas
+        and registradas[migracion.version]["checksum"] != migracion.checksum
+    ]
+
+
+def avisar_pendientes(engine: Engine):
+    """Aviso en el arranque si el esquema no está al día (no aplica ni crea nada)"""
+    try:
+        if not inspect(engine).has_table(tabla_migraciones.name):
+            print("⚠️  Sin tabla schema_migraciones: registrar las migraciones ya aplicadas con "
+                  "python -m src.migraciones marcar --hasta <versión>")
+            return
+        faltantes = pendientes(engine)
+    except Exception as e:
+        print(f"⚠️  No se pudo consultar schema_migraciones: {e}")
+        return
+    if faltantes:
+        versiones = ", ".join(f"{m.version}_{m.nombre}" for m in faltantes)
+        print(f"⚠️  Migraciones pendientes: {versiones} (python -m src.migraciones aplicar)")
+
+
+def _crear_base_si_falta(settings):
+    """En MySQL, crea DATABASE_NAME si no existe (como hace 001 con el cliente)"""
+    servidor = create_engine(
+        f"mysql+pymysql://{settings.DATABASE_USER}:{settings.DATABASE_PASSWORD}"
+        f"@{settings.DATABASE_HOST}:{settings.DATABASE_PORT}/?charset=utf8mb4"
+    )
+    try:
+        with servidor.begin() as conexion:
+            conexion.execute(text(
+                f"CREATE DATABASE IF NOT EXISTS `{settings.DATABASE_NAME}` "
+                f"CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"
+            ))
+    finally:
+        servidor.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Migraciones de esquema (db/migrations)")
+    parser.add_argument("accion", choices=("estado", "aplicar", "marcar"))
+    parser.add_argument("--hasta", help="Última versión a considerar (p. ej. 006)")
+    args = parser.parse_args(argv)
+
+    from src.config import settings
+
+    if settings.DATABASE_BACKEND == "mysql" and args.accion == "aplicar":
+        _crear_base_si_falta(settings)
+
+    from src.database import engine
+
+    if args.accion == "estado":
+        registradas = aplicadas(engine)
+        cambiadas = set(modificadas(engine))
+        for migracion in descubrir():
+            if migracion.version in registradas:
+                marca = "⚠️  modificada" if migracion.version in cambiadas else "✅"
+                print(f"{marca} {migracion.version}_{migracion.nombre} "
+                      f"({registradas[migracion.version]['aplicada_en']})")
+            else:
+                print(f"⏳ {migracion.version}_{migracion.nombre} pendiente")
+        return 0
+
+    if args.accion == "marcar" or settings.DATABASE_BACKEND == "sqlite":
+        versiones = marcar(engine, hasta=args.hasta)
+        print(f"✅ Marcadas como aplicadas: {versiones or 'ninguna'}")
+        return 0
+
+    try:
+        versiones = aplicar(engine, hasta=args.hasta)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ Aplicadas: {versiones or 'ninguna (al día)'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,5 +4,6 @@ Modelos de base de datos (SQLAlchemy ORM)
 from src.models.area import Area
 from src.models.orden import Orden, OrdenArea
 from src.models.historial import Historial
+from src.models.kpi import KpiContador, KpiRollup, SlaSketch
 
-__all__ = ["Area", "Orden", "OrdenArea", "Historial"]
\ No newline at end of file
+__all__ = ["Area", "Orden", "OrdenArea", "Historial", "KpiContador", "KpiRollup", "SlaSketch"]
\ No newline at end of file
@@ -1,35 +1,101 @@
 """
 Modelo: Historial de eventos
 """
-from sqlalchemy import Column, Integer, String, Text, Enum, TIMESTAMP, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, SmallInteger, String, Text, Enum, TIMESTAMP, ForeignKey, Index
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 
 from src.database import Base
 
 
+# Códigos compactos de los eventos que genera la aplicación
+CODIGOS_EVENTO = {
+    'CREADA': 1,
+    'AREA_ASIGNADA': 2,
+    'AREA_REMOVIDA': 3,
+    'CAMBIO_ESTADO_PARCIAL': 4,
+    'CAMBIO_ESTADO_GLOBAL': 5,
+    'TIMEOUT_SLA': 6,
+}
+
+ESTADOS = (
+    'NUEVA', 'ASIGNADA', 'EN_PROGRESO', 'PENDIENTE',
+    'COMPLETADA', 'CERRADA_SIN_SOLUCION', 'VENCIDA'
+)
+
+
 class Historial(Base):
     __tablename__ = "historial"
-    
+
+    # En MySQL particionado (migración 002) la PK real es (id, timestamp) y no hay
+    # FK a ordenes; id sigue siendo único (AUTO_INCREMENT) y basta como identidad ORM
     id = Column(Integer, primary_key=True, autoincrement=True)
     orden_id = Column(Integer, ForeignKey("ordenes.id", ondelete="CASCADE"), nullable=False)
-    
+
     evento = Column(String(100), nullable=False)
-    detalle = Column(Text)
-    
-    estado_global = Column(
-        Enum(
-            'NUEVA', 'ASIGNADA', 'EN_PROGRESO', 'PENDIENTE', 
-            'COMPLETADA', 'CERRADA_SIN_SOLUCION', 'VENCIDA',
-            name='estado_enum'
-        )
-    )
-    
+
+    # Texto libre: solo eventos heredados o datos que no tienen columna propia
+    # (p. ej. la persona asignada). El detalle legible se arma en la lectura.
+    detalle_texto = Column("detalle", Text)
+
+    estado_global = Column(Enum(*ESTADOS, name='estado_enum'))
+
     timestamp = Column(TIMESTAMP, server_default=func.now())
     actor = Column(String(150))
-    
+
+    # Campos estructurados (migración 003); NULL en eventos heredados
+    codigo_evento = Column(SmallInteger)
+    area_id = Column(Integer)
+    estado_desde = Column(Enum(*ESTADOS, name='estado_enum'))
+    estado_hasta = Column(Enum(*ESTADOS, name='estado_enum'))
+    segundos = Column(Integer)
+
+    __table_args__ = (
+        Index("idx_historial_orden", "orden_id", "timestamp"),
+        Index("idx_historial_codigo_ts", "codigo_evento", "timestamp"),
+        Index("idx_historial_area_codigo", "area_id", "codigo_evento"),
+    )
+
     # Relaciones
     orden = relationship("Orden", back_populates="historial")
-    
+    # Sin FK en la BD (tabla particionada); solo lectura para renderizar el detalle
+    area = relationship(
+        "Area",
+        primaryjoin="foreign(Historial.area_id) == Area.id",
+        viewonly=True
+    )
+
+    @validates("evento")
+    def _asignar_codigo(self, key, evento):
+        """Mantiene codigo_evento sincronizado con el nombre del evento"""
+        self.codigo_evento = CODIGOS_EVENTO.get(evento)
+        return evento
+
+    @property
+    def detalle(self) -> str | None:
+        """Descripción legible del evento, renderizada desde los campos estructurados"""
+        if self.codigo_evento is None:
+            return self.detalle_texto
+
+        area = self.area.nombre if self.area is not None else f"#{self.area_id}"
+
+        if self.evento == 'CREADA':
+            return f'Orden creada: {self.orden.titulo}' if self.orden else 'Orden creada'
+        if self.evento == 'AREA_ASIGNADA':
+            return f'Área asignada: {area}' + (f' → {self.detalle_texto}' if self.detalle_texto else '')
+        if self.evento == 'AREA_REMOVIDA':
+            return f'Área removida: {area}'
+        if self.evento == 'CAMBIO_ESTADO_PARCIAL':
+            return f'Área {area}: {self.estado_desde} → {self.estado_hasta}'
+        if self.evento == 'CAMBIO_ESTADO_GLOBAL':
+            return f'Estado global: {self.estado_desde} → {self.estado_hasta}'
+        # TIMEOUT_SLA
+        return (f'Área {area} superó el SLA (acumulados: {self.segundos}s). '
+                f'Estado: {self.estado_desde} → {self.estado_hasta}')
+
+    @detalle.setter
+    def detalle(self, valor: str | None):
+        self.detalle_texto = valor
+
     def __repr__(self):
-        return f"<Historial(orden_id={self.orden_id}, evento='{self.evento}')>"
\ No newline at end of file
+        return f"<Historial(orden_id={self.orden_id}, evento='{self.evento}')>"
@@ -0,0 +1,56 @@
+"""
+Modelos: Contadores incrementales, rollups por intervalo y sketches de KPIs/SLA
+"""
+from sqlalchemy import Column, Integer, String, Text, BigInteger, DateTime, TIMESTAMP
+from sqlalchemy.sql import func
+
+from src.database import Base
+
+
+class KpiContador(Base):
+    __tablename__ = "kpi_contadores"
+    
+    # ambito: estado_global | estado_parcial | sla
+    ambito = Column(String(30), primary_key=True)
+    clave = Column(String(50), primary_key=True)
+    total = Column(BigInteger, nullable=False, default=0)
+    actualizado_en = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<KpiContador({self.ambito}.{self.clave}={self.total})>"
+
+
+class KpiRollup(Base):
+    __tablename__ = "kpi_rollups"
+    
+    # granularidad: minuto | hora; bucket: inicio del intervalo (UTC)
+    granularidad = Column(String(10), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    # 0 = totales de órdenes; >0 = eventos de las asignaciones de esa área
+    area_id = Column(Integer, primary_key=True, default=0)
+    
+    creadas = Column(Integer, nullable=False, default=0)
+    completadas = Column(Integer, nullable=False, default=0)
+    vencidas = Column(Integer, nullable=False, default=0)
+    # Muestras de seg_acumulados de áreas activas tomadas en cada tick
+    suma_seg = Column(BigInteger, nullable=False, default=0)
+    muestras = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<KpiRollup({self.granularidad} {self.bucket} area={self.area_id})>"
+
+
+class SlaSketch(Base):
+    __tablename__ = "sla_sketches"
+    
+    # metrica: seg_acumulados | tiempo_completar; dimension: area | prioridad | total
+    metrica = Column(String(30), primary_key=True)
+    dimension = Column(String(20), primary_key=True)
+    clave = Column(String(50), primary_key=True)
+    # DDSketch serializado (src/utils/ddsketch.py)
+    datos = Column(Text, nullable=False)
+    total = Column(BigInteger, nullable=False, default=0)
+    actualizado_en = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<SlaSketch({self.metrica}/{self.dimension}={self.clave}, n={self.total})>"
@@ -2,7 +2,7 @@
 Modelos: Órdenes y Asignaciones de Áreas
 """
 from sqlalchemy import (
-    Column, Integer, String, Text, Enum, TIMESTAMP, ForeignKey
+    Column, Integer, String, Text, Enum, TIMESTAMP, ForeignKey, Index, UniqueConstraint
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -41,6 +41,12 @@ class Orden(Base):
         onupdate=func.now()
     )
     
+    # Índices de las migraciones 001 y 007 (listado por estado, orden por actualización)
+    __table_args__ = (
+        Index("idx_ordenes_estado_actualizada", "estado_global", "actualizada_en"),
+        Index("idx_ordenes_actualizada_en", "actualizada_en"),
+    )
+    
     # Relaciones
     asignaciones = relationship(
         "OrdenArea", 
@@ -85,6 +91,12 @@ class OrdenArea(Base):
     
     notas = Column(Text)
     
+    # Índices de las migraciones 001 y 007 (tick del temporizador)
+    __table_args__ = (
+        UniqueConstraint("orden_id", "area_id", name="uk_orden_area"),
+        Index("idx_orden_area_estado_seg", "estado_parcial", "seg_acumulados", "orden_id"),
+    )
+    
     # Relaciones
     orden = relationship("Orden", back_populates="asignaciones")
     area = relationship("Area", back_populates="asignaciones")
@@ -3,5 +3,14 @@ Routers de la API
 """
 from src.routers.ordenes import router as ordenes_router
 from src.routers.areas import router as areas_router
+from src.routers.reportes import router as reportes_router
+from src.routers.eventos import router as eventos_router
+from src.routers.dashboard import router as dashboard_router
+from src.routers.admin import router as admin_router
+from src.routers.ordenes_async import router as ordenes_async_router
+from src.routers.metricas import router as metricas_router
 
-__all__ = ["ordenes_router", "areas_router"]
\ No newline at end of file
+__all__ = [
+    "ordenes_router", "areas_router", "reportes_router", "eventos_router", "dashboard_router",
+    "admin_router", "ordenes_async_router", "metricas_router"
+]
\ No newline at end of file
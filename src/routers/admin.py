@@ -0,0 +1,189 @@
+"""
+Router: Endpoints de administración y diagnóstico
+
+Requieren el header X-Admin-Token igual a ADMIN_TOKEN; si ADMIN_TOKEN está
+vacío, los endpoints responden 404 (deshabilitados).
+"""
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import secrets
+
+from src.config import settings
+from src.database import engine, engine_lectura
+from src.services.temporizador_service import TemporizadorService
+from src.utils import consultas_lentas, trazas
+from src.utils.perfilador import SesionPerfilado, codigos_de_ruta, perfilador
+from src.utils.pool import estado_pool
+
+
+def verificar_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency: valida el token de administración"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Token de administración inválido")
+
+
+router = APIRouter(prefix="/admin", tags=["Administración"], dependencies=[Depends(verificar_admin)])
+
+
+@router.get("/pool")
+def obtener_estado_pool():
+    """
+    Estado del pool de conexiones
+    
+    - **actual**: conexiones en uso, libres y overflow
+    - **totales**: checkouts, esperas por conexión, timeouts y conexiones creadas
+    - **latencia_checkout_seg**: p50/p95/p99 e histograma acumulado del checkout
+    
+    Incluye el pool de la réplica de lectura si está configurada.
+    """
+    pools = {"principal": estado_pool(engine)}
+    if engine_lectura is not None:
+        pools["lectura"] = estado_pool(engine_lectura)
+    return pools
+
+
+def _iniciar_perfilado(sesion: SesionPerfilado) -> dict:
+    try:
+        perfilador.iniciar(sesion)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return sesion.estado()
+
+
+@router.post("/perfilador/ruta")
+def perfilar_ruta(
+    request: Request,
+    ruta: str = Query(..., description="Plantilla de la ruta, p. ej. /ordenes o /ordenes/{orden_id}"),
+    metodo: str = Query("GET"),
+    peticiones: int = Query(20, ge=1, le=10000, description="Peticiones a perfilar"),
+    intervalo_ms: float = Query(5, ge=1, le=1000, description="Intervalo de muestreo"),
+    timeout_seg: int = Query(300, ge=1, le=3600, description="Fin de la sesión aunque falten peticiones")
+):
+    """
+    Perfila por muestreo las próximas N peticiones a una ruta
+    
+    Solo se registran las pilas que pasan por el endpoint de esa ruta. El
+    resultado queda en GET /admin/perfilador/resultado al terminar.
+    """
+    metodo = metodo.upper()
+    objetivos = codigos_de_ruta(request.app.routes, ruta, metodo)
+    if not objetivos:
+        raise HTTPException(status_code=404, detail=f"No hay endpoint para {metodo} {ruta}")
+    return _iniciar_perfilado(SesionPerfilado(
+        "ruta", f"{metodo} {ruta}", objetivos, peticiones, intervalo_ms / 1000, timeout_seg,
+        ruta=ruta, metodo=metodo
+    ))
+
+
+@router.post("/perfilador/tick")
+def perfilar_tick(
+    ticks: int = Query(1, ge=1, le=100),
+    intervalo_ms: float = Query(2, ge=1, le=1000),
+    timeout_seg: int = Query(300, ge=1, le=3600)
+):
+    """Perfila por muestreo los próximos ticks del temporizador"""
+    return _iniciar_perfilado(SesionPerfilado(
+        "tick", "tick", frozenset({TemporizadorService.ejecutar_tick.__code__}),
+        ticks, intervalo_ms / 1000, timeout_seg
+    ))
+
+
+@router.get("/perfilador")
+def estado_perfilador():
+    """Sesión de perfilado actual o la última terminada"""
+    sesion = perfilador.sesion
+    return sesion.estado() if sesion else {"activa": False}
+
+
+@router.get("/perfilador/resultado", response_class=PlainTextResponse)
+def resultado_perfilador(
+    formato: str = Query("colapsado", pattern="^(colapsado|resumen)$")
+):
+    """
+    Resultado de la última sesión
+    
+    - **colapsado**: pilas colapsadas para flamegraph.pl / speedscope / inferno
+    - **resumen**: funciones por muestras propias y acumuladas (estilo pstats)
+    """
+    sesion = perfilador.sesion
+    if sesion is None:
+        raise HTTPException(status_code=404, detail="No hay sesiones de perfilado")
+    return sesion.colapsado() if formato == "colapsado" else sesion.resumen()
+
+
+@router.delete("/perfilador")
+def cancelar_perfilador():
+    """Detiene la sesión activa (conserva las muestras tomadas)"""
+    perfilador.cancelar()
+    return estado_perfilador()
+
+
+def _registro_lentas() -> consultas_lentas.RegistroConsultasLentas:
+    if consultas_lentas.registro_lentas is None:
+        raise HTTPException(
+            status_code=404, detail="Registro de consultas lentas deshabilitado (CONSULTAS_LENTAS_UMBRAL_MS=0)"
+        )
+    return consultas_lentas.registro_lentas
+
+
+@router.get("/consultas-lentas")
+def listar_consultas_lentas(
+    limite: int = Query(50, ge=1, le=1000),
+    contexto: Optional[str] = Query(None, description="Ej: 'GET /ordenes', 'tick', 'job:archivado'")
+):
+    """
+    Consultas que superaron CONSULTAS_LENTAS_UMBRAL_MS (más recientes primero)
+    
+    Cada entrada trae su contexto, la sentencia y los parámetros redactados
+    (solo tipos) y el EXPLAIN de su forma; `formas` agrega por forma de
+    sentencia, ordenadas por tiempo total.
+    """
+    registro = _registro_lentas()
+    return {
+        "umbral_ms": registro.umbral_seg * 1000,
+        "consultas": registro.listar(limite, contexto),
+        "formas": registro.resumen_formas()
+    }
+
+
+@router.delete("/consultas-lentas")
+def limpiar_consultas_lentas():
+    """Vacía el buffer y las formas (los EXPLAIN se vuelven a capturar)"""
+    _registro_lentas().limpiar()
+    return {"mensaje": "Registro de consultas lentas vaciado"}
+
+
+def _colector_trazas() -> trazas.ColectorTrazas:
+    if trazas.colector is None:
+        raise HTTPException(status_code=404, detail="Trazas deshabilitadas (TRAZAS_HABILITADAS=False)")
+    return trazas.colector
+
+
+@router.get("/trazas")
+def listar_trazas(limite: int = Query(50, ge=1, le=1000)):
+    """Últimas trazas terminadas: span raíz, duración, errores y cantidad de spans"""
+    return _colector_trazas().resumen(limite)
+
+
+@router.get("/trazas/{trace_id}")
+def obtener_traza(trace_id: str):
+    """
+    Traza completa en OTLP/JSON (ExportTraceServiceRequest)
+    
+    Se puede enviar tal cual a un OpenTelemetry Collector
+    (POST /v1/traces con Content-Type: application/json).
+    """
+    traza = _colector_trazas().buscar(trace_id)
+    if traza is None:
+        raise HTTPException(status_code=404, detail="Traza no encontrada (ya salió del buffer o no existe)")
+    return trazas.traza_a_otlp(traza)
+
+
+@router.delete("/trazas")
+def limpiar_trazas():
+    """Vacía el colector en memoria (no toca TRAZAS_ARCHIVO)"""
+    _colector_trazas().limpiar()
+    return {"mensaje": "Trazas eliminadas"}
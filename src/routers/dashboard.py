@@ -0,0 +1,71 @@
+"""
+Router: Carga inicial del dashboard en una sola petición
+"""
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from typing import Callable, Dict, Optional
+import asyncio
+
+from src.database import sesion_lectura_para
+from src.services.kpi_service import KpiService
+from src.services.orden_service import OrdenService
+from src.services.temporizador_service import TemporizadorService
+from src.routers.temporizador import obtener_estado_temporizador
+from src.utils.serializacion import RespuestaJSON
+
+router = APIRouter(tags=["Dashboard"])
+
+
+def _con_sesion(funcion: Callable, fabrica: Callable) -> Callable[[], object]:
+    """
+    Ejecuta la sección con su propia sesión
+    
+    La sesión solo toma una conexión del pool si la sección consulta la BD;
+    las que responden desde cache no la usan.
+    """
+    def ejecutar():
+        db = fabrica()
+        try:
+            return funcion(db)
+        finally:
+            db.close()
+    return ejecutar
+
+
+@router.get("/dashboard", response_model=Dict)
+async def obtener_dashboard(
+    request: Request,
+    estado: Optional[str] = Query(None, description="Filtrar órdenes por estado global"),
+    limit: int = Query(100, ge=1, le=500, description="Máximo de órdenes"),
+    secciones: Optional[str] = Query(
+        None, description="Secciones separadas por coma (default: todas)"
+    )
+):
+    """
+    KPIs, órdenes, estado del temporizador y estadísticas SLA en una respuesta
+    
+    Equivale a /kpis, /ordenes, /temporizador/estado y
+    /temporizador/estadisticas-sla. Las secciones se calculan en paralelo, cada
+    una con su sesión (de la réplica si está configurada), y KPIs y SLA salen
+    de sus caches cuando están vigentes.
+    """
+    fabrica = sesion_lectura_para(request)
+    disponibles = {
+        "kpis": _con_sesion(KpiService.obtener_kpis, fabrica),
+        "ordenes": _con_sesion(lambda db: OrdenService.listar_ordenes(db, estado, 0, limit), fabrica),
+        "temporizador": obtener_estado_temporizador,
+        "estadisticas_sla": _con_sesion(TemporizadorService.obtener_estadisticas_sla_cacheadas, fabrica),
+    }
+    
+    pedidas = [s.strip() for s in secciones.split(",")] if secciones else list(disponibles)
+    desconocidas = [s for s in pedidas if s not in disponibles]
+    if desconocidas:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Secciones inválidas: {', '.join(desconocidas)}. Use: {', '.join(disponibles)}"
+        )
+    
+    resultados = await asyncio.gather(
+        *(run_in_threadpool(disponibles[seccion]) for seccion in pedidas)
+    )
+    return RespuestaJSON(dict(zip(pedidas, resultados)))
@@ -0,0 +1,42 @@
+"""
+Router: Feed de cambios en tiempo real (Server-Sent Events)
+"""
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
+
+from src.utils.eventos import bus_eventos
+
+router = APIRouter(prefix="/eventos", tags=["Eventos"])
+
+# Intervalo del comentario keep-alive (evita cierres por proxies inactivos)
+INTERVALO_PING_SEG = 15
+
+
+@router.get("/stream")
+async def stream_eventos(request: Request):
+    """
+    Stream SSE con los cambios del sistema
+    
+    Eventos: `orden`, `asignacion`, `tick`, `sla` y `kpis`. Cada mensaje lleva
+    en `data` un JSON con tipo, datos y timestamp. Un único EventSource por
+    pestaña reemplaza el polling del dashboard, del widget y del detalle.
+    """
+    async def generar():
+        async with bus_eventos.suscripcion() as cola:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    mensaje = await asyncio.wait_for(cola.get(), timeout=INTERVALO_PING_SEG)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                datos = json.dumps(mensaje, ensure_ascii=False, default=str)
+                yield f"event: {mensaje['tipo']}\ndata: {datos}\n\n"
+
+    return StreamingResponse(
+        generar(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
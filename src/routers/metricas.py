@@ -0,0 +1,38 @@
+"""
+Router: Métricas en formato de Prometheus
+
+GET /metrics expone los valores ya agregados en memoria
+(src/utils/instrumentacion.py); el scrape no consulta la base de datos.
+Configuración de Prometheus:
+
+    scrape_configs:
+      - job_name: ordenes
+        scrape_interval: 5s
+        static_configs:
+          - targets: ["localhost:8000"]
+"""
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from src.config import settings
+from src.database import engine, engine_lectura
+from src.utils.instrumentacion import colector_pools, registro
+
+
+TIPO_CONTENIDO = "text/plain; version=0.0.4; charset=utf-8"
+
+router = APIRouter(tags=["Métricas"])
+
+registro.colector(colector_pools({"principal": engine, "lectura": engine_lectura}))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def obtener_metricas():
+    """
+    Métricas de peticiones, pool de conexiones, temporizador, historial y caches
+    
+    Deshabilitado (404) con METRICAS_HABILITADAS=False.
+    """
+    if not settings.METRICAS_HABILITADAS:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(registro.exponer(), media_type=TIPO_CONTENIDO)
@@ -1,21 +1,33 @@
 """
 Router: Endpoints de órdenes
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
+import io
 
-from src.database import get_db
+from src.database import get_db, get_read_db
 from src.schemas.orden import (
     OrdenCreate, OrdenResponse, OrdenListResponse,
     AsignacionCreate, CambioEstadoRequest, OrdenAreaResponse
 )
-from src.schemas.historial import HistorialResponse
-from src.services.orden_service import OrdenService
-from src.models import Historial
+from src.schemas.historial import HistorialResponse, FiltrosHistorial
+from src.services.orden_service import OrdenService, COLUMNAS_EXPORTACION
+from src.services.historial_service import HistorialService
+from src.services.importacion_service import ImportacionService
+from src.models import Orden
+from src.utils.serializacion import RespuestaJSON
+from src.utils.exportacion import bloques_ndjson, bloques_csv
 
 router = APIRouter(prefix="/ordenes", tags=["Órdenes"])
 
+COLUMNAS_CSV_ASIGNACION = [
+    'id', 'area_id', 'area_nombre', 'asignada_a', 'estado_parcial',
+    'seg_acumulados', 'asignada_en', 'iniciada_en', 'completada_en'
+]
+
 
 @router.post("/", response_model=OrdenResponse, status_code=201)
 def crear_orden(
@@ -37,12 +49,33 @@ def crear_orden(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/importar")
+def importar_ordenes(
+    archivo: UploadFile = File(..., description="CSV o NDJSON con una orden por registro"),
+    formato: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="Por defecto según la extensión"),
+    lote: int = Query(500, ge=1, le=5000, description="Órdenes por transacción"),
+    db: Session = Depends(get_db)
+):
+    """
+    Importa órdenes (y sus áreas) en bloque desde un archivo
+    
+    Cada registro se valida con las reglas de **POST /ordenes** y de
+    **POST /ordenes/{id}/asignaciones** (`area_ids`, `asignada_a`). Las filas
+    válidas se insertan por lotes; las inválidas se informan por línea sin
+    detener la importación.
+    """
+    texto = io.TextIOWrapper(archivo.file, encoding="utf-8-sig", newline="")
+    return ImportacionService.importar(
+        db, texto, formato or ImportacionService.formato_de(archivo.filename), tamano_lote=lote
+    )
+
+
 @router.get("/", response_model=List[OrdenListResponse])
 def listar_ordenes(
     estado: Optional[str] = Query(None, description="Filtrar por estado global"),
     skip: int = Query(0, ge=0, description="Órdenes a omitir"),
     limit: int = Query(100, ge=1, le=500, description="Máximo de órdenes"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Lista órdenes con agregaciones
@@ -51,13 +84,52 @@ def listar_ordenes(
     - Incluye conteo de áreas y segundos acumulados
     """
     ordenes = OrdenService.listar_ordenes(db, estado, skip, limit)
-    return ordenes
+    return RespuestaJSON(ordenes)
+
+
+@router.get("/export")
+def exportar_ordenes(
+    estado: Optional[str] = Query(None, description="Filtrar por estado global"),
+    formato: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson | csv"),
+    asignaciones: bool = Query(False, description="Incluir las asignaciones de cada orden"),
+    totales: bool = Query(True, description="Incluir num_areas, areas_completadas y total_segundos"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Exporta todas las órdenes en streaming, ordenadas por id
+    
+    - **formato=ndjson**: una orden por línea (con `asignaciones` anidadas si se piden)
+    - **formato=csv**: una fila por orden, o por asignación si se piden
+    
+    Usa un cursor del servidor: memoria constante sin importar el tamaño de la tabla.
+    """
+    registros = OrdenService.iterar_exportacion(db, estado, asignaciones, totales)
+    
+    if formato == "ndjson":
+        contenido, media_type = bloques_ndjson(registros), "application/x-ndjson"
+    else:
+        columnas = [c.key for c in COLUMNAS_EXPORTACION]
+        if totales:
+            columnas += ['num_areas', 'areas_completadas', 'total_segundos']
+        contenido = bloques_csv(
+            registros, columnas,
+            anidados='asignaciones' if asignaciones else None,
+            columnas_anidadas=COLUMNAS_CSV_ASIGNACION,
+            prefijo='asignacion_'
+        )
+        media_type = "text/csv; charset=utf-8"
+    
+    return StreamingResponse(
+        contenido,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="ordenes.{formato}"'}
+    )
 
 
 @router.get("/{orden_id}", response_model=OrdenResponse)
 def obtener_orden(
     orden_id: int = Path(..., gt=0, description="ID de la orden"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Obtiene el detalle completo de una orden
@@ -71,11 +143,7 @@ def obtener_orden(
     if not orden:
         raise HTTPException(status_code=404, detail=f"Orden {orden_id} no encontrada")
     
-    # Enriquecer asignaciones con nombre del área
-    for asignacion in orden.asignaciones:
-        asignacion.area_nombre = asignacion.area.nombre
-    
-    return orden
+    return RespuestaJSON(OrdenService.orden_a_dict(orden))
 
 
 @router.post("/{orden_id}/asignaciones", response_model=OrdenResponse)
@@ -161,25 +229,67 @@ def cambiar_estado_parcial(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def filtros_historial(
+    evento: Optional[str] = Query(None, description="Filtrar por tipo de evento"),
+    actor: Optional[str] = Query(None, description="Filtrar por actor"),
+    desde: Optional[datetime] = Query(None, description="Eventos desde esta fecha"),
+    hasta: Optional[datetime] = Query(None, description="Eventos hasta esta fecha")
+) -> FiltrosHistorial:
+    """Dependency con los filtros comunes del historial"""
+    return FiltrosHistorial(evento=evento, actor=actor, desde=desde, hasta=hasta)
+
+
+def _verificar_orden_existe(db: Session, orden_id: int):
+    """Lanza 404 si la orden no existe"""
+    if not db.query(Orden.id).filter(Orden.id == orden_id).first():
+        raise HTTPException(status_code=404, detail=f"Orden {orden_id} no encontrada")
+
+
 @router.get("/{orden_id}/historial", response_model=List[HistorialResponse])
 def obtener_historial(
+    response: Response,
     orden_id: int = Path(..., gt=0),
-    db: Session = Depends(get_db)
+    filtros: FiltrosHistorial = Depends(filtros_historial),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente"),
+    limit: int = Query(200, ge=1, le=1000, description="Máximo de eventos por página"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Obtiene el historial de eventos de una orden, paginado por cursor
+    
+    Ordenado cronológicamente (más reciente primero). Si hay más eventos,
+    el cursor de la siguiente página se envía en el header **X-Siguiente-Cursor**.
+    """
+    _verificar_orden_existe(db, orden_id)
+    
+    try:
+        historial, siguiente = HistorialService.listar_historial(
+            db, orden_id, filtros, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if siguiente:
+        response.headers["X-Siguiente-Cursor"] = siguiente
+    
+    return historial
+
+
+@router.get("/{orden_id}/historial/export")
+def exportar_historial(
+    orden_id: int = Path(..., gt=0),
+    filtros: FiltrosHistorial = Depends(filtros_historial),
+    db: Session = Depends(get_read_db)
 ):
     """
-    Obtiene el historial completo de eventos de una orden
+    Exporta el historial completo de una orden como NDJSON (un evento por línea)
     
-    Ordenado cronológicamente (más reciente primero)
+    Se transmite en lotes, sin cargar todo el historial en memoria
     """
-    historial = db.query(Historial).filter(
-        Historial.orden_id == orden_id
-    ).order_by(Historial.timestamp.desc()).all()
+    _verificar_orden_existe(db, orden_id)
     
-    if not historial:
-        # Verificar si la orden existe
-        from src.models import Orden
-        orden = db.query(Orden).filter(Orden.id == orden_id).first()
-        if not orden:
-            raise HTTPException(status_code=404, detail=f"Orden {orden_id} no encontrada")
+    def generar():
+        for evento_historial in HistorialService.iterar_historial(db, orden_id, filtros):
+            yield HistorialResponse.model_validate(evento_historial).model_dump_json() + "\n"
     
-    return historial
\ No newline at end of file
+    return StreamingResponse(generar(), media_type="application/x-ndjson")
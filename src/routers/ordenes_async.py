@@ -0,0 +1,105 @@
+"""
+Router: Endpoints principales de órdenes en modo async (DB_ASYNC=True)
+
+Mismas rutas y contratos que src/routers/ordenes.py para crear, listar,
+detallar, asignar, quitar áreas y cambiar estados. Se registra antes del
+router sync, así que estas rutas tienen precedencia; export, importación e
+historial siguen en el router sync. Los ids usan el convertidor `:int` para
+que /ordenes/{orden_id:int} no capture /ordenes/export ni /ordenes/importar.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from src.database_async import get_async_db
+from src.schemas.orden import (
+    OrdenCreate, OrdenResponse, OrdenListResponse,
+    AsignacionCreate, CambioEstadoRequest, OrdenAreaResponse
+)
+from src.services.orden_service import OrdenService
+from src.utils.serializacion import RespuestaJSON
+
+router = APIRouter(prefix="/ordenes", tags=["Órdenes"])
+
+
+@router.post("/", response_model=OrdenResponse, status_code=201)
+async def crear_orden(
+    orden_data: OrdenCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Crea una nueva orden de trabajo (ver POST /ordenes)"""
+    try:
+        return await OrdenService.crear_orden_async(db, orden_data)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/", response_model=List[OrdenListResponse])
+async def listar_ordenes(
+    estado: Optional[str] = Query(None, description="Filtrar por estado global"),
+    skip: int = Query(0, ge=0, description="Órdenes a omitir"),
+    limit: int = Query(100, ge=1, le=500, description="Máximo de órdenes"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Lista órdenes con agregaciones (ver GET /ordenes)"""
+    return RespuestaJSON(await OrdenService.listar_ordenes_async(db, estado, skip, limit))
+
+
+@router.get("/{orden_id:int}", response_model=OrdenResponse)
+async def obtener_orden(
+    orden_id: int = Path(..., gt=0, description="ID de la orden"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtiene el detalle completo de una orden"""
+    orden = await OrdenService.obtener_orden_async(db, orden_id)
+    if not orden:
+        raise HTTPException(status_code=404, detail=f"Orden {orden_id} no encontrada")
+    return RespuestaJSON(orden)
+
+
+@router.post("/{orden_id:int}/asignaciones", response_model=OrdenResponse)
+async def asignar_areas(
+    orden_id: int = Path(..., gt=0),
+    asignacion_data: AsignacionCreate = ...,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Asigna una o más áreas a una orden"""
+    try:
+        return await OrdenService.asignar_areas_async(db, orden_id, asignacion_data, actor="API_USER")
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.delete("/{orden_id:int}/asignaciones/{area_id:int}", response_model=OrdenResponse)
+async def quitar_area(
+    orden_id: int = Path(..., gt=0),
+    area_id: int = Path(..., gt=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Quita un área de una orden"""
+    try:
+        return await OrdenService.quitar_area_async(db, orden_id, area_id, actor="API_USER")
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.patch("/{orden_id:int}/areas/{area_id:int}", response_model=OrdenAreaResponse)
+async def cambiar_estado_parcial(
+    orden_id: int = Path(..., gt=0),
+    area_id: int = Path(..., gt=0),
+    cambio_data: CambioEstadoRequest = ...,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Cambia el estado parcial de un área en una orden"""
+    try:
+        return await OrdenService.cambiar_estado_parcial_async(
+            db, orden_id, area_id, cambio_data, actor="API_USER"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,62 @@
+"""
+Router: Reportes sobre el historial estructurado y tendencias de KPIs
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+
+from src.database import get_read_db
+from src.services.historial_service import HistorialService
+from src.services.rollup_service import RollupService
+
+# Rango por defecto y máximo de buckets por consulta de tendencias
+RANGO_TENDENCIAS = {
+    'minuto': (timedelta(hours=1), timedelta(days=2)),
+    'hora': (timedelta(days=2), timedelta(days=90)),
+}
+
+router = APIRouter(prefix="/reportes", tags=["Reportes"])
+
+
+@router.get("/transiciones", response_model=List[Dict])
+def obtener_transiciones(
+    desde: Optional[datetime] = Query(None, description="Eventos desde esta fecha"),
+    hasta: Optional[datetime] = Query(None, description="Eventos hasta esta fecha"),
+    area_id: Optional[int] = Query(None, gt=0, description="Filtrar por área"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Conteo de transiciones de estado parcial en un rango de fechas
+    
+    Retorna una fila por (estado_desde, estado_hasta), de mayor a menor frecuencia
+    """
+    return HistorialService.contar_transiciones(db, desde, hasta, area_id)
+
+
+@router.get("/tendencias", response_model=List[Dict])
+def obtener_tendencias(
+    granularidad: str = Query("minuto", pattern="^(minuto|hora)$", description="Tamaño del bucket"),
+    desde: Optional[datetime] = Query(None, description="Inicio del rango (UTC)"),
+    hasta: Optional[datetime] = Query(None, description="Fin del rango (UTC)"),
+    area_id: int = Query(0, ge=0, description="Área (0 = totales de órdenes)"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Serie temporal de KPIs y SLA desde los rollups
+    
+    Cada bucket trae órdenes creadas, completadas, vencidas y el promedio de
+    seg_acumulados de las áreas activas. Los buckets sin actividad se omiten.
+    Por defecto: última hora por minuto, o últimos 2 días por hora.
+    """
+    por_defecto, maximo = RANGO_TENDENCIAS[granularidad]
+    hasta = hasta or datetime.utcnow()
+    desde = desde or hasta - por_defecto
+    
+    if desde > hasta or hasta - desde > maximo:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Rango inválido: máximo {maximo.days} días con granularidad {granularidad}"
+        )
+    
+    return RollupService.obtener_tendencias(db, granularidad, desde, hasta, area_id)
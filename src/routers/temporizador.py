@@ -1,12 +1,13 @@
 """
 Router: Endpoints del temporizador
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from typing import Dict
+from typing import Dict, List
 
-from src.database import get_db
+from src.database import get_db, get_read_db
 from src.services.temporizador_service import TemporizadorService
+from src.services.sketch_service import SketchService
 from src.scheduler import temporizador_scheduler
 
 router = APIRouter(prefix="/temporizador", tags=["Temporizador"])
@@ -58,7 +59,7 @@ def obtener_estado_temporizador():
 
 
 @router.get("/estadisticas-sla", response_model=Dict)
-def obtener_estadisticas_sla(db: Session = Depends(get_db)):
+def obtener_estadisticas_sla(db: Session = Depends(get_read_db)):
     """
     Obtiene estadísticas sobre el cumplimiento de SLA
     
@@ -69,10 +70,28 @@ def obtener_estadisticas_sla(db: Session = Depends(get_db)):
     - Promedio de segundos acumulados
     - Porcentaje de cumplimiento
     """
-    estadisticas = TemporizadorService.obtener_estadisticas_sla(db)
+    estadisticas = TemporizadorService.obtener_estadisticas_sla_cacheadas(db)
     return estadisticas
 
 
+@router.get("/percentiles", response_model=List[Dict])
+def obtener_percentiles_sla(
+    metrica: str = Query(
+        "seg_acumulados", pattern="^(seg_acumulados|tiempo_completar)$",
+        description="seg_acumulados al terminar, o segundos de asignación a completado"
+    ),
+    dimension: str = Query("area", pattern="^(area|prioridad|total)$", description="Agrupación"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Percentiles p50/p90/p99 de asignaciones terminadas, por área o prioridad
+    
+    Calculados desde sketches con error relativo de SLA_SKETCH_ALPHA (1% por
+    defecto); el costo no crece con el número de asignaciones.
+    """
+    return SketchService.obtener_percentiles(db, metrica, dimension)
+
+
 @router.post("/reiniciar")
 def reiniciar_temporizador():
     """
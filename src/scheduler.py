@@ -3,12 +3,22 @@ Configuración de APScheduler para el temporizador
 """
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from datetime import datetime
+from apscheduler.events import EVENT_JOB_SUBMITTED
+from datetime import datetime, timezone
 import atexit
+import time
 
 from src.database import SessionLocal
 from src.services.temporizador_service import TemporizadorService
+from src.services.archivo_service import ArchivoService
+from src.services.particion_service import ParticionService
+from src.services.contadores_service import ContadoresService
+from src.services.sketch_service import SketchService
 from src.config import settings
+from src.utils.contexto import en_contexto
+from src.utils.instrumentacion import registrar_tick, tick_retraso
+from src.utils.perfilador import perfilador
+from src.utils.trazas import span
 
 
 class TemporizadorScheduler:
@@ -42,18 +52,126 @@ class TemporizadorScheduler:
             max_instances=1  # Evitar ejecuciones concurrentes
         )
         
+        # Job de archivado: mover historial de órdenes cerradas a almacenamiento frío
+        if settings.HISTORIAL_RETENCION_DIAS > 0:
+            self._scheduler.add_job(
+                func=self._ejecutar_archivado_job,
+                trigger=IntervalTrigger(seconds=settings.HISTORIAL_ARCHIVO_INTERVALO_SEG),
+                id='historial_archivado',
+                name='Historial - Archivar órdenes cerradas fuera de retención',
+                replace_existing=True,
+                max_instances=1
+            )
+        
+        # Job de particiones: crear meses futuros y expirar los antiguos (también al iniciar)
+        self._scheduler.add_job(
+            func=self._ejecutar_particiones_job,
+            trigger=IntervalTrigger(seconds=settings.HISTORIAL_PARTICION_INTERVALO_SEG),
+            id='historial_particiones',
+            name='Historial - Mantenimiento de particiones mensuales',
+            replace_existing=True,
+            max_instances=1,
+            next_run_time=datetime.utcnow()
+        )
+        
+        # Job de reconciliación: corregir deriva de los contadores de KPIs (también al iniciar)
+        self._scheduler.add_job(
+            func=self._ejecutar_reconciliacion_job,
+            trigger=IntervalTrigger(seconds=settings.KPI_RECONCILIACION_INTERVALO_SEG),
+            id='kpi_reconciliacion',
+            name='KPIs - Reconciliar contadores incrementales',
+            replace_existing=True,
+            max_instances=1,
+            next_run_time=datetime.utcnow()
+        )
+        
+        # Job de sketches SLA: persistir percentiles (al iniciar reconstruye si no hay datos)
+        self._scheduler.add_job(
+            func=self._ejecutar_sketches_job,
+            trigger=IntervalTrigger(seconds=settings.SLA_SKETCH_INTERVALO_SEG),
+            id='sla_sketches',
+            name='SLA - Persistir sketches de percentiles',
+            replace_existing=True,
+            max_instances=1,
+            next_run_time=datetime.utcnow()
+        )
+        
+        # Retraso de cada tick respecto de su hora programada (/metrics)
+        self._scheduler.add_listener(self._registrar_retraso_tick, EVENT_JOB_SUBMITTED)
+        
         print(f"✅ Scheduler configurado: tick cada {settings.N_SEG}s, SLA={settings.SLA_SEG}s")
     
+    def _registrar_retraso_tick(self, evento):
+        """Listener: segundos entre la hora programada del tick y su envío al executor"""
+        if evento.job_id != 'temporizador_tick' or not evento.scheduled_run_times:
+            return
+        programado = evento.scheduled_run_times[-1]
+        tick_retraso.fijar(max(0.0, (datetime.now(timezone.utc) - programado).total_seconds()))
+    
+    @en_contexto("tick")
+    @span("tick")
     def _ejecutar_tick_job(self):
         """Wrapper para ejecutar el tick con manejo de sesión"""
+        inicio = time.perf_counter()
         db = SessionLocal()
         try:
-            TemporizadorService.ejecutar_tick(db)
+            resultado = TemporizadorService.ejecutar_tick(db)
+            registrar_tick(resultado, time.perf_counter() - inicio)
+            perfilador.tick_terminado()
         except Exception as e:
             print(f"❌ Error en job de temporizador: {e}")
         finally:
             db.close()
     
+    @en_contexto("job:archivado")
+    def _ejecutar_archivado_job(self):
+        """Wrapper para ejecutar el archivado de historial con manejo de sesión"""
+        db = SessionLocal()
+        try:
+            ArchivoService.archivar_historial(db)
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Error en job de archivado: {e}")
+        finally:
+            db.close()
+    
+    @en_contexto("job:particiones")
+    def _ejecutar_particiones_job(self):
+        """Wrapper para el mantenimiento de particiones con manejo de sesión"""
+        db = SessionLocal()
+        try:
+            ParticionService.mantener_particiones(db)
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Error en job de particiones: {e}")
+        finally:
+            db.close()
+    
+    @en_contexto("job:reconciliacion")
+    def _ejecutar_reconciliacion_job(self):
+        """Wrapper para la reconciliación de contadores con manejo de sesión"""
+        db = SessionLocal()
+        try:
+            ContadoresService.reconciliar(db)
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Error en job de reconciliación: {e}")
+        finally:
+            db.close()
+    
+    @en_contexto("job:sketches")
+    def _ejecutar_sketches_job(self):
+        """Wrapper para persistir los sketches SLA con manejo de sesión"""
+        db = SessionLocal()
+        try:
+            SketchService.reconstruir_si_vacio(db)
+            SketchService.persistir(db)
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Error en job de sketches SLA: {e}")
+        finally:
+            db.close()
+    
     def iniciar(self):
         """Inicia el scheduler"""
         if not self._scheduler.running:
@@ -67,6 +185,7 @@ class TemporizadorScheduler:
         """Detiene el scheduler"""
         if self._scheduler and self._scheduler.running:
             self._scheduler.shutdown(wait=True)
+            self._ejecutar_sketches_job()  # No perder los valores aún en memoria
             print("⏹️  Temporizador detenido")
     
     def obtener_jobs(self):
@@ -76,10 +195,12 @@ class TemporizadorScheduler:
         
         jobs_info = []
         for job in self._scheduler.get_jobs():
+            # Antes de iniciar el scheduler los jobs aún no tienen next_run_time
+            proxima = getattr(job, 'next_run_time', None)
             jobs_info.append({
                 'id': job.id,
                 'name': job.name,
-                'next_run': job.next_run_time.isoformat() if job.next_run_time else None,
+                'next_run': proxima.isoformat() if proxima else None,
                 'trigger': str(job.trigger)
             })
         return jobs_info
@@ -6,11 +6,11 @@ from src.schemas.orden import (
     OrdenBase, OrdenCreate, OrdenResponse, OrdenListResponse,
     OrdenAreaBase, OrdenAreaResponse, AsignacionCreate, CambioEstadoRequest
 )
-from src.schemas.historial import HistorialResponse
+from src.schemas.historial import HistorialResponse, FiltrosHistorial
 
 __all__ = [
     "AreaBase", "AreaCreate", "AreaResponse",
     "OrdenBase", "OrdenCreate", "OrdenResponse", "OrdenListResponse",
     "OrdenAreaBase", "OrdenAreaResponse", "AsignacionCreate", "CambioEstadoRequest",
-    "HistorialResponse"
+    "HistorialResponse", "FiltrosHistorial"
 ]
\ No newline at end of file
@@ -14,5 +14,20 @@ class HistorialResponse(BaseModel):
     timestamp: datetime
     actor: str | None
     
+    # Campos estructurados (None en eventos heredados)
+    codigo_evento: int | None = None
+    area_id: int | None = None
+    estado_desde: str | None = None
+    estado_hasta: str | None = None
+    segundos: int | None = None
+    
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class FiltrosHistorial(BaseModel):
+    """Filtros comunes para consultar o exportar el historial"""
+    evento: str | None = None
+    actor: str | None = None
+    desde: datetime | None = None
+    hasta: datetime | None = None
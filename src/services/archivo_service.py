@@ -0,0 +1,208 @@
+"""
+Servicio: Archivado del historial en almacenamiento frío
+
+Los eventos de órdenes cerradas (COMPLETADA / CERRADA_SIN_SOLUCION) más antiguas
+que la ventana de retención se mueven de la tabla historial a segmentos
+comprimidos locales, de solo-anexado:
+
+    <HISTORIAL_ARCHIVO_DIR>/segmento_000001.ndjson.gz
+    <HISTORIAL_ARCHIVO_DIR>/indice.ndjson
+
+Cada orden archivada se escribe como un miembro gzip independiente al final del
+segmento actual, y el índice registra (orden_id, segmento, offset, longitud) para
+leerla sin descomprimir el resto del archivo.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import exists
+from datetime import datetime, timedelta
+from typing import Dict, List
+import gzip
+import json
+import os
+import threading
+
+from src.models import Orden, Historial
+from src.schemas.historial import HistorialResponse
+from src.config import settings
+
+
+ESTADOS_CERRADOS = ['COMPLETADA', 'CERRADA_SIN_SOLUCION']
+
+
+class ArchivoHistorial:
+    """Segmentos comprimidos de historial, indexados por orden_id"""
+
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        self._lock = threading.Lock()
+        self._indice: Dict[int, List[dict]] = {}
+        self._indice_leido = 0  # Bytes del índice ya cargados en memoria
+        self._indice_ruta = None
+
+    @property
+    def _ruta_indice(self) -> str:
+        return os.path.join(self.directorio, "indice.ndjson")
+
+    def _segmento_actual(self) -> str:
+        """Nombre del segmento donde anexar; rota al superar el tamaño máximo"""
+        segmentos = sorted(
+            f for f in os.listdir(self.directorio)
+            if f.startswith("segmento_") and f.endswith(".ndjson.gz")
+        )
+        if segmentos:
+            ultimo = segmentos[-1]
+            tamano = os.path.getsize(os.path.join(self.directorio, ultimo))
+            if tamano < settings.HISTORIAL_SEGMENTO_MAX_MB * 1024 * 1024:
+                return ultimo
+            numero = int(ultimo[len("segmento_"):-len(".ndjson.gz")]) + 1
+        else:
+            numero = 1
+        return f"segmento_{numero:06d}.ndjson.gz"
+
+    def _cargar_indice(self):
+        """Lee solo las entradas nuevas del índice (es de solo-anexado)"""
+        if self._indice_ruta != self._ruta_indice:
+            self._indice = {}
+            self._indice_leido = 0
+            self._indice_ruta = self._ruta_indice
+
+        if not os.path.exists(self._ruta_indice):
+            return
+
+        with open(self._ruta_indice, "rb") as f:
+            f.seek(self._indice_leido)
+            for linea in f:
+                if not linea.endswith(b"\n"):
+                    break  # Escritura en curso: se leerá en la próxima consulta
+                entrada = json.loads(linea)
+                self._indice.setdefault(entrada["orden_id"], []).append(entrada)
+                self._indice_leido += len(linea)
+
+    def anexar(self, orden_id: int, eventos: List[dict]):
+        """
+        Anexa los eventos de una orden a un segmento y los registra en el índice
+
+        Ambos archivos se sincronizan a disco antes de retornar, de modo que el
+        llamador puede borrar las filas de la base de datos con seguridad.
+        """
+        with self._lock:
+            os.makedirs(self.directorio, exist_ok=True)
+            segmento = self._segmento_actual()
+            datos = gzip.compress(
+                "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in eventos).encode()
+            )
+
+            with open(os.path.join(self.directorio, segmento), "ab") as f:
+                offset = f.tell()
+                f.write(datos)
+                f.flush()
+                os.fsync(f.fileno())
+
+            entrada = {
+                "orden_id": orden_id,
+                "segmento": segmento,
+                "offset": offset,
+                "longitud": len(datos),
+                "filas": len(eventos)
+            }
+            with open(self._ruta_indice, "a") as f:
+                f.write(json.dumps(entrada) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def leer(self, orden_id: int) -> List[dict]:
+        """Retorna los eventos archivados de una orden (sin duplicados)"""
+        with self._lock:
+            self._cargar_indice()
+            entradas = list(self._indice.get(orden_id, []))
+
+        eventos = {}
+        for entrada in entradas:
+            with open(os.path.join(self.directorio, entrada["segmento"]), "rb") as f:
+                f.seek(entrada["offset"])
+                datos = gzip.decompress(f.read(entrada["longitud"]))
+            for linea in datos.decode().splitlines():
+                evento = json.loads(linea)
+                # Un archivado interrumpido antes del DELETE puede repetir filas
+                eventos[evento["id"]] = evento
+
+        return list(eventos.values())
+
+    def tiene(self, orden_id: int) -> bool:
+        """Indica si la orden tiene eventos archivados (sin leer segmentos)"""
+        with self._lock:
+            self._cargar_indice()
+            return orden_id in self._indice
+
+
+# Instancia global del archivo
+archivo_historial = ArchivoHistorial(settings.HISTORIAL_ARCHIVO_DIR)
+
+
+class ArchivoService:
+
+    @staticmethod
+    def serializar(evento: Historial) -> dict:
+        """
+        Convierte un evento a dict para guardarlo en un segmento
+
+        El detalle se guarda ya renderizado: el archivo no depende de áreas u
+        órdenes que puedan cambiar después.
+        """
+        return HistorialResponse.model_validate(evento).model_dump(mode="json")
+
+    @staticmethod
+    def deserializar(datos: dict) -> HistorialResponse:
+        """Reconstruye un evento archivado (no es una fila de la sesión)"""
+        return HistorialResponse.model_validate(datos)
+
+    @staticmethod
+    def archivar_historial(db: Session, archivo: ArchivoHistorial = None) -> Dict:
+        """
+        Mueve al archivo el historial de órdenes cerradas fuera de la retención
+
+        Procesa las órdenes en lotes de HISTORIAL_ARCHIVO_LOTE con un commit por
+        lote, para no mantener transacciones largas sobre historial.
+
+        Retorna:
+            Dict con estadísticas de la ejecución
+        """
+        archivo = archivo or archivo_historial
+        corte = datetime.utcnow() - timedelta(days=settings.HISTORIAL_RETENCION_DIAS)
+        resultado = {"ordenes_archivadas": 0, "filas_archivadas": 0}
+
+        while True:
+            ordenes_ids = [
+                fila[0] for fila in db.query(Orden.id).filter(
+                    Orden.estado_global.in_(ESTADOS_CERRADOS),
+                    Orden.actualizada_en < corte,
+                    exists().where(Historial.orden_id == Orden.id)
+                ).order_by(Orden.id).limit(settings.HISTORIAL_ARCHIVO_LOTE).all()
+            ]
+            if not ordenes_ids:
+                break
+
+            for orden_id in ordenes_ids:
+                eventos = db.query(Historial).filter(
+                    Historial.orden_id == orden_id
+                ).order_by(Historial.timestamp, Historial.id).all()
+
+                # Primero a disco; si el DELETE falla se revierte el lote y las filas quedan en
+                # ambos lados: la lectura descarta la copia archivada (HistorialService)
+                # y el próximo archivado la vuelve a anexar (leer() deduplica por id)
+                archivo.anexar(orden_id, [ArchivoService.serializar(e) for e in eventos])
+
+                db.query(Historial).filter(
+                    Historial.id.in_([e.id for e in eventos])
+                ).delete(synchronize_session=False)
+
+                resultado["ordenes_archivadas"] += 1
+                resultado["filas_archivadas"] += len(eventos)
+
+            db.commit()
+
+        if resultado["ordenes_archivadas"]:
+            print(f"🗄️  ARCHIVO: {resultado['ordenes_archivadas']} órdenes, "
+                  f"{resultado['filas_archivadas']} eventos movidos a almacenamiento frío")
+
+        return resultado
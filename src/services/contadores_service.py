@@ -0,0 +1,190 @@
+"""
+Servicio: Contadores incrementales de KPIs (tabla kpi_contadores)
+
+Cada transición de estado registra un delta en la sesión (session.info) y los
+deltas se aplican con un UPDATE total = total + delta justo antes del commit,
+dentro de la misma transacción: si la transacción se revierte, los contadores
+también. Aplicarlos al final acorta el tiempo que se bloquean las filas de
+contadores, que comparten todas las escrituras.
+
+Ámbitos:
+    estado_global   Órdenes por estado global
+    estado_parcial  Asignaciones por estado parcial
+    sla             suma_seg_activas (segundos acumulados de áreas activas) y
+                    cerca_limite (valor que fija cada tick)
+
+Un reconciliador periódico recalcula los valores reales y corrige la deriva
+(cargas directas en la BD, seeds, fallos entre procesos).
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import event, func, update, insert, and_
+from typing import Dict, Optional
+
+from src.models import Orden, OrdenArea, KpiContador
+from src.config import settings
+
+
+ESTADOS_ACTIVOS = ('EN_PROGRESO', 'PENDIENTE')
+
+_CLAVE_DELTAS = "kpi_deltas"
+_CLAVE_FIJOS = "kpi_fijos"
+
+
+class ContadoresService:
+
+    @staticmethod
+    def ajustar(db: Session, ambito: str, clave: str, delta: int):
+        """Acumula un delta para aplicarlo al hacer commit"""
+        if not delta:
+            return
+        deltas = db.info.setdefault(_CLAVE_DELTAS, {})
+        deltas[(ambito, clave)] = deltas.get((ambito, clave), 0) + delta
+
+    @staticmethod
+    def fijar(db: Session, ambito: str, clave: str, valor: int):
+        """Registra un valor absoluto para escribirlo al hacer commit"""
+        db.info.setdefault(_CLAVE_FIJOS, {})[(ambito, clave)] = valor
+
+    @staticmethod
+    def transicion_orden(db: Session, desde: Optional[str], hasta: Optional[str]):
+        """Orden creada (desde=None) o cambio de estado global"""
+        if desde:
+            ContadoresService.ajustar(db, 'estado_global', desde, -1)
+        if hasta:
+            ContadoresService.ajustar(db, 'estado_global', hasta, 1)
+
+    @staticmethod
+    def transicion_area(db: Session, desde: Optional[str], hasta: Optional[str], segundos: int):
+        """Asignación creada (desde=None), eliminada (hasta=None) o cambio de estado parcial"""
+        if desde:
+            ContadoresService.ajustar(db, 'estado_parcial', desde, -1)
+        if hasta:
+            ContadoresService.ajustar(db, 'estado_parcial', hasta, 1)
+
+        # Los segundos solo cuentan para el promedio mientras el área está activa
+        if desde in ESTADOS_ACTIVOS and hasta not in ESTADOS_ACTIVOS:
+            ContadoresService.ajustar(db, 'sla', 'suma_seg_activas', -(segundos or 0))
+        elif hasta in ESTADOS_ACTIVOS and desde not in ESTADOS_ACTIVOS:
+            ContadoresService.ajustar(db, 'sla', 'suma_seg_activas', segundos or 0)
+
+    @staticmethod
+    def leer(db: Session, ambito: str) -> Dict[str, int]:
+        """Valores de un ámbito (lectura por clave primaria, sin importar el tamaño de ordenes)"""
+        return dict(
+            db.query(KpiContador.clave, KpiContador.total)
+            .filter(KpiContador.ambito == ambito)
+            .all()
+        )
+
+    @staticmethod
+    def leer_ambitos(db: Session, *ambitos: str) -> Dict[str, Dict[str, int]]:
+        """Valores de varios ámbitos en una sola consulta"""
+        resultado = {ambito: {} for ambito in ambitos}
+        for ambito, clave, total in db.query(
+            KpiContador.ambito, KpiContador.clave, KpiContador.total
+        ).filter(KpiContador.ambito.in_(ambitos)).all():
+            resultado[ambito][clave] = total
+        return resultado
+
+    @staticmethod
+    def aplicar_pendientes(db: Session):
+        """Escribe los deltas y valores fijos acumulados en la sesión"""
+        deltas = db.info.pop(_CLAVE_DELTAS, None) or {}
+        fijos = db.info.pop(_CLAVE_FIJOS, None) or {}
+        tabla = KpiContador.__table__
+
+        for (ambito, clave), delta in sorted(deltas.items()):
+            if delta:
+                ContadoresService._escribir(db, ambito, clave, tabla.c.total + delta, delta)
+        for (ambito, clave), valor in sorted(fijos.items()):
+            ContadoresService._escribir(db, ambito, clave, valor, valor)
+
+    @staticmethod
+    def _escribir(db: Session, ambito: str, clave: str, expresion, valor_inicial: int):
+        tabla = KpiContador.__table__
+        resultado = db.execute(
+            update(tabla)
+            .where(and_(tabla.c.ambito == ambito, tabla.c.clave == clave))
+            .values(total=expresion)
+        )
+        if resultado.rowcount == 0:
+            db.execute(insert(tabla).values(ambito=ambito, clave=clave, total=valor_inicial))
+
+    @staticmethod
+    def descartar_pendientes(db: Session):
+        db.info.pop(_CLAVE_DELTAS, None)
+        db.info.pop(_CLAVE_FIJOS, None)
+
+    @staticmethod
+    def valores_reales(db: Session) -> Dict[str, Dict[str, int]]:
+        """Recalcula todos los contadores desde las tablas (usado por el reconciliador)"""
+        estado_global = dict(
+            db.query(Orden.estado_global, func.count(Orden.id))
+            .group_by(Orden.estado_global).all()
+        )
+        estado_parcial = dict(
+            db.query(OrdenArea.estado_parcial, func.count(OrdenArea.id))
+            .group_by(OrdenArea.estado_parcial).all()
+        )
+        suma_seg = db.query(func.sum(OrdenArea.seg_acumulados)).filter(
+            OrdenArea.estado_parcial.in_(ESTADOS_ACTIVOS)
+        ).scalar() or 0
+        cerca_limite = db.query(func.count(OrdenArea.id)).filter(
+            OrdenArea.estado_parcial == 'EN_PROGRESO',
+            OrdenArea.seg_acumulados >= int(settings.SLA_SEG * 0.8),
+            OrdenArea.seg_acumulados < settings.SLA_SEG
+        ).scalar() or 0
+
+        return {
+            'estado_global': estado_global,
+            'estado_parcial': estado_parcial,
+            'sla': {'suma_seg_activas': int(suma_seg), 'cerca_limite': cerca_limite}
+        }
+
+    @staticmethod
+    def reconciliar(db: Session) -> Dict:
+        """
+        Corrige la deriva de los contadores contra los valores reales
+
+        Bloquea las filas de contadores (FOR UPDATE) antes de contar: las
+        escrituras concurrentes esperan en su UPDATE de contadores y aplican su
+        delta después, sobre el valor ya corregido.
+
+        Retorna:
+            Dict con las claves corregidas: {"ambito.clave": {"antes", "real"}}
+        """
+        actuales = {
+            (c.ambito, c.clave): c.total
+            for c in db.query(KpiContador).with_for_update().all()
+        }
+        reales = ContadoresService.valores_reales(db)
+
+        correcciones = {}
+        for ambito, valores in reales.items():
+            claves = set(valores) | {c for a, c in actuales if a == ambito}
+            for clave in claves:
+                real = valores.get(clave, 0)
+                antes = actuales.get((ambito, clave))
+                if antes != real:
+                    ContadoresService.fijar(db, ambito, clave, real)
+                    if antes is not None:
+                        correcciones[f"{ambito}.{clave}"] = {"antes": antes, "real": real}
+
+        db.commit()
+
+        if correcciones:
+            print(f"🧮 KPIs: {len(correcciones)} contadores corregidos por deriva: {correcciones}")
+
+        return correcciones
+
+
+@event.listens_for(Session, "before_commit")
+def _aplicar_contadores(session: Session):
+    ContadoresService.aplicar_pendientes(session)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_contadores(session: Session, transaccion_anterior):
+    # Se dispara en todo rollback(), aunque la transacción no hubiera emitido SQL
+    if not transaccion_anterior.nested:
+        ContadoresService.descartar_pendientes(session)
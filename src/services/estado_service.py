@@ -2,15 +2,19 @@
 Servicio: Lógica para recalcular estados globales
 """
 from sqlalchemy.orm import Session
+from typing import List
 from src.models import Orden, OrdenArea, Historial
+from src.services.kpi_service import KpiService
+from src.services.contadores_service import ContadoresService
+from src.services.rollup_service import RollupService
 
 
 class EstadoService:
     
     @staticmethod
-    def recalcular_estado_global(db: Session, orden: Orden) -> str:
+    def estado_para(estados: List[str]) -> str:
         """
-        Recalcula el estado global de una orden según sus asignaciones
+        Estado global que corresponde a los estados parciales de una orden
         
         Reglas:
         - Si no hay asignaciones: NUEVA
@@ -21,28 +25,28 @@ class EstadoService:
         - Si alguna PENDIENTE: PENDIENTE
         - Si todas ASIGNADA: ASIGNADA
         """
-        asignaciones = orden.asignaciones
+        if not estados:
+            return 'NUEVA'
         
-        if not asignaciones:
-            nuevo_estado = 'NUEVA'
-        else:
-            estados = [a.estado_parcial for a in asignaciones]
-            
-            # Verificar reglas en orden de prioridad
-            if all(e == 'COMPLETADA' for e in estados):
-                nuevo_estado = 'COMPLETADA'
-            elif 'VENCIDA' in estados:
-                nuevo_estado = 'VENCIDA'
-            elif 'EN_PROGRESO' in estados:
-                nuevo_estado = 'EN_PROGRESO'
-            elif 'PENDIENTE' in estados:
-                nuevo_estado = 'PENDIENTE'
-            elif any(e == 'CERRADA_SIN_SOLUCION' for e in estados) and 'EN_PROGRESO' not in estados:
-                nuevo_estado = 'CERRADA_SIN_SOLUCION'
-            elif all(e == 'ASIGNADA' for e in estados):
-                nuevo_estado = 'ASIGNADA'
-            else:
-                nuevo_estado = 'PENDIENTE'  # Estado por defecto para casos mixtos
+        # Verificar reglas en orden de prioridad
+        if all(e == 'COMPLETADA' for e in estados):
+            return 'COMPLETADA'
+        elif 'VENCIDA' in estados:
+            return 'VENCIDA'
+        elif 'EN_PROGRESO' in estados:
+            return 'EN_PROGRESO'
+        elif 'PENDIENTE' in estados:
+            return 'PENDIENTE'
+        elif any(e == 'CERRADA_SIN_SOLUCION' for e in estados) and 'EN_PROGRESO' not in estados:
+            return 'CERRADA_SIN_SOLUCION'
+        elif all(e == 'ASIGNADA' for e in estados):
+            return 'ASIGNADA'
+        return 'PENDIENTE'  # Estado por defecto para casos mixtos
+    
+    @staticmethod
+    def recalcular_estado_global(db: Session, orden: Orden) -> str:
+        """Recalcula el estado global de una orden según sus asignaciones (ver estado_para)"""
+        nuevo_estado = EstadoService.estado_para([a.estado_parcial for a in orden.asignaciones])
         
         # Solo actualizar si cambió
         if orden.estado_global != nuevo_estado:
@@ -53,10 +57,17 @@ class EstadoService:
             historial = Historial(
                 orden_id=orden.id,
                 evento='CAMBIO_ESTADO_GLOBAL',
-                detalle=f'Estado global: {estado_anterior} → {nuevo_estado}',
+                estado_desde=estado_anterior,
+                estado_hasta=nuevo_estado,
                 estado_global=nuevo_estado,
                 actor='SISTEMA'
             )
             db.add(historial)
+            ContadoresService.transicion_orden(db, estado_anterior, nuevo_estado)
+            if nuevo_estado == 'COMPLETADA':
+                RollupService.registrar(db, completadas=1)
+            elif nuevo_estado == 'VENCIDA':
+                RollupService.registrar(db, vencidas=1)
+            KpiService.marcar_cambio()
         
         return nuevo_estado
\ No newline at end of file
@@ -0,0 +1,204 @@
+"""
+Servicio: Consulta paginada del historial de eventos
+
+Lee de forma transparente la tabla historial y los segmentos archivados
+(ver archivo_service), combinando ambos en orden (timestamp, id) descendente.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, func
+from typing import Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime
+from itertools import islice
+import base64
+import heapq
+import json
+
+from src.models import Historial
+from src.models.historial import CODIGOS_EVENTO
+from src.schemas.historial import FiltrosHistorial, HistorialResponse
+from src.services.archivo_service import ArchivoService, archivo_historial
+
+
+def _clave(evento: Historial) -> Tuple[datetime, int]:
+    return (evento.timestamp, evento.id)
+
+
+def _sin_repetidos(eventos: Iterable) -> Iterator:
+    """
+    Descarta la copia archivada de eventos que siguen en la tabla
+
+    Un archivado cuyo DELETE falló deja la fila en la base y en el archivo; al
+    combinar ambas fuentes por (timestamp, id) las dos copias quedan contiguas.
+    """
+    anterior = None
+    for evento in eventos:
+        if evento.id != anterior:
+            yield evento
+        anterior = evento.id
+
+
+class HistorialService:
+
+    @staticmethod
+    def codificar_cursor(evento: Historial) -> str:
+        """Genera un cursor opaco a partir de (timestamp, id) del último evento"""
+        crudo = json.dumps([evento.timestamp.isoformat(), evento.id])
+        return base64.urlsafe_b64encode(crudo.encode()).decode()
+
+    @staticmethod
+    def decodificar_cursor(cursor: str) -> Tuple[datetime, int]:
+        """
+        Decodifica un cursor generado por codificar_cursor
+
+        Lanza ValueError si el cursor no es válido
+        """
+        try:
+            timestamp, evento_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(timestamp), int(evento_id)
+        except Exception:
+            raise ValueError("Cursor inválido")
+
+    @staticmethod
+    def _consulta(
+        db: Session,
+        orden_id: int,
+        filtros: FiltrosHistorial,
+        despues_de: Optional[Tuple[datetime, int]] = None
+    ):
+        """
+        Construye la consulta del timeline de una orden
+
+        Todos los filtros se expresan sobre (orden_id, timestamp) para recorrer
+        el índice idx_historial_orden; el id desempata eventos del mismo segundo.
+        Las comparaciones directas sobre timestamp (desde, hasta, cursor) permiten
+        además descartar particiones mensuales completas (migración 002).
+        """
+        query = db.query(Historial).filter(Historial.orden_id == orden_id)
+
+        if filtros.evento:
+            query = query.filter(Historial.evento == filtros.evento)
+        if filtros.actor:
+            query = query.filter(Historial.actor == filtros.actor)
+        if filtros.desde:
+            query = query.filter(Historial.timestamp >= filtros.desde)
+        if filtros.hasta:
+            query = query.filter(Historial.timestamp <= filtros.hasta)
+
+        if despues_de:
+            ts_cursor, id_cursor = despues_de
+            query = query.filter(
+                Historial.timestamp <= ts_cursor,
+                or_(
+                    Historial.timestamp < ts_cursor,
+                    and_(Historial.timestamp == ts_cursor, Historial.id < id_cursor)
+                )
+            )
+
+        return query.order_by(Historial.timestamp.desc(), Historial.id.desc())
+
+    @staticmethod
+    def _archivados(
+        orden_id: int,
+        filtros: FiltrosHistorial,
+        despues_de: Optional[Tuple[datetime, int]] = None
+    ) -> List[HistorialResponse]:
+        """Eventos archivados de la orden que cumplen los filtros, más reciente primero"""
+        if not archivo_historial.tiene(orden_id):
+            return []
+
+        eventos = [
+            e for e in map(ArchivoService.deserializar, archivo_historial.leer(orden_id))
+            if (not filtros.evento or e.evento == filtros.evento)
+            and (not filtros.actor or e.actor == filtros.actor)
+            and (not filtros.desde or e.timestamp >= filtros.desde)
+            and (not filtros.hasta or e.timestamp <= filtros.hasta)
+            and (not despues_de or _clave(e) < despues_de)
+        ]
+        return sorted(eventos, key=_clave, reverse=True)
+
+    @staticmethod
+    def listar_historial(
+        db: Session,
+        orden_id: int,
+        filtros: FiltrosHistorial,
+        limit: int = 200,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Historial], Optional[str]]:
+        """
+        Obtiene una página del historial (más reciente primero)
+
+        Retorna:
+            Tupla (eventos, cursor_siguiente); cursor_siguiente es None en la última página
+        """
+        despues_de = HistorialService.decodificar_cursor(cursor) if cursor else None
+        query = HistorialService._consulta(db, orden_id, filtros, despues_de)
+
+        # Se pide una fila extra para saber si existe otra página
+        eventos = list(islice(_sin_repetidos(heapq.merge(
+            query.limit(limit + 1).all(),
+            HistorialService._archivados(orden_id, filtros, despues_de),
+            key=_clave,
+            reverse=True
+        )), limit + 1))
+
+        siguiente = None
+        if len(eventos) > limit:
+            eventos = eventos[:limit]
+            siguiente = HistorialService.codificar_cursor(eventos[-1])
+
+        return eventos, siguiente
+
+    @staticmethod
+    def iterar_historial(
+        db: Session,
+        orden_id: int,
+        filtros: FiltrosHistorial,
+        tamano_lote: int = 500
+    ) -> Iterator[Historial]:
+        """
+        Recorre el historial completo en lotes, para exportaciones grandes
+
+        Usa un cursor del servidor (stream_results) para mantener memoria constante
+        """
+        query = HistorialService._consulta(db, orden_id, filtros)
+        query = query.execution_options(stream_results=True).yield_per(tamano_lote)
+
+        yield from _sin_repetidos(heapq.merge(
+            query,
+            HistorialService._archivados(orden_id, filtros),
+            key=_clave,
+            reverse=True
+        ))
+
+    @staticmethod
+    def contar_transiciones(
+        db: Session,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        area_id: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Cuenta transiciones de estado parcial (estado_desde → estado_hasta)
+
+        Usa los campos estructurados: recorre idx_historial_codigo_ts (o
+        idx_historial_area_codigo si se filtra por área) sin parsear texto.
+        """
+        query = db.query(
+            Historial.estado_desde,
+            Historial.estado_hasta,
+            func.count(Historial.id).label('total')
+        ).filter(Historial.codigo_evento == CODIGOS_EVENTO['CAMBIO_ESTADO_PARCIAL'])
+
+        if area_id:
+            query = query.filter(Historial.area_id == area_id)
+        if desde:
+            query = query.filter(Historial.timestamp >= desde)
+        if hasta:
+            query = query.filter(Historial.timestamp <= hasta)
+
+        query = query.group_by(Historial.estado_desde, Historial.estado_hasta)
+
+        return [
+            {'estado_desde': fila.estado_desde, 'estado_hasta': fila.estado_hasta, 'total': fila.total}
+            for fila in query.order_by(func.count(Historial.id).desc()).all()
+        ]
@@ -0,0 +1,267 @@
+"""
+Servicio: Importación masiva de órdenes y asignaciones (CSV o NDJSON)
+
+Pensado para migrar backlog de otro sistema sin pasar por crear_orden fila
+por fila. El archivo se lee de forma incremental (una línea o registro a la
+vez); cada fila se valida con OrdenCreate y, si trae áreas, con
+AsignacionCreate. Las filas válidas se insertan por lotes con INSERT
+multi-fila, un commit por lote, así que la memoria y el tamaño de cada
+transacción no dependen del tamaño del archivo.
+
+Formato de cada registro:
+    titulo, descripcion, creador, prioridad   como en POST /ordenes
+    area_ids                                  lista (NDJSON) o "1;2;3" (CSV), opcional
+    asignada_a                                opcional
+
+Las filas inválidas no detienen la importación: se informan en el reporte
+con su número de línea.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from pydantic import ValidationError
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+import csv
+import json
+import re
+
+from src.models import Orden, OrdenArea, Area, Historial
+from src.models.historial import CODIGOS_EVENTO
+from src.schemas.orden import OrdenCreate, AsignacionCreate
+from src.services.estado_service import EstadoService
+from src.services.kpi_service import KpiService
+from src.services.contadores_service import ContadoresService
+from src.services.rollup_service import RollupService
+from src.utils.eventos import bus_eventos
+from src.utils.instrumentacion import historial_escritos
+
+
+FORMATOS = ('csv', 'ndjson')
+MAX_ERRORES_REPORTE = 1000
+
+_SEPARADOR_AREAS = re.compile(r"[;|,\s]+")
+
+# (línea, registro) o (línea, mensaje de error)
+Fila = Tuple[int, Optional[dict], Optional[str]]
+
+
+class ImportacionService:
+
+    @staticmethod
+    def formato_de(nombre_archivo: Optional[str]) -> str:
+        """Formato según la extensión del archivo (NDJSON por defecto)"""
+        if nombre_archivo and nombre_archivo.lower().endswith(".csv"):
+            return 'csv'
+        return 'ndjson'
+
+    @staticmethod
+    def leer_filas(archivo: TextIO, formato: str) -> Iterator[Fila]:
+        """Recorre el archivo registro a registro, sin cargarlo completo"""
+        if formato == 'csv':
+            lector = csv.DictReader(archivo)
+            for registro in lector:
+                yield lector.line_num, ImportacionService._normalizar_csv(registro), None
+            return
+
+        for linea, texto in enumerate(archivo, start=1):
+            if not texto.strip():
+                continue
+            try:
+                registro = json.loads(texto)
+            except ValueError as e:
+                yield linea, None, f"JSON inválido: {e}"
+                continue
+            if not isinstance(registro, dict):
+                yield linea, None, "Se esperaba un objeto JSON"
+                continue
+            yield linea, registro, None
+
+    @staticmethod
+    def _normalizar_csv(registro: dict) -> dict:
+        """Celdas vacías como ausentes y area_ids como lista"""
+        normalizado = {
+            clave: valor for clave, valor in registro.items()
+            if clave and valor not in (None, "")
+        }
+        if 'area_ids' in normalizado:
+            normalizado['area_ids'] = [
+                parte for parte in _SEPARADOR_AREAS.split(normalizado['area_ids']) if parte
+            ]
+        return normalizado
+
+    @staticmethod
+    def validar(registro: dict, areas_existentes: set) -> Tuple[OrdenCreate, Optional[AsignacionCreate]]:
+        """
+        Valida un registro con las mismas reglas que la API
+
+        Lanza ValueError con un mensaje legible si no es válido
+        """
+        try:
+            orden = OrdenCreate.model_validate(registro)
+            asignacion = None
+            if registro.get('area_ids'):
+                asignacion = AsignacionCreate.model_validate({
+                    'area_ids': registro['area_ids'],
+                    'asignada_a': registro.get('asignada_a')
+                })
+        except ValidationError as e:
+            raise ValueError("; ".join(
+                f"{'.'.join(str(p) for p in error['loc'])}: {error['msg']}"
+                for error in e.errors()
+            ))
+
+        if asignacion:
+            faltantes = sorted(set(asignacion.area_ids) - areas_existentes)
+            if faltantes:
+                raise ValueError(f"Áreas inexistentes: {faltantes}")
+        return orden, asignacion
+
+    @staticmethod
+    def importar(
+        db: Session,
+        archivo: TextIO,
+        formato: str,
+        tamano_lote: int = 500,
+        actor: str = "IMPORTACION"
+    ) -> Dict:
+        """
+        Importa el archivo completo
+
+        Retorna:
+            Reporte con filas procesadas, órdenes y asignaciones importadas y
+            los errores por línea (hasta MAX_ERRORES_REPORTE)
+        """
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato no soportado: {formato}")
+
+        areas_existentes = {area_id for (area_id,) in db.query(Area.id).all()}
+        reporte = {"procesadas": 0, "ordenes": 0, "asignaciones": 0, "errores": 0, "detalle_errores": []}
+
+        def registrar_error(linea: int, mensaje: str):
+            reporte["errores"] += 1
+            if len(reporte["detalle_errores"]) < MAX_ERRORES_REPORTE:
+                reporte["detalle_errores"].append({"linea": linea, "error": mensaje})
+
+        lote: List[Tuple[int, OrdenCreate, Optional[AsignacionCreate]]] = []
+
+        def volcar():
+            try:
+                ordenes, asignaciones = ImportacionService._insertar_lote(db, lote, actor)
+            except Exception as e:
+                db.rollback()
+                for linea, _, _ in lote:
+                    registrar_error(linea, f"Lote rechazado por la base de datos: {e}")
+            else:
+                reporte["ordenes"] += ordenes
+                reporte["asignaciones"] += asignaciones
+            lote.clear()
+
+        for linea, registro, error in ImportacionService.leer_filas(archivo, formato):
+            reporte["procesadas"] += 1
+            if error:
+                registrar_error(linea, error)
+                continue
+            try:
+                orden, asignacion = ImportacionService.validar(registro, areas_existentes)
+            except ValueError as e:
+                registrar_error(linea, str(e))
+                continue
+
+            lote.append((linea, orden, asignacion))
+            if len(lote) >= tamano_lote:
+                volcar()
+
+        if lote:
+            volcar()
+
+        if reporte["ordenes"]:
+            KpiService.marcar_cambio()
+            bus_eventos.publicar("orden", {"accion": "importadas", "cantidad": reporte["ordenes"]})
+
+        print(f"📥 Importación: {reporte['ordenes']} órdenes, {reporte['asignaciones']} asignaciones, "
+              f"{reporte['errores']} errores")
+        return reporte
+
+    @staticmethod
+    def _insertar_lote(
+        db: Session,
+        lote: List[Tuple[int, OrdenCreate, Optional[AsignacionCreate]]],
+        actor: str
+    ) -> Tuple[int, int]:
+        """Inserta un lote validado en una transacción; retorna (órdenes, asignaciones)"""
+        estados = []
+        filas_ordenes = []
+        for _, orden, asignacion in lote:
+            area_ids = list(dict.fromkeys(asignacion.area_ids)) if asignacion else []
+            estado = EstadoService.estado_para(['ASIGNADA'] * len(area_ids))
+            estados.append((estado, area_ids, asignacion.asignada_a if asignacion else None))
+            filas_ordenes.append({
+                "titulo": orden.titulo,
+                "descripcion": orden.descripcion,
+                "creador": orden.creador,
+                "prioridad": orden.prioridad,
+                "estado_global": estado
+            })
+
+        ids = ImportacionService._insertar_con_ids(db, Orden.__table__, filas_ordenes)
+
+        filas_asignaciones = []
+        filas_historial = []
+        for orden_id, (_, orden, _), (estado, area_ids, asignada_a) in zip(ids, lote, estados):
+            filas_historial.append(_evento(orden_id, 'CREADA', actor=orden.creador, estado_global='NUEVA'))
+            for area_id in area_ids:
+                filas_asignaciones.append({
+                    "orden_id": orden_id, "area_id": area_id, "asignada_a": asignada_a,
+                    "estado_parcial": 'ASIGNADA', "seg_acumulados": 0
+                })
+                filas_historial.append(_evento(
+                    orden_id, 'AREA_ASIGNADA', actor=actor, area_id=area_id, detalle=asignada_a
+                ))
+                ContadoresService.transicion_area(db, None, 'ASIGNADA', 0)
+            if estado != 'NUEVA':
+                filas_historial.append(_evento(
+                    orden_id, 'CAMBIO_ESTADO_GLOBAL', actor='SISTEMA',
+                    estado_desde='NUEVA', estado_hasta=estado, estado_global=estado
+                ))
+            ContadoresService.transicion_orden(db, None, estado)
+
+        # executemany: el driver lo envía como INSERT multi-fila
+        if filas_asignaciones:
+            db.execute(insert(OrdenArea.__table__), filas_asignaciones)
+        db.execute(insert(Historial.__table__), filas_historial)
+
+        RollupService.registrar(db, creadas=len(ids))
+        db.commit()
+        historial_escritos.incrementar(len(filas_historial))
+        return len(ids), len(filas_asignaciones)
+
+    @staticmethod
+    def _insertar_con_ids(db: Session, tabla, filas: List[dict]) -> List[int]:
+        """
+        INSERT multi-fila que retorna los ids generados, en el orden de las filas
+
+        Con RETURNING si el dialecto lo soporta; en MySQL un INSERT multi-fila
+        es un "simple insert" y recibe ids consecutivos desde LAST_INSERT_ID()
+        (requiere auto_increment_increment = 1, el valor por defecto).
+        """
+        if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+            return list(db.execute(
+                insert(tabla).returning(tabla.c.id, sort_by_parameter_order=True), filas
+            ).scalars())
+
+        primero = db.execute(insert(tabla).values(filas)).lastrowid
+        return list(range(primero, primero + len(filas)))
+
+
+def _evento(orden_id: int, evento: str, **campos) -> dict:
+    """Fila de historial para inserción directa (sin el @validates del modelo)"""
+    return {
+        "orden_id": orden_id,
+        "evento": evento,
+        "codigo_evento": CODIGOS_EVENTO[evento],
+        "detalle": None,
+        "area_id": None,
+        "estado_desde": None,
+        "estado_hasta": None,
+        "estado_global": None,
+        **campos
+    }
@@ -0,0 +1,109 @@
+"""
+Servicio: KPIs del sistema
+
+Los KPIs se sirven desde un snapshot en memoria. Recalcularlo es leer las
+filas de estado_global de la tabla kpi_contadores (ContadoresService), que se
+mantienen al confirmar cada transición; nunca se recorre ordenes. El tick lo
+recalcula cuando hubo cambios pendientes (órdenes creadas o cambios de estado
+global) y /kpis cuando lo encuentra más viejo que KPI_CACHE_TTL_SEG. Un lock
+evita que varias peticiones concurrentes lo recalculen a la vez: una lee los
+contadores y el resto espera su resultado.
+"""
+from sqlalchemy.orm import Session
+from typing import Dict, Optional
+import threading
+import time
+
+from src.config import settings
+from src.services.contadores_service import ContadoresService
+from src.utils.cache import estadisticas_cache
+from src.utils.eventos import bus_eventos
+
+
+ESTADOS_PENDIENTES = ('PENDIENTE', 'EN_PROGRESO', 'ASIGNADA', 'NUEVA')
+
+
+class KpiService:
+
+    # Snapshot vigente y momento (time.monotonic) en que se calculó
+    _snapshot: Optional[Dict] = None
+    _snapshot_en: float = 0.0
+    _lock = threading.Lock()
+    _cambios_pendientes: bool = True
+    # Aciertos/fallos del snapshot (/metrics)
+    _estadisticas = estadisticas_cache("kpis")
+
+    @staticmethod
+    def calcular_kpis(db: Session) -> Dict:
+        """
+        KPIs básicos del sistema desde los contadores por estado global
+
+        Retorna:
+        - total_ordenes: Total de órdenes en el sistema
+        - completadas: Órdenes con estado COMPLETADA
+        - pendientes: Órdenes en estados PENDIENTE, EN_PROGRESO, ASIGNADA o NUEVA
+        - cerradas_sin_solucion: Órdenes cerradas sin resolver
+        - vencidas: Órdenes con estado VENCIDA
+        """
+        conteos = ContadoresService.leer(db, 'estado_global')
+
+        return {
+            "total_ordenes": sum(conteos.values()),
+            "completadas": conteos.get('COMPLETADA', 0),
+            "pendientes": sum(conteos.get(e, 0) for e in ESTADOS_PENDIENTES),
+            "cerradas_sin_solucion": conteos.get('CERRADA_SIN_SOLUCION', 0),
+            "vencidas": conteos.get('VENCIDA', 0)
+        }
+
+    @staticmethod
+    def obtener_kpis(db: Session) -> Dict:
+        """Retorna el snapshot de KPIs, recalculándolo si superó el TTL"""
+        snapshot = KpiService._snapshot
+        if snapshot is not None and not KpiService._expirado():
+            KpiService._estadisticas.aciertos += 1
+            return snapshot
+
+        with KpiService._lock:
+            # Otra petición pudo recalcular mientras se esperaba el lock
+            if KpiService._snapshot is None or KpiService._expirado():
+                KpiService._estadisticas.fallos += 1
+                KpiService._guardar(KpiService.calcular_kpis(db))
+            else:
+                KpiService._estadisticas.aciertos += 1
+            return KpiService._snapshot
+
+    @staticmethod
+    def marcar_cambio():
+        """Indica que los KPIs pudieron cambiar (orden creada o cambio de estado global)"""
+        KpiService._cambios_pendientes = True
+
+    @staticmethod
+    def refrescar_si_cambio(db: Session):
+        """
+        Recalcula el snapshot si hubo cambios y lo publica en el feed
+
+        Se invoca desde el tick: a lo sumo una consulta por intervalo, sin
+        importar cuántos dashboards estén conectados.
+        """
+        if not KpiService._cambios_pendientes:
+            return
+
+        with KpiService._lock:
+            KpiService._cambios_pendientes = False
+            anteriores = KpiService._snapshot or {}
+            kpis = KpiService._guardar(KpiService.calcular_kpis(db))
+
+        bus_eventos.publicar("kpis", {
+            "kpis": kpis,
+            "delta": {clave: valor - anteriores.get(clave, 0) for clave, valor in kpis.items()}
+        })
+
+    @staticmethod
+    def _expirado() -> bool:
+        return time.monotonic() - KpiService._snapshot_en >= settings.KPI_CACHE_TTL_SEG
+
+    @staticmethod
+    def _guardar(kpis: Dict) -> Dict:
+        KpiService._snapshot = kpis
+        KpiService._snapshot_en = time.monotonic()
+        return kpis
@@ -2,13 +2,27 @@
 Servicio: Lógica de negocio para órdenes
 """
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, case
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, case, cast, Integer
+from typing import Iterator, List, Optional
 from datetime import datetime
+from itertools import groupby
 
 from src.models import Orden, OrdenArea, Area, Historial
 from src.schemas.orden import OrdenCreate, AsignacionCreate, CambioEstadoRequest
 from src.services.estado_service import EstadoService
+from src.services.kpi_service import KpiService
+from src.services.contadores_service import ContadoresService
+from src.services.rollup_service import RollupService
+from src.services.sketch_service import SketchService
+from src.utils.eventos import bus_eventos
+
+
+# Columnas de la orden en las exportaciones
+COLUMNAS_EXPORTACION = (
+    Orden.id, Orden.titulo, Orden.estado_global, Orden.prioridad, Orden.creador,
+    Orden.creada_en, Orden.actualizada_en
+)
 
 
 class OrdenService:
@@ -31,14 +45,22 @@ class OrdenService:
         historial = Historial(
             orden_id=nueva_orden.id,
             evento='CREADA',
-            detalle=f'Orden creada: {orden_data.titulo}',
             estado_global='NUEVA',
             actor=orden_data.creador
         )
         db.add(historial)
+        ContadoresService.transicion_orden(db, None, 'NUEVA')
+        RollupService.registrar(db, creadas=1)
         db.commit()
         db.refresh(nueva_orden)
         
+        KpiService.marcar_cambio()
+        bus_eventos.publicar("orden", {
+            "accion": "creada",
+            "orden_id": nueva_orden.id,
+            "estado_global": nueva_orden.estado_global
+        })
+        
         return nueva_orden
     
     @staticmethod
@@ -48,46 +70,125 @@ class OrdenService:
         skip: int = 0,
         limit: int = 100
     ) -> List[dict]:
-        """Lista órdenes con agregaciones de áreas"""
+        """
+        Lista órdenes con agregaciones de áreas
+        
+        Las filas ya traen los tipos finales (enteros, sin NULL), así que cada
+        dict sale directo de la tupla y se puede serializar sin revalidar.
+        
+        Primero se eligen los ids de la página recorriendo
+        idx_ordenes_estado_actualizada (o idx_ordenes_actualizada_en) y solo
+        esas órdenes se agregan con sus áreas; agrupar antes de paginar
+        obligaría a agregar y ordenar todas las órdenes del filtro.
+        """
+        orden_pagina = (Orden.actualizada_en.desc(), Orden.id.desc())
+        
+        pagina = db.query(Orden.id)
+        if estado:
+            pagina = pagina.filter(Orden.estado_global == estado)
+        pagina = pagina.order_by(*orden_pagina).offset(skip).limit(limit).subquery()
+        
+        query = OrdenService._consulta_listado(db).join(pagina, pagina.c.id == Orden.id)
+        query = query.order_by(*orden_pagina)
+        
+        return [row._asdict() for row in query.all()]
+    
+    @staticmethod
+    def _consulta_listado(db: Session, estado: Optional[str] = None):
+        """Órdenes con sus agregaciones por área (sin orden ni paginación)"""
         query = db.query(
             Orden.id,
             Orden.titulo,
             Orden.estado_global,
             Orden.prioridad,
             Orden.creador,
-            Orden.creada_en,
-            Orden.actualizada_en,
             func.count(OrdenArea.id).label('num_areas'),
-            func.sum(
+            cast(func.coalesce(func.sum(
                 case(
                     (OrdenArea.estado_parcial == 'COMPLETADA', 1),
                     else_=0
                 )
-            ).label('areas_completadas'),
-            func.sum(OrdenArea.seg_acumulados).label('total_segundos')
+            ), 0), Integer).label('areas_completadas'),
+            cast(func.coalesce(func.sum(OrdenArea.seg_acumulados), 0), Integer).label('total_segundos'),
+            Orden.creada_en,
+            Orden.actualizada_en
         ).outerjoin(OrdenArea, Orden.id == OrdenArea.orden_id)
         
         if estado:
             query = query.filter(Orden.estado_global == estado)
         
-        query = query.group_by(Orden.id).order_by(Orden.actualizada_en.desc())
-        query = query.offset(skip).limit(limit)
-        
-        return [
-            {
-                'id': row.id,
-                'titulo': row.titulo,
-                'estado_global': row.estado_global,
-                'prioridad': row.prioridad,
-                'creador': row.creador,
-                'num_areas': row.num_areas or 0,
-                'areas_completadas': row.areas_completadas or 0,
-                'total_segundos': row.total_segundos or 0,
-                'creada_en': row.creada_en,
-                'actualizada_en': row.actualizada_en
-            }
-            for row in query.all()
-        ]
+        return query.group_by(Orden.id)
+    
+    @staticmethod
+    def iterar_exportacion(
+        db: Session,
+        estado: Optional[str] = None,
+        asignaciones: bool = False,
+        totales: bool = True,
+        tamano_lote: int = 1000
+    ) -> Iterator[dict]:
+        """
+        Recorre todas las órdenes (mismos filtros que listar_ordenes) por id
+        
+        Una sola consulta con cursor del servidor (stream_results + yield_per):
+        la memoria no depende del tamaño de la tabla y el resultado es
+        consistente aunque haya escrituras durante la exportación. Con
+        asignaciones, las filas del JOIN llegan ordenadas por orden y se
+        agrupan al vuelo; los totales se calculan sobre ellas.
+        """
+        if not asignaciones:
+            if totales:
+                query = OrdenService._consulta_listado(db, estado)
+            else:
+                query = db.query(*COLUMNAS_EXPORTACION)
+                if estado:
+                    query = query.filter(Orden.estado_global == estado)
+            query = query.order_by(Orden.id)
+            for row in query.execution_options(stream_results=True).yield_per(tamano_lote):
+                yield row._asdict()
+            return
+        
+        query = db.query(
+            *COLUMNAS_EXPORTACION,
+            OrdenArea.id.label('asignacion_id'), OrdenArea.area_id,
+            Area.nombre.label('area_nombre'), OrdenArea.asignada_a, OrdenArea.estado_parcial,
+            OrdenArea.seg_acumulados, OrdenArea.asignada_en, OrdenArea.iniciada_en,
+            OrdenArea.completada_en
+        ).outerjoin(
+            OrdenArea, Orden.id == OrdenArea.orden_id
+        ).outerjoin(
+            Area, Area.id == OrdenArea.area_id
+        )
+        if estado:
+            query = query.filter(Orden.estado_global == estado)
+        query = query.order_by(Orden.id, OrdenArea.id)
+        
+        filas = query.execution_options(stream_results=True).yield_per(tamano_lote)
+        for _, grupo in groupby(filas, key=lambda fila: fila.id):
+            grupo = list(grupo)
+            orden = {columna.key: getattr(grupo[0], columna.key) for columna in COLUMNAS_EXPORTACION}
+            asignadas = [
+                {
+                    'id': fila.asignacion_id,
+                    'area_id': fila.area_id,
+                    'area_nombre': fila.area_nombre,
+                    'asignada_a': fila.asignada_a,
+                    'estado_parcial': fila.estado_parcial,
+                    'seg_acumulados': fila.seg_acumulados or 0,
+                    'asignada_en': fila.asignada_en,
+                    'iniciada_en': fila.iniciada_en,
+                    'completada_en': fila.completada_en
+                }
+                for fila in grupo if fila.asignacion_id is not None
+            ]
+            if totales:
+                orden['num_areas'] = len(asignadas)
+                orden['areas_completadas'] = sum(
+                    1 for a in asignadas if a['estado_parcial'] == 'COMPLETADA'
+                )
+                orden['total_segundos'] = sum(a['seg_acumulados'] for a in asignadas)
+            orden['asignaciones'] = asignadas
+            yield orden
     
     @staticmethod
     def obtener_orden(db: Session, orden_id: int) -> Optional[Orden]:
@@ -96,6 +197,36 @@ class OrdenService:
             joinedload(Orden.asignaciones).joinedload(OrdenArea.area)
         ).filter(Orden.id == orden_id).first()
     
+    @staticmethod
+    def orden_a_dict(orden: Orden) -> dict:
+        """Detalle de una orden con la forma de OrdenResponse (asignaciones y áreas ya cargadas)"""
+        return {
+            'id': orden.id,
+            'titulo': orden.titulo,
+            'descripcion': orden.descripcion,
+            'prioridad': orden.prioridad,
+            'creador': orden.creador,
+            'estado_global': orden.estado_global,
+            'creada_en': orden.creada_en,
+            'actualizada_en': orden.actualizada_en,
+            'asignaciones': [OrdenService.asignacion_a_dict(a) for a in orden.asignaciones]
+        }
+    
+    @staticmethod
+    def asignacion_a_dict(asignacion: OrdenArea) -> dict:
+        """Asignación con la forma de OrdenAreaResponse"""
+        return {
+            'id': asignacion.id,
+            'area_id': asignacion.area_id,
+            'area_nombre': asignacion.area.nombre if asignacion.area else None,
+            'asignada_a': asignacion.asignada_a,
+            'estado_parcial': asignacion.estado_parcial,
+            'seg_acumulados': asignacion.seg_acumulados,
+            'asignada_en': asignacion.asignada_en,
+            'iniciada_en': asignacion.iniciada_en,
+            'completada_en': asignacion.completada_en
+        }
+    
     @staticmethod
     def asignar_areas(
         db: Session, 
@@ -114,6 +245,7 @@ class OrdenService:
             raise ValueError("Una o más áreas no existen")
         
         # Crear asignaciones
+        nuevas_areas = []
         for area in areas:
             # Evitar duplicados
             existe = db.query(OrdenArea).filter(
@@ -129,13 +261,15 @@ class OrdenService:
                     estado_parcial='ASIGNADA'
                 )
                 db.add(asignacion)
+                nuevas_areas.append(area.id)
+                ContadoresService.transicion_area(db, None, 'ASIGNADA', 0)
                 
                 # Historial
                 historial = Historial(
                     orden_id=orden_id,
                     evento='AREA_ASIGNADA',
-                    detalle=f'Área asignada: {area.nombre}' + 
-                            (f' → {asignacion_data.asignada_a}' if asignacion_data.asignada_a else ''),
+                    area_id=area.id,
+                    detalle=asignacion_data.asignada_a,
                     actor=actor
                 )
                 db.add(historial)
@@ -145,6 +279,13 @@ class OrdenService:
         
         db.commit()
         db.refresh(orden)
+        
+        bus_eventos.publicar("asignacion", {
+            "accion": "asignada",
+            "orden_id": orden_id,
+            "area_ids": nuevas_areas,
+            "estado_global": orden.estado_global
+        })
         return orden
     
     @staticmethod
@@ -158,16 +299,17 @@ class OrdenService:
         if not asignacion:
             raise ValueError(f"Asignación no encontrada")
         
-        area_nombre = asignacion.area.nombre
-        
         db.delete(asignacion)
+        ContadoresService.transicion_area(
+            db, asignacion.estado_parcial, None, asignacion.seg_acumulados
+        )
         
         # Historial
         orden = db.query(Orden).filter(Orden.id == orden_id).first()
         historial = Historial(
             orden_id=orden_id,
             evento='AREA_REMOVIDA',
-            detalle=f'Área removida: {area_nombre}',
+            area_id=area_id,
             actor=actor
         )
         db.add(historial)
@@ -177,6 +319,13 @@ class OrdenService:
         
         db.commit()
         db.refresh(orden)
+        
+        bus_eventos.publicar("asignacion", {
+            "accion": "removida",
+            "orden_id": orden_id,
+            "area_id": area_id,
+            "estado_global": orden.estado_global
+        })
         return orden
     
     @staticmethod
@@ -210,11 +359,22 @@ class OrdenService:
         if cambio_data.notas:
             asignacion.notas = cambio_data.notas
         
+        ContadoresService.transicion_area(
+            db, estado_anterior, cambio_data.nuevo_estado, asignacion.seg_acumulados
+        )
+        if cambio_data.nuevo_estado != estado_anterior:
+            if cambio_data.nuevo_estado == 'COMPLETADA':
+                RollupService.registrar(db, area_id, completadas=1)
+            elif cambio_data.nuevo_estado == 'VENCIDA':
+                RollupService.registrar(db, area_id, vencidas=1)
+        
         # Historial
         historial = Historial(
             orden_id=orden_id,
             evento='CAMBIO_ESTADO_PARCIAL',
-            detalle=f'Área {asignacion.area.nombre}: {estado_anterior} → {cambio_data.nuevo_estado}',
+            area_id=area_id,
+            estado_desde=estado_anterior,
+            estado_hasta=cambio_data.nuevo_estado,
             actor=actor
         )
         db.add(historial)
@@ -223,6 +383,82 @@ class OrdenService:
         orden = db.query(Orden).filter(Orden.id == orden_id).first()
         EstadoService.recalcular_estado_global(db, orden)
         
+        # Percentiles SLA: la asignación terminó en este cambio
+        if cambio_data.nuevo_estado != estado_anterior:
+            SketchService.registrar_finalizacion(db, asignacion, orden.prioridad)
+        
         db.commit()
         db.refresh(asignacion)
-        return asignacion
\ No newline at end of file
+        
+        bus_eventos.publicar("asignacion", {
+            "accion": "estado",
+            "orden_id": orden_id,
+            "area_id": area_id,
+            "estado_parcial": asignacion.estado_parcial,
+            "estado_global": orden.estado_global
+        })
+        return asignacion
+    
+    # ------------------------------------------------------------------
+    # Variantes async (AsyncSession, ver src/database_async.py)
+    #
+    # Ejecutan la misma lógica con run_sync: el código sync corre en un
+    # greenlet y cada consulta cede el event loop mientras espera a MySQL,
+    # sin ocupar un hilo del threadpool. Retornan dicts ya armados, porque
+    # fuera de run_sync no se pueden cargar relaciones perezosas.
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    async def crear_orden_async(db: AsyncSession, orden_data: OrdenCreate) -> dict:
+        def crear(sesion: Session) -> dict:
+            return OrdenService.orden_a_dict(OrdenService.crear_orden(sesion, orden_data))
+        return await db.run_sync(crear)
+    
+    @staticmethod
+    async def listar_ordenes_async(
+        db: AsyncSession,
+        estado: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[dict]:
+        return await db.run_sync(OrdenService.listar_ordenes, estado, skip, limit)
+    
+    @staticmethod
+    async def obtener_orden_async(db: AsyncSession, orden_id: int) -> Optional[dict]:
+        def obtener(sesion: Session) -> Optional[dict]:
+            orden = OrdenService.obtener_orden(sesion, orden_id)
+            return OrdenService.orden_a_dict(orden) if orden else None
+        return await db.run_sync(obtener)
+    
+    @staticmethod
+    async def asignar_areas_async(
+        db: AsyncSession,
+        orden_id: int,
+        asignacion_data: AsignacionCreate,
+        actor: str = "SISTEMA"
+    ) -> dict:
+        def asignar(sesion: Session) -> dict:
+            return OrdenService.orden_a_dict(
+                OrdenService.asignar_areas(sesion, orden_id, asignacion_data, actor)
+            )
+        return await db.run_sync(asignar)
+    
+    @staticmethod
+    async def quitar_area_async(db: AsyncSession, orden_id: int, area_id: int, actor: str = "SISTEMA") -> dict:
+        def quitar(sesion: Session) -> dict:
+            return OrdenService.orden_a_dict(OrdenService.quitar_area(sesion, orden_id, area_id, actor))
+        return await db.run_sync(quitar)
+    
+    @staticmethod
+    async def cambiar_estado_parcial_async(
+        db: AsyncSession,
+        orden_id: int,
+        area_id: int,
+        cambio_data: CambioEstadoRequest,
+        actor: str = "SISTEMA"
+    ) -> dict:
+        def cambiar(sesion: Session) -> dict:
+            return OrdenService.asignacion_a_dict(
+                OrdenService.cambiar_estado_parcial(sesion, orden_id, area_id, cambio_data, actor)
+            )
+        return await db.run_sync(cambiar)
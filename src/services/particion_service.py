@@ -0,0 +1,170 @@
+"""
+Servicio: Mantenimiento de particiones mensuales de historial
+
+Complementa la migración 002: crea por adelantado las particiones de los
+próximos meses (dividiendo p_futuro) y expira las antiguas con DROP PARTITION,
+que es instantáneo frente a un DELETE masivo.
+
+Solo actúa sobre MySQL con la tabla ya particionada; en otro caso no hace nada.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import calendar
+
+from src.config import settings
+
+
+PARTICION_FUTURO = "p_futuro"
+
+
+def _inicio_mes(fecha: datetime) -> datetime:
+    return datetime(fecha.year, fecha.month, 1)
+
+
+def _sumar_meses(fecha: datetime, meses: int) -> datetime:
+    """Primer día del mes desplazado `meses` desde el mes de `fecha`"""
+    indice = fecha.year * 12 + (fecha.month - 1) + meses
+    return datetime(indice // 12, indice % 12 + 1, 1)
+
+
+def _epoch(fecha: datetime) -> int:
+    """Segundos UNIX de una fecha UTC (mismo valor que UNIX_TIMESTAMP en MySQL)"""
+    return calendar.timegm(fecha.timetuple())
+
+
+class ParticionService:
+
+    @staticmethod
+    def _es_mysql(db: Session) -> bool:
+        return db.get_bind().dialect.name == "mysql"
+
+    @staticmethod
+    def listar_particiones(db: Session) -> List[Dict]:
+        """
+        Particiones actuales de historial en orden
+
+        Retorna:
+            Lista de {"nombre", "limite"}; limite es None para MAXVALUE
+        """
+        if not ParticionService._es_mysql(db):
+            return []
+
+        filas = db.execute(text(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION "
+            "FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'historial' "
+            "AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION"
+        )).all()
+
+        return [
+            {
+                "nombre": nombre,
+                "limite": None if descripcion == "MAXVALUE"
+                else datetime.utcfromtimestamp(int(descripcion))
+            }
+            for nombre, descripcion in filas
+        ]
+
+    @staticmethod
+    def planificar_nuevas(
+        particiones: List[Dict],
+        ahora: datetime,
+        meses_adelante: int
+    ) -> List[Tuple[str, datetime]]:
+        """
+        Particiones mensuales que faltan para cubrir hasta `meses_adelante`
+
+        Retorna:
+            Lista de (nombre, limite_superior) a crear dividiendo p_futuro
+        """
+        limites = [p["limite"] for p in particiones if p["limite"] is not None]
+        if not limites:
+            return []
+
+        objetivo = _sumar_meses(_inicio_mes(ahora), meses_adelante + 1)
+        limite = max(limites)
+        nuevas = []
+        while limite < objetivo:
+            siguiente = _sumar_meses(limite, 1)
+            nuevas.append((f"p{limite:%Y%m}", siguiente))
+            limite = siguiente
+        return nuevas
+
+    @staticmethod
+    def planificar_expiradas(
+        particiones: List[Dict],
+        ahora: datetime,
+        retencion_meses: int
+    ) -> List[str]:
+        """Particiones cuyo contenido completo es anterior a la retención"""
+        if retencion_meses <= 0:
+            return []
+
+        corte = _sumar_meses(_inicio_mes(ahora), -retencion_meses)
+        return [
+            p["nombre"] for p in particiones
+            if p["limite"] is not None and p["limite"] <= corte
+        ]
+
+    @staticmethod
+    def asegurar_particiones(db: Session, ahora: Optional[datetime] = None) -> List[str]:
+        """Crea las particiones de los próximos meses; retorna sus nombres"""
+        particiones = ParticionService.listar_particiones(db)
+        if not any(p["nombre"] == PARTICION_FUTURO for p in particiones):
+            return []
+
+        nuevas = ParticionService.planificar_nuevas(
+            particiones, ahora or datetime.utcnow(), settings.HISTORIAL_PARTICION_MESES_ADELANTE
+        )
+        if not nuevas:
+            return []
+
+        definiciones = ", ".join(
+            f"PARTITION {nombre} VALUES LESS THAN ({_epoch(limite)})"
+            for nombre, limite in nuevas
+        )
+        db.execute(text(
+            f"ALTER TABLE historial REORGANIZE PARTITION {PARTICION_FUTURO} INTO "
+            f"({definiciones}, PARTITION {PARTICION_FUTURO} VALUES LESS THAN MAXVALUE)"
+        ))
+        db.commit()
+
+        return [nombre for nombre, _ in nuevas]
+
+    @staticmethod
+    def expirar_particiones(db: Session, ahora: Optional[datetime] = None) -> List[str]:
+        """
+        Elimina las particiones fuera de HISTORIAL_PARTICION_RETENCION_MESES
+
+        Borra todos los eventos del mes, también de órdenes abiertas: el archivado
+        (HISTORIAL_RETENCION_DIAS) debe ser más corto para preservar las cerradas.
+        """
+        expiradas = ParticionService.planificar_expiradas(
+            ParticionService.listar_particiones(db),
+            ahora or datetime.utcnow(),
+            settings.HISTORIAL_PARTICION_RETENCION_MESES
+        )
+        if not expiradas:
+            return []
+
+        db.execute(text(f"ALTER TABLE historial DROP PARTITION {', '.join(expiradas)}"))
+        db.commit()
+
+        return expiradas
+
+    @staticmethod
+    def mantener_particiones(db: Session) -> Dict:
+        """Ejecuta creación y expiración de particiones"""
+        resultado = {
+            "creadas": ParticionService.asegurar_particiones(db),
+            "eliminadas": ParticionService.expirar_particiones(db)
+        }
+
+        if resultado["creadas"] or resultado["eliminadas"]:
+            print(f"🗓️  PARTICIONES: creadas {resultado['creadas']}, "
+                  f"eliminadas {resultado['eliminadas']}")
+
+        return resultado
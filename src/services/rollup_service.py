@@ -0,0 +1,199 @@
+"""
+Servicio: Rollups de KPIs y SLA por minuto y por hora (tabla kpi_rollups)
+
+Los servicios registran eventos en la sesión (órdenes creadas, completadas,
+vencidas y muestras de seg_acumulados del tick). Al confirmarse la transacción
+pasan a un acumulador en memoria, y el tick lo vuelca con un upsert por bucket.
+Así las escrituras no compiten por la fila del minuto actual, y un gráfico de
+tendencia lee unas pocas filas en lugar de recorrer historial.
+
+Si el proceso se detiene entre un commit y el siguiente tick se pierden a lo
+sumo N_SEG segundos de eventos del rollup (los KPIs actuales no dependen de él).
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import event, update, insert, and_
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import threading
+
+from src.models import KpiRollup
+from src.config import settings
+
+
+GRANULARIDADES = {
+    'minuto': lambda ts: ts.replace(second=0, microsecond=0),
+    'hora': lambda ts: ts.replace(minute=0, second=0, microsecond=0),
+}
+
+CAMPOS = ('creadas', 'completadas', 'vencidas', 'suma_seg', 'muestras')
+
+_CLAVE_EVENTOS = "rollup_eventos"
+
+Clave = Tuple[str, datetime, int]
+
+
+class AcumuladorRollups:
+    """Incrementos confirmados pendientes de volcar, por (granularidad, bucket, area_id)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pendientes: Dict[Clave, Dict[str, int]] = {}
+
+    def sumar(self, momento: datetime, area_id: int, incrementos: Dict[str, int]):
+        with self._lock:
+            for granularidad, truncar in GRANULARIDADES.items():
+                fila = self._pendientes.setdefault((granularidad, truncar(momento), area_id), {})
+                for campo, valor in incrementos.items():
+                    fila[campo] = fila.get(campo, 0) + valor
+
+    def extraer(self) -> Dict[Clave, Dict[str, int]]:
+        """Retorna y vacía los incrementos pendientes"""
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, {}
+        return pendientes
+
+    def devolver(self, pendientes: Dict[Clave, Dict[str, int]]):
+        """Reincorpora incrementos cuyo volcado falló"""
+        with self._lock:
+            for clave, incrementos in pendientes.items():
+                fila = self._pendientes.setdefault(clave, {})
+                for campo, valor in incrementos.items():
+                    fila[campo] = fila.get(campo, 0) + valor
+
+
+# Instancia global del acumulador
+acumulador_rollups = AcumuladorRollups()
+
+
+class RollupService:
+
+    _ultima_purga: Optional[datetime] = None
+
+    @staticmethod
+    def registrar(db: Session, area_id: int = 0, **incrementos: int):
+        """
+        Registra incrementos en la transacción actual (se cuentan si hace commit)
+
+        area_id=0 son totales de órdenes; un área concreta registra los eventos
+        de sus asignaciones.
+        """
+        db.info.setdefault(_CLAVE_EVENTOS, []).append(
+            (datetime.utcnow(), area_id, incrementos)
+        )
+
+    @staticmethod
+    def volcar(db: Session, acumulador: AcumuladorRollups = None) -> int:
+        """
+        Escribe los incrementos acumulados en kpi_rollups (lo invoca el tick)
+
+        Retorna:
+            Número de filas (bucket, área) actualizadas
+        """
+        acumulador = acumulador or acumulador_rollups
+        pendientes = acumulador.extraer()
+        if not pendientes:
+            RollupService._purgar_minutos(db)
+            return 0
+
+        try:
+            RollupService._upsert(db, [
+                {
+                    "granularidad": granularidad, "bucket": bucket, "area_id": area_id,
+                    **{campo: incrementos.get(campo, 0) for campo in CAMPOS}
+                }
+                for (granularidad, bucket, area_id), incrementos in sorted(pendientes.items())
+            ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            acumulador.devolver(pendientes)
+            raise
+
+        RollupService._purgar_minutos(db)
+        return len(pendientes)
+
+    @staticmethod
+    def _upsert(db: Session, filas: List[dict]):
+        """INSERT ... ON DUPLICATE KEY / ON CONFLICT sumando sobre la fila existente"""
+        tabla = KpiRollup.__table__
+        dialecto = db.get_bind().dialect.name
+
+        if dialecto == 'mysql':
+            from sqlalchemy.dialects.mysql import insert as insert_mysql
+            sentencia = insert_mysql(tabla).values(filas)
+            db.execute(sentencia.on_duplicate_key_update({
+                campo: tabla.c[campo] + sentencia.inserted[campo] for campo in CAMPOS
+            }))
+        elif dialecto == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+            sentencia = insert_sqlite(tabla).values(filas)
+            db.execute(sentencia.on_conflict_do_update(
+                index_elements=['granularidad', 'bucket', 'area_id'],
+                set_={campo: tabla.c[campo] + sentencia.excluded[campo] for campo in CAMPOS}
+            ))
+        else:
+            for fila in filas:
+                resultado = db.execute(
+                    update(tabla).where(and_(
+                        tabla.c.granularidad == fila["granularidad"],
+                        tabla.c.bucket == fila["bucket"],
+                        tabla.c.area_id == fila["area_id"]
+                    )).values({campo: tabla.c[campo] + fila[campo] for campo in CAMPOS})
+                )
+                if resultado.rowcount == 0:
+                    db.execute(insert(tabla).values(fila))
+
+    @staticmethod
+    def _purgar_minutos(db: Session):
+        """Elimina buckets por minuto fuera de la retención (como mucho una vez por hora)"""
+        ahora = datetime.utcnow()
+        if RollupService._ultima_purga and ahora - RollupService._ultima_purga < timedelta(hours=1):
+            return
+        RollupService._ultima_purga = ahora
+
+        corte = ahora - timedelta(hours=settings.ROLLUP_MINUTOS_RETENCION_HORAS)
+        db.query(KpiRollup).filter(
+            KpiRollup.granularidad == 'minuto',
+            KpiRollup.bucket < corte
+        ).delete(synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def obtener_tendencias(
+        db: Session,
+        granularidad: str,
+        desde: datetime,
+        hasta: datetime,
+        area_id: int = 0
+    ) -> List[Dict]:
+        """Buckets del rango [desde, hasta] en orden cronológico (solo los que tienen datos)"""
+        filas = db.query(KpiRollup).filter(
+            KpiRollup.granularidad == granularidad,
+            KpiRollup.bucket >= GRANULARIDADES[granularidad](desde),
+            KpiRollup.bucket <= hasta,
+            KpiRollup.area_id == area_id
+        ).order_by(KpiRollup.bucket).all()
+
+        return [
+            {
+                "bucket": fila.bucket,
+                "creadas": fila.creadas,
+                "completadas": fila.completadas,
+                "vencidas": fila.vencidas,
+                "promedio_seg": round(fila.suma_seg / fila.muestras, 2) if fila.muestras else None
+            }
+            for fila in filas
+        ]
+
+
+@event.listens_for(Session, "after_commit")
+def _acumular_rollups(session: Session):
+    for momento, area_id, incrementos in session.info.pop(_CLAVE_EVENTOS, None) or []:
+        acumulador_rollups.sumar(momento, area_id, incrementos)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_rollups(session: Session, transaccion_anterior):
+    # Se dispara en todo rollback(), aunque la transacción no hubiera emitido SQL
+    if not transaccion_anterior.nested:
+        session.info.pop(_CLAVE_EVENTOS, None)
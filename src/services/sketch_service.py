@@ -0,0 +1,232 @@
+"""
+Servicio: Percentiles de SLA con sketches mergeables (tabla sla_sketches)
+
+Cuando una asignación termina (COMPLETADA o CERRADA_SIN_SOLUCION; VENCIDA aún
+puede retomarse, así que no cuenta) se registran sus seg_acumulados y, si se
+completó, el tiempo de asignación a completado. Los valores confirmados se
+acumulan en sketches por proceso y un job los fusiona con los persistidos
+(SELECT ... FOR UPDATE + merge), de modo que varios workers pueden alimentar
+la misma fila. Si SLA_SKETCH_ALPHA cambió, la fila guardada se re-agrupa con
+el alpha nuevo al fusionarla.
+
+Consultar p50/p90/p99 lee una fila por área o prioridad, sin importar cuántas
+asignaciones existan.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import event
+from typing import Dict, List, Optional, Tuple
+import json
+import threading
+
+from src.models import Orden, OrdenArea, SlaSketch
+from src.config import settings
+from src.utils.ddsketch import DDSketch
+
+
+METRICAS = ('seg_acumulados', 'tiempo_completar')
+DIMENSIONES = ('area', 'prioridad', 'total')
+ESTADOS_FINALES = ('COMPLETADA', 'CERRADA_SIN_SOLUCION')
+CUANTILES = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+_CLAVE_VALORES = "sla_sketch_valores"
+
+Clave = Tuple[str, str, str]
+
+
+class RegistroSketches:
+    """Sketches con los valores confirmados que aún no se persistieron"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sketches: Dict[Clave, DDSketch] = {}
+
+    def agregar(self, metrica: str, area_id: int, prioridad: str, valor: float):
+        with self._lock:
+            for clave in ((metrica, 'area', str(area_id)),
+                          (metrica, 'prioridad', prioridad),
+                          (metrica, 'total', '*')):
+                sketch = self._sketches.get(clave)
+                if sketch is None:
+                    sketch = self._sketches[clave] = DDSketch(alpha=settings.SLA_SKETCH_ALPHA)
+                sketch.agregar(valor)
+
+    def extraer(self) -> Dict[Clave, DDSketch]:
+        with self._lock:
+            sketches, self._sketches = self._sketches, {}
+        return sketches
+
+    def devolver(self, sketches: Dict[Clave, DDSketch]):
+        with self._lock:
+            for clave, sketch in sketches.items():
+                if clave in self._sketches:
+                    sketch.combinar(self._sketches[clave])
+                self._sketches[clave] = sketch
+
+    def vista(self, metrica: str, dimension: str) -> Dict[str, DDSketch]:
+        """Copias de los sketches pendientes de una dimensión (para las consultas)"""
+        with self._lock:
+            return {
+                clave: DDSketch.desde_dict(sketch.a_dict())
+                for (m, d, clave), sketch in self._sketches.items()
+                if m == metrica and d == dimension
+            }
+
+
+# Instancia global del registro
+registro_sketches = RegistroSketches()
+
+
+class SketchService:
+
+    @staticmethod
+    def registrar_finalizacion(db: Session, asignacion: OrdenArea, prioridad: str):
+        """Registra los valores de una asignación que terminó (se cuentan si hace commit)"""
+        if asignacion.estado_parcial not in ESTADOS_FINALES:
+            return
+
+        valores = db.info.setdefault(_CLAVE_VALORES, [])
+        valores.append(('seg_acumulados', asignacion.area_id, prioridad, asignacion.seg_acumulados or 0))
+
+        segundos = SketchService._tiempo_completar(asignacion)
+        if segundos is not None:
+            valores.append(('tiempo_completar', asignacion.area_id, prioridad, segundos))
+
+    @staticmethod
+    def _tiempo_completar(asignacion: OrdenArea) -> Optional[float]:
+        """Segundos de reloj entre la asignación y el completado"""
+        if (asignacion.estado_parcial != 'COMPLETADA'
+                or not asignacion.asignada_en or not asignacion.completada_en):
+            return None
+        return max((asignacion.completada_en - asignacion.asignada_en).total_seconds(), 0)
+
+    @staticmethod
+    def persistir(db: Session, registro: RegistroSketches = None) -> int:
+        """
+        Fusiona los sketches pendientes con los de la tabla
+
+        Retorna:
+            Número de sketches actualizados
+        """
+        registro = registro or registro_sketches
+        pendientes = registro.extraer()
+        if not pendientes:
+            return 0
+
+        try:
+            existentes = {
+                (fila.metrica, fila.dimension, fila.clave): fila
+                for fila in db.query(SlaSketch).filter(
+                    SlaSketch.metrica.in_({m for m, _, _ in pendientes})
+                ).with_for_update().all()
+            }
+            for clave, sketch in pendientes.items():
+                fila = existentes.get(clave)
+                combinado = SketchService._cargar(fila, sketch.alpha) if fila else DDSketch(sketch.alpha)
+                combinado.combinar(sketch)
+                SketchService._guardar(db, clave, combinado, fila)
+            db.commit()
+        except Exception:
+            db.rollback()
+            registro.devolver(pendientes)
+            raise
+
+        return len(pendientes)
+
+    @staticmethod
+    def _cargar(fila: SlaSketch, alpha: float) -> DDSketch:
+        """Sketch guardado en la fila, re-agrupado si se persistió con otro alpha"""
+        sketch = DDSketch.desde_dict(json.loads(fila.datos))
+        if sketch.alpha == alpha:
+            return sketch
+        print(f"♻️  SLA: sketch {fila.metrica}/{fila.dimension}/{fila.clave} "
+              f"re-agrupado de alpha {sketch.alpha} a {alpha}")
+        return sketch.con_alpha(alpha)
+
+    @staticmethod
+    def _guardar(db: Session, clave: Clave, sketch: DDSketch, fila: Optional[SlaSketch] = None):
+        datos = json.dumps(sketch.a_dict())
+        if fila is None:
+            metrica, dimension, valor = clave
+            db.add(SlaSketch(metrica=metrica, dimension=dimension, clave=valor,
+                             datos=datos, total=sketch.total))
+        else:
+            fila.datos = datos
+            fila.total = sketch.total
+
+    @staticmethod
+    def reconstruir_si_vacio(db: Session) -> int:
+        """
+        Construye los sketches desde orden_area cuando la tabla está vacía
+
+        Se ejecuta al iniciar el job; recorre las asignaciones terminadas en
+        streaming (yield_per) una sola vez.
+
+        Retorna:
+            Número de asignaciones procesadas
+        """
+        if db.query(SlaSketch.metrica).first() is not None:
+            return 0
+
+        registro = RegistroSketches()
+        procesadas = 0
+        filas = db.query(OrdenArea, Orden.prioridad).join(
+            Orden, Orden.id == OrdenArea.orden_id
+        ).filter(
+            OrdenArea.estado_parcial.in_(ESTADOS_FINALES)
+        ).execution_options(stream_results=True).yield_per(1000)
+
+        for asignacion, prioridad in filas:
+            registro.agregar('seg_acumulados', asignacion.area_id, prioridad, asignacion.seg_acumulados or 0)
+            segundos = SketchService._tiempo_completar(asignacion)
+            if segundos is not None:
+                registro.agregar('tiempo_completar', asignacion.area_id, prioridad, segundos)
+            procesadas += 1
+
+        SketchService.persistir(db, registro)
+        if procesadas:
+            print(f"📈 SLA: sketches reconstruidos desde {procesadas} asignaciones terminadas")
+        return procesadas
+
+    @staticmethod
+    def obtener_percentiles(db: Session, metrica: str, dimension: str) -> List[Dict]:
+        """p50/p90/p99 por valor de la dimensión (incluye lo aún no persistido)"""
+        filas = {
+            fila.clave: SketchService._cargar(fila, settings.SLA_SKETCH_ALPHA)
+            for fila in db.query(SlaSketch).filter(
+                SlaSketch.metrica == metrica,
+                SlaSketch.dimension == dimension
+            ).all()
+        }
+        for clave, sketch in registro_sketches.vista(metrica, dimension).items():
+            if sketch.alpha != settings.SLA_SKETCH_ALPHA:
+                sketch = sketch.con_alpha(settings.SLA_SKETCH_ALPHA)
+            if clave in filas:
+                filas[clave].combinar(sketch)
+            else:
+                filas[clave] = sketch
+
+        return [
+            {
+                dimension: clave,
+                "muestras": sketch.total,
+                "promedio": round(sketch.suma / sketch.total, 2) if sketch.total else None,
+                **{nombre: SketchService._redondear(sketch.cuantil(q)) for nombre, q in CUANTILES.items()}
+            }
+            for clave, sketch in sorted(filas.items())
+        ]
+
+    @staticmethod
+    def _redondear(valor: Optional[float]) -> Optional[float]:
+        return round(valor, 2) if valor is not None else None
+
+
+@event.listens_for(Session, "after_commit")
+def _registrar_sketches(session: Session):
+    for metrica, area_id, prioridad, valor in session.info.pop(_CLAVE_VALORES, None) or []:
+        registro_sketches.agregar(metrica, area_id, prioridad, valor)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_sketches(session: Session, transaccion_anterior):
+    if not transaccion_anterior.nested:
+        session.info.pop(_CLAVE_VALORES, None)
@@ -9,9 +9,20 @@ from typing import Dict, List
 
 from src.models import Orden, OrdenArea, Historial
 from src.services.estado_service import EstadoService
+from src.services.kpi_service import KpiService
+from src.services.contadores_service import ContadoresService, ESTADOS_ACTIVOS
+from src.services.rollup_service import RollupService
+from src.services.sketch_service import SketchService
+from src.utils.eventos import bus_eventos
+from src.utils.cache import CacheTTL
+from src.utils.trazas import span
 from src.config import settings
 
 
+# Las estadísticas SLA cambian con cada tick: cache de un intervalo
+cache_estadisticas_sla = CacheTTL(ttl_seg=settings.N_SEG, nombre="estadisticas_sla")
+
+
 class TemporizadorService:
     
     @staticmethod
@@ -32,21 +43,35 @@ class TemporizadorService:
         
         try:
             # 1. Incrementar segundos en áreas activas
-            areas_actualizadas = TemporizadorService._incrementar_segundos(db)
+            with span("tick.incrementar_segundos"):
+                areas_actualizadas = TemporizadorService._incrementar_segundos(db)
             resultado["areas_actualizadas"] = areas_actualizadas
             
             # 2. Aplicar timeouts a áreas que superaron SLA
-            timeouts = TemporizadorService._aplicar_timeouts(db)
+            with span("tick.aplicar_timeouts"):
+                timeouts = TemporizadorService._aplicar_timeouts(db)
             resultado["timeouts_aplicados"] = len(timeouts)
             
             # 3. Recalcular estados globales de órdenes afectadas
-            ordenes_afectadas = TemporizadorService._obtener_ordenes_afectadas(db)
-            for orden in ordenes_afectadas:
-                EstadoService.recalcular_estado_global(db, orden)
-                resultado["ordenes_recalculadas"].append(orden.id)
+            with span("tick.recalcular_estados"):
+                ordenes_afectadas = TemporizadorService._obtener_ordenes_afectadas(db)
+                for orden in ordenes_afectadas:
+                    EstadoService.recalcular_estado_global(db, orden)
+                    resultado["ordenes_recalculadas"].append(orden.id)
             
             # 4. Commit de todos los cambios
-            db.commit()
+            with span("tick.commit"):
+                db.commit()
+            
+            cache_estadisticas_sla.invalidar()
+            
+            # 5. Volcar los rollups de KPIs/SLA acumulados desde el último tick
+            with span("tick.volcar_rollups"):
+                RollupService.volcar(db)
+            
+            # 6. Notificar a los dashboards conectados (una vez por tick)
+            with span("tick.publicar_cambios"):
+                TemporizadorService._publicar_cambios(db, resultado)
             
             # Log resumido
             if areas_actualizadas > 0 or len(timeouts) > 0:
@@ -61,6 +86,21 @@ class TemporizadorService:
         
         return resultado
     
+    @staticmethod
+    def _publicar_cambios(db: Session, resultado: Dict):
+        """Refresca los KPIs si cambiaron y publica el resumen del tick y las estadísticas SLA"""
+        KpiService.refrescar_si_cambio(db)
+        
+        if not bus_eventos.tiene_suscriptores:
+            return
+        
+        bus_eventos.publicar("tick", {
+            "areas_actualizadas": resultado["areas_actualizadas"],
+            "timeouts_aplicados": resultado["timeouts_aplicados"],
+            "ordenes_recalculadas": len(resultado["ordenes_recalculadas"])
+        })
+        bus_eventos.publicar("sla", TemporizadorService.obtener_estadisticas_sla_cacheadas(db))
+    
     @staticmethod
     def _incrementar_segundos(db: Session) -> int:
         """
@@ -73,11 +113,36 @@ class TemporizadorService:
         """
         # Obtener áreas en estados que acumulan tiempo
         areas_activas = db.query(OrdenArea).filter(
-            OrdenArea.estado_parcial.in_(['EN_PROGRESO', 'PENDIENTE'])
+            OrdenArea.estado_parcial.in_(ESTADOS_ACTIVOS)
         ).all()
         
+        limite_advertencia = int(settings.SLA_SEG * 0.8)
+        cerca_limite = 0
+        muestras_por_area = {}
         for area in areas_activas:
             area.seg_acumulados += settings.N_SEG
+            if (area.estado_parcial == 'EN_PROGRESO'
+                    and limite_advertencia <= area.seg_acumulados < settings.SLA_SEG):
+                cerca_limite += 1
+            suma, muestras = muestras_por_area.get(area.area_id, (0, 0))
+            muestras_por_area[area.area_id] = (suma + area.seg_acumulados, muestras + 1)
+        
+        # La sesión no hace autoflush: _aplicar_timeouts consulta los valores ya incrementados
+        db.flush()
+        
+        # Muestras de seg_acumulados para los rollups (por área y total en area_id=0)
+        for area_id, (suma, muestras) in muestras_por_area.items():
+            RollupService.registrar(db, area_id, suma_seg=suma, muestras=muestras)
+        if areas_activas:
+            RollupService.registrar(
+                db,
+                suma_seg=sum(s for s, _ in muestras_por_area.values()),
+                muestras=len(areas_activas)
+            )
+        
+        # Contadores del widget SLA (los timeouts de este tick no entran: seg >= SLA)
+        ContadoresService.ajustar(db, 'sla', 'suma_seg_activas', settings.N_SEG * len(areas_activas))
+        ContadoresService.fijar(db, 'sla', 'cerca_limite', cerca_limite)
         
         return len(areas_activas)
     
@@ -103,21 +168,26 @@ class TemporizadorService:
             # Cambiar estado a ESTADO_TIMEOUT configurado
             estado_anterior = area.estado_parcial
             area.estado_parcial = settings.ESTADO_TIMEOUT
+            ContadoresService.transicion_area(
+                db, estado_anterior, settings.ESTADO_TIMEOUT, area.seg_acumulados
+            )
+            RollupService.registrar(db, area.area_id, vencidas=1)
             
             # Registrar en historial
             historial = Historial(
                 orden_id=area.orden_id,
                 evento='TIMEOUT_SLA',
-                detalle=f'Área {area.area.nombre} superó el SLA de {settings.SLA_SEG}s '
-                        f'(acumulados: {area.seg_acumulados}s). '
-                        f'Estado: {estado_anterior} → {settings.ESTADO_TIMEOUT}',
+                area_id=area.area_id,
+                estado_desde=estado_anterior,
+                estado_hasta=settings.ESTADO_TIMEOUT,
+                segundos=area.seg_acumulados,
                 actor='SISTEMA_TEMPORIZADOR'
             )
             db.add(historial)
             
             timeouts_aplicados.append(area)
             
-            print(f"⏰ TIMEOUT: Orden #{area.orden_id} - Área {area.area.nombre} "
+            print(f"⏰ TIMEOUT: Orden #{area.orden_id} - Área #{area.area_id} "
                   f"({area.seg_acumulados}s >= {settings.SLA_SEG}s)")
         
         return timeouts_aplicados
@@ -142,40 +212,43 @@ class TemporizadorService:
         
         return ordenes
     
+    @staticmethod
+    def obtener_estadisticas_sla_cacheadas(db: Session) -> Dict:
+        """Estadísticas SLA del tick actual (se recalculan a lo sumo una vez por intervalo)"""
+        return cache_estadisticas_sla.obtener(
+            lambda: TemporizadorService.obtener_estadisticas_sla(db)
+        )
+    
     @staticmethod
     def obtener_estadisticas_sla(db: Session) -> Dict:
         """
         Obtiene estadísticas sobre el cumplimiento de SLA
         
+        Lee los contadores incrementales (kpi_contadores) y el sketch global de
+        seg_acumulados: dos lecturas de costo constante sin importar cuántas
+        asignaciones existan.
+        
         Retorna:
             Dict con métricas de SLA
         """
-        from sqlalchemy import func
+        contadores = ContadoresService.leer_ambitos(db, 'estado_parcial', 'sla')
+        por_estado, sla = contadores['estado_parcial'], contadores['sla']
         
         # Total de áreas activas
-        total_activas = db.query(func.count(OrdenArea.id)).filter(
-            OrdenArea.estado_parcial.in_(['EN_PROGRESO', 'PENDIENTE'])
-        ).scalar()
+        total_activas = sum(por_estado.get(e, 0) for e in ESTADOS_ACTIVOS)
         
-        # Áreas cerca del límite (>80% del SLA)
-        limite_advertencia = int(settings.SLA_SEG * 0.8)
-        cerca_limite = db.query(func.count(OrdenArea.id)).filter(
-            and_(
-                OrdenArea.estado_parcial == 'EN_PROGRESO',
-                OrdenArea.seg_acumulados >= limite_advertencia,
-                OrdenArea.seg_acumulados < settings.SLA_SEG
-            )
-        ).scalar()
+        # Áreas cerca del límite (>80% del SLA), calculado en el último tick
+        cerca_limite = sla.get('cerca_limite', 0)
         
         # Áreas que superaron SLA (vencidas)
-        vencidas = db.query(func.count(OrdenArea.id)).filter(
-            OrdenArea.estado_parcial == settings.ESTADO_TIMEOUT
-        ).scalar()
+        vencidas = por_estado.get(settings.ESTADO_TIMEOUT, 0)
         
         # Promedio de segundos acumulados en áreas activas
-        promedio_seg = db.query(func.avg(OrdenArea.seg_acumulados)).filter(
-            OrdenArea.estado_parcial.in_(['EN_PROGRESO', 'PENDIENTE'])
-        ).scalar() or 0
+        promedio_seg = sla.get('suma_seg_activas', 0) / total_activas if total_activas > 0 else 0
+        
+        # Percentiles de seg_acumulados de asignaciones terminadas
+        global_seg = SketchService.obtener_percentiles(db, 'seg_acumulados', 'total')
+        percentiles = {p: (global_seg[0][p] if global_seg else None) for p in ('p50', 'p90', 'p99')}
         
         return {
             "sla_segundos": settings.SLA_SEG,
@@ -183,6 +256,7 @@ class TemporizadorService:
             "areas_cerca_limite": cerca_limite,
             "areas_vencidas": vencidas,
             "promedio_segundos": round(promedio_seg, 2),
+            "percentiles_segundos": percentiles,
             "porcentaje_cumplimiento": round(
                 ((total_activas - vencidas) / total_activas * 100) if total_activas > 0 else 100,
                 2
@@ -4,8 +4,8 @@
  * ============================================
  */
 
-// Configuración
-const API_BASE_URL = 'http://localhost:8000';
+// Configuración (rutas relativas: el frontend lo sirve la misma API)
+const API_BASE_URL = '';
 let ordenId = null;
 let ordenData = null;
 let modalCallback = null;
@@ -51,6 +51,19 @@ function initializeApp() {
     console.log(`🚀 Cargando orden #${ordenId}...`);
     cargarOrden();
     cargarHistorial();
+    suscribirFeed();
+}
+
+function suscribirFeed() {
+    // Recargar solo cuando el cambio afecta a esta orden
+    const alCambiar = (datos) => {
+        if (datos.orden_id === ordenId) {
+            cargarOrden();
+            cargarHistorial();
+        }
+    };
+    FeedEventos.suscribir('orden', alCambiar);
+    FeedEventos.suscribir('asignacion', alCambiar);
 }
 
 function setupEventListeners() {
@@ -92,13 +105,24 @@ async function cargarOrden() {
 
 async function cargarHistorial() {
     try {
-        const response = await fetch(`${API_BASE_URL}/ordenes/${ordenId}/historial`);
-        
-        if (!response.ok) {
-            throw new Error(`Error ${response.status}`);
-        }
+        // El historial se pagina por cursor: seguir X-Siguiente-Cursor hasta el final
+        const historial = [];
+        let cursor = null;
+
+        do {
+            const url = cursor
+                ? `${API_BASE_URL}/ordenes/${ordenId}/historial?limit=1000&cursor=${encodeURIComponent(cursor)}`
+                : `${API_BASE_URL}/ordenes/${ordenId}/historial?limit=1000`;
+            const response = await fetch(url);
+
+            if (!response.ok) {
+                throw new Error(`Error ${response.status}`);
+            }
+
+            historial.push(...await response.json());
+            cursor = response.headers.get('X-Siguiente-Cursor');
+        } while (cursor);
 
-        const historial = await response.json();
         renderizarHistorial(historial);
         
     } catch (error) {
@@ -0,0 +1,46 @@
+/**
+ * ============================================
+ * Feed de cambios (Server-Sent Events)
+ * ============================================
+ * Una sola conexión por pestaña a /eventos/stream; el dashboard, el detalle
+ * y el widget del temporizador se suscriben a los tipos que les interesan.
+ */
+
+const FeedEventos = {
+    fuente: null,
+    manejadores: {},
+
+    suscribir(tipo, manejador) {
+        if (!this.manejadores[tipo]) {
+            this.manejadores[tipo] = [];
+            if (this.fuente) {
+                this.registrarTipo(tipo);
+            }
+        }
+        this.manejadores[tipo].push(manejador);
+        this.conectar();
+    },
+
+    conectar() {
+        if (this.fuente || typeof EventSource === 'undefined') {
+            return;
+        }
+
+        this.fuente = new EventSource('/eventos/stream');
+        this.fuente.onopen = () => console.log('📡 Feed de eventos conectado');
+        this.fuente.onerror = () => console.warn('⚠️ Feed de eventos desconectado, reintentando...');
+
+        for (const tipo of Object.keys(this.manejadores)) {
+            this.registrarTipo(tipo);
+        }
+    },
+
+    registrarTipo(tipo) {
+        this.fuente.addEventListener(tipo, (e) => {
+            const mensaje = JSON.parse(e.data);
+            for (const manejador of this.manejadores[tipo]) {
+                manejador(mensaje.datos, mensaje);
+            }
+        });
+    }
+};
@@ -4,8 +4,8 @@
  * ============================================
  */
 
-// Configuración
-const API_BASE_URL = 'http://localhost:8000';
+// Configuración (rutas relativas: el frontend lo sirve la misma API)
+const API_BASE_URL = '';
 let ordenesData = [];
 let kpisData = {};
 
@@ -19,8 +19,8 @@ document.addEventListener('DOMContentLoaded', () => {
 
 function initializeApp() {
     console.log('🚀 Inicializando aplicación...');
-    cargarKPIs();
-    cargarOrdenes();
+    cargarDashboard();
+    suscribirFeed();
 }
 
 // ============================================
@@ -52,6 +52,32 @@ function setupEventListeners() {
 // ============================================
 // Carga de Datos
 // ============================================
+async function cargarDashboard() {
+    // Primera carga en una sola petición; el widget del temporizador reutiliza la respuesta
+    mostrarLoading(true);
+    window.dashboardInicial = fetch(`${API_BASE_URL}/dashboard`).then((response) => {
+        if (!response.ok) {
+            throw new Error(`Error ${response.status}: ${response.statusText}`);
+        }
+        return response.json();
+    });
+
+    try {
+        const dashboard = await window.dashboardInicial;
+        kpisData = dashboard.kpis;
+        ordenesData = dashboard.ordenes;
+        renderizarKPIs(kpisData);
+        renderizarOrdenes(ordenesData);
+
+    } catch (error) {
+        console.error('❌ Error al cargar el dashboard:', error);
+        mostrarError('No se pudo cargar el dashboard. Verifica que el servidor esté corriendo.');
+        renderizarOrdenes([]);
+    } finally {
+        mostrarLoading(false);
+    }
+}
+
 async function cargarKPIs() {
     try {
         const response = await fetch(`${API_BASE_URL}/kpis`);
@@ -89,7 +115,7 @@ async function cargarOrdenes(estado = '') {
         
     } catch (error) {
         console.error('❌ Error al cargar órdenes:', error);
-        mostrarError('No se pudieron cargar las órdenes. Verifica que el servidor esté corriendo en http://localhost:8000');
+        mostrarError('No se pudieron cargar las órdenes. Verifica que el servidor esté corriendo.');
         renderizarOrdenes([]);
     } finally {
         mostrarLoading(false);
@@ -376,16 +402,31 @@ function verDetalle(ordenId) {
 }
 
 // ============================================
-// Auto-refresh (opcional)
+// Actualización en tiempo real (feed SSE)
 // ============================================
-function iniciarAutoRefresh(intervaloSegundos = 30) {
-    setInterval(() => {
-        const estadoActual = document.getElementById('estado-filter').value;
-        console.log('🔄 Auto-refresh...');
-        cargarKPIs();
-        cargarOrdenes(estadoActual);
-    }, intervaloSegundos * 1000);
+let recargaPendiente = null;
+
+function suscribirFeed() {
+    // Los KPIs llegan ya calculados: no hace falta volver a pedir /kpis
+    FeedEventos.suscribir('kpis', (datos) => {
+        kpisData = datos.kpis;
+        renderizarKPIs(kpisData);
+    });
+
+    FeedEventos.suscribir('orden', programarRecargaOrdenes);
+    FeedEventos.suscribir('asignacion', programarRecargaOrdenes);
+    FeedEventos.suscribir('tick', (datos) => {
+        if (datos.timeouts_aplicados > 0) {
+            programarRecargaOrdenes();
+        }
+    });
 }
 
-// Descomentar para activar auto-refresh cada 30 segundos
-// iniciarAutoRefresh(30);
\ No newline at end of file
+function programarRecargaOrdenes() {
+    // Agrupa ráfagas de eventos en una sola recarga de la lista
+    clearTimeout(recargaPendiente);
+    recargaPendiente = setTimeout(() => {
+        console.log('🔄 Cambios recibidos, recargando órdenes...');
+        cargarOrdenes(document.getElementById('estado-filter').value);
+    }, 1000);
+}
\ No newline at end of file
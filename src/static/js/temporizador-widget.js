@@ -5,14 +5,13 @@
 
 class TemporizadorWidget {
     constructor() {
-        this.intervalo = null;
         this.init();
     }
 
     init() {
         this.crearWidget();
         this.cargarEstado();
-        this.iniciarActualizacion();
+        this.suscribirFeed();
     }
 
     crearWidget() {
@@ -60,23 +59,9 @@ class TemporizadorWidget {
                     <span style="color: #6b7280;">Vencidas:</span>
                     <span id="widget-vencidas" style="font-weight: 600; margin-left: 4px; color: #dc2626;">--</span>
                 </div>
-                <button 
-                    id="widget-tick-manual" 
-                    style="
-                        width: 100%;
-                        padding: 8px;
-                        background: #2563eb;
-                        color: white;
-                        border: none;
-                        border-radius: 4px;
-                        cursor: pointer;
-                        font-weight: 600;
-                        font-size: 0.75rem;
-                        margin-top: 8px;
-                    "
-                >
-                    🔄 Tick Manual
-                </button>
+                <div style="color: #9ca3af; font-size: 0.75rem;">
+                    Último tick: <span id="widget-ultimo-tick">--</span>
+                </div>
             </div>
         `;
 
@@ -86,17 +71,16 @@ class TemporizadorWidget {
         document.getElementById('widget-toggle').addEventListener('click', () => {
             this.toggleWidget();
         });
-
-        document.getElementById('widget-tick-manual').addEventListener('click', () => {
-            this.ejecutarTickManual();
-        });
     }
 
     async cargarEstado() {
+        // Configuración y estadísticas iniciales; luego llegan por el feed.
+        // En el dashboard se reutiliza la respuesta de /dashboard que ya pidió ordenes.js
         try {
-            // Estado del temporizador
-            const estadoResponse = await fetch('http://localhost:8000/temporizador/estado');
-            const estado = await estadoResponse.json();
+            const datos = window.dashboardInicial
+                ? await window.dashboardInicial
+                : await (await fetch('/dashboard?secciones=temporizador,estadisticas_sla')).json();
+            const estado = datos.temporizador;
 
             document.getElementById('widget-estado').textContent = 
                 estado.activo ? '🟢 Activo' : '🔴 Inactivo';
@@ -105,56 +89,25 @@ class TemporizadorWidget {
             document.getElementById('widget-sla').textContent = 
                 `${estado.configuracion.sla_seg}s`;
 
-            // Estadísticas de SLA
-            const statsResponse = await fetch('http://localhost:8000/temporizador/estadisticas-sla');
-            const stats = await statsResponse.json();
-
-            document.getElementById('widget-areas').textContent = stats.total_areas_activas;
-            document.getElementById('widget-vencidas').textContent = stats.areas_vencidas;
+            this.renderizarEstadisticas(datos.estadisticas_sla);
 
         } catch (error) {
             console.error('Error al cargar estado del temporizador:', error);
         }
     }
 
-    async ejecutarTickManual() {
-        const btn = document.getElementById('widget-tick-manual');
-        btn.disabled = true;
-        btn.textContent = '⏳ Ejecutando...';
-
-        try {
-            const response = await fetch('http://localhost:8000/temporizador/tick', {
-                method: 'POST'
-            });
-            const resultado = await response.json();
-
-            console.log('Tick manual ejecutado:', resultado);
-            
-            // Mostrar resultado brevemente
-            btn.textContent = `✅ ${resultado.areas_actualizadas} actualizadas`;
-            
-            // Recargar estado
-            setTimeout(() => {
-                this.cargarEstado();
-                btn.textContent = '🔄 Tick Manual';
-                btn.disabled = false;
-            }, 2000);
-
-        } catch (error) {
-            console.error('Error al ejecutar tick:', error);
-            btn.textContent = '❌ Error';
-            setTimeout(() => {
-                btn.textContent = '🔄 Tick Manual';
-                btn.disabled = false;
-            }, 2000);
-        }
+    suscribirFeed() {
+        FeedEventos.suscribir('sla', (stats) => this.renderizarEstadisticas(stats));
+        FeedEventos.suscribir('tick', (datos, mensaje) => {
+            document.getElementById('widget-estado').textContent = '🟢 Activo';
+            document.getElementById('widget-ultimo-tick').textContent = 
+                new Date(mensaje.timestamp + 'Z').toLocaleTimeString();
+        });
     }
 
-    iniciarActualizacion() {
-        // Actualizar cada 5 segundos
-        this.intervalo = setInterval(() => {
-            this.cargarEstado();
-        }, 5000);
+    renderizarEstadisticas(stats) {
+        document.getElementById('widget-areas').textContent = stats.total_areas_activas;
+        document.getElementById('widget-vencidas').textContent = stats.areas_vencidas;
     }
 
     toggleWidget() {
@@ -171,9 +124,6 @@ class TemporizadorWidget {
     }
 
     destruir() {
-        if (this.intervalo) {
-            clearInterval(this.intervalo);
-        }
         const widget = document.getElementById('temporizador-widget');
         if (widget) {
             widget.remove();
@@ -0,0 +1,72 @@
+"""
+Cache en memoria con TTL y single-flight
+
+Si varias peticiones encuentran el valor vencido a la vez, solo una lo
+recalcula; las demás esperan el lock y reciben ese mismo resultado.
+
+Cada cache con nombre cuenta aciertos y fallos (recálculos) para /metrics.
+"""
+from typing import Callable, Dict, Generic, Optional, TypeVar
+import threading
+import time
+
+T = TypeVar("T")
+
+
+class EstadisticasCache:
+    """Aciertos y fallos de un cache (incrementos sin lock: bajo el GIL se
+    puede perder alguno con concurrencia alta, aceptable para una tasa)"""
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.aciertos = 0
+        self.fallos = 0
+
+    @property
+    def tasa_aciertos(self) -> Optional[float]:
+        total = self.aciertos + self.fallos
+        return self.aciertos / total if total else None
+
+
+# Estadísticas por nombre de cache ("estadisticas_sla", "kpis", ...)
+estadisticas_caches: Dict[str, EstadisticasCache] = {}
+
+
+def estadisticas_cache(nombre: str) -> EstadisticasCache:
+    return estadisticas_caches.setdefault(nombre, EstadisticasCache(nombre))
+
+
+class CacheTTL(Generic[T]):
+    """Un único valor cacheado durante ttl_seg segundos"""
+
+    def __init__(self, ttl_seg: float, nombre: Optional[str] = None):
+        self.ttl_seg = ttl_seg
+        self._lock = threading.Lock()
+        self._valor: Optional[T] = None
+        self._calculado_en: Optional[float] = None
+        self.estadisticas = estadisticas_cache(nombre) if nombre else EstadisticasCache("anonimo")
+
+    def _vigente(self) -> bool:
+        return (self._calculado_en is not None
+                and time.monotonic() - self._calculado_en < self.ttl_seg)
+
+    def obtener(self, calcular: Callable[[], T]) -> T:
+        """Retorna el valor vigente o lo recalcula con `calcular`"""
+        if self._vigente():
+            self.estadisticas.aciertos += 1
+            return self._valor
+
+        with self._lock:
+            if self._vigente():
+                self.estadisticas.aciertos += 1
+            else:
+                self.estadisticas.fallos += 1
+                self.guardar(calcular())
+            return self._valor
+
+    def guardar(self, valor: T):
+        self._valor = valor
+        self._calculado_en = time.monotonic()
+
+    def invalidar(self):
+        self._calculado_en = None
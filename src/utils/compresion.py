@@ -0,0 +1,162 @@
+"""
+Middleware de compresión de respuestas (brotli si está instalado, o gzip)
+
+- Respuestas de un solo bloque: se comprimen si superan el umbral de tamaño.
+- Respuestas en streaming (export NDJSON, archivos estáticos sin precomprimir):
+  se comprimen por bloque con flush, así el cliente recibe datos sin esperar
+  al final.
+- No se tocan: Server-Sent Events (el feed no debe quedar retenido en el
+  compresor), respuestas que ya traen Content-Encoding (estáticos
+  precomprimidos) ni 204/304.
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Optional, Set
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:  # Dependencia opcional: solo gzip
+    brotli = None
+
+
+def codificaciones_aceptadas(accept_encoding: str) -> Set[str]:
+    """Codificaciones de Accept-Encoding con q > 0"""
+    aceptadas = set()
+    for parte in accept_encoding.lower().split(","):
+        nombre, *parametros = [p.strip() for p in parte.split(";")]
+        calidad = 1.0
+        for parametro in parametros:
+            if parametro.startswith("q="):
+                try:
+                    calidad = float(parametro[2:])
+                except ValueError:
+                    calidad = 0.0
+        if calidad > 0:
+            aceptadas.add(nombre)
+    return aceptadas
+
+
+def elegir_codificacion(accept_encoding: str) -> Optional[str]:
+    """Codificación a usar según Accept-Encoding ('br', 'gzip' o None)"""
+    aceptadas = codificaciones_aceptadas(accept_encoding)
+    if brotli is not None and "br" in aceptadas:
+        return "br"
+    if "gzip" in aceptadas:
+        return "gzip"
+    return None
+
+
+class _Compresor:
+    """Compresión incremental con flush por bloque"""
+
+    def __init__(self, codificacion: str, nivel_gzip: int):
+        self.codificacion = codificacion
+        if codificacion == "br":
+            self._compresor = brotli.Compressor(quality=4)
+        else:
+            self._compresor = zlib.compressobj(nivel_gzip, zlib.DEFLATED, 31)  # 31 = formato gzip
+
+    def bloque(self, datos: bytes) -> bytes:
+        if self.codificacion == "br":
+            return self._compresor.process(datos) + self._compresor.flush()
+        return self._compresor.compress(datos) + self._compresor.flush(zlib.Z_SYNC_FLUSH)
+
+    def final(self) -> bytes:
+        if self.codificacion == "br":
+            return self._compresor.finish()
+        return self._compresor.flush()
+
+
+def comprimir(datos: bytes, codificacion: str, nivel_gzip: int = 6) -> bytes:
+    if codificacion == "br":
+        return brotli.compress(datos, quality=5)
+    return gzip.compress(datos, compresslevel=nivel_gzip)
+
+
+class CompresionMiddleware:
+    """Comprime las respuestas HTTP según Accept-Encoding"""
+
+    def __init__(self, app: ASGIApp, minimo_bytes: int = 1024, nivel_gzip: int = 6):
+        self.app = app
+        self.minimo_bytes = minimo_bytes
+        self.nivel_gzip = nivel_gzip
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        codificacion = elegir_codificacion(Headers(scope=scope).get("accept-encoding", ""))
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+
+        respuesta = _RespuestaComprimida(send, codificacion, self.minimo_bytes, self.nivel_gzip)
+        await self.app(scope, receive, respuesta.enviar)
+
+
+class _RespuestaComprimida:
+    """Intercepta los mensajes ASGI de una respuesta y decide si comprimirla"""
+
+    def __init__(self, send: Send, codificacion: str, minimo_bytes: int, nivel_gzip: int):
+        self.send = send
+        self.codificacion = codificacion
+        self.minimo_bytes = minimo_bytes
+        self.nivel_gzip = nivel_gzip
+        self.inicio: Optional[Message] = None
+        self.modo: Optional[str] = None  # pasar | streaming
+        self.compresor: Optional[_Compresor] = None
+
+    async def enviar(self, mensaje: Message):
+        if mensaje["type"] == "http.response.start":
+            self.inicio = mensaje
+            headers = Headers(raw=mensaje["headers"])
+            if (mensaje["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or headers.get("content-type", "").startswith("text/event-stream")):
+                self.modo = "pasar"
+                await self.send(mensaje)
+            return
+
+        if mensaje["type"] != "http.response.body" or self.modo == "pasar":
+            await self.send(mensaje)
+            return
+
+        cuerpo = mensaje.get("body", b"")
+        hay_mas = mensaje.get("more_body", False)
+
+        if self.modo == "streaming":
+            datos = self.compresor.bloque(cuerpo)
+            if not hay_mas:
+                datos += self.compresor.final()
+            await self.send({"type": "http.response.body", "body": datos, "more_body": hay_mas})
+            return
+
+        # Primer bloque del cuerpo
+        headers = MutableHeaders(raw=self.inicio["headers"])
+        if not hay_mas:
+            if len(cuerpo) < self.minimo_bytes:
+                self.modo = "pasar"
+                await self.send(self.inicio)
+                await self.send(mensaje)
+                return
+            cuerpo = comprimir(cuerpo, self.codificacion, self.nivel_gzip)
+            headers["Content-Encoding"] = self.codificacion
+            headers["Content-Length"] = str(len(cuerpo))
+            headers.add_vary_header("Accept-Encoding")
+            await self.send(self.inicio)
+            await self.send({"type": "http.response.body", "body": cuerpo})
+            return
+
+        self.modo = "streaming"
+        self.compresor = _Compresor(self.codificacion, self.nivel_gzip)
+        headers["Content-Encoding"] = self.codificacion
+        headers.add_vary_header("Accept-Encoding")
+        if "content-length" in headers:
+            del headers["content-length"]
+        await self.send(self.inicio)
+        await self.send({
+            "type": "http.response.body", "body": self.compresor.bloque(cuerpo), "more_body": True
+        })
@@ -0,0 +1,177 @@
+"""
+Contador de consultas SQL por petición y detector de N+1
+
+Un listener de SQLAlchemy (a nivel de Engine, cubre todos los engines:
+primario, réplica, async y los de las pruebas) suma cada sentencia y su
+duración al contador activo en un ContextVar. ConsultasMiddleware abre un
+contador por petición; como FastAPI ejecuta los endpoints síncronos en el
+threadpool copiando el contexto, las consultas hechas desde ahí también se
+cuentan. Fuera de una petición (scheduler, scripts) no hay contador activo y
+el listener solo hace una lectura del ContextVar.
+
+Se reporta en los headers X-DB-Consultas / X-DB-Tiempo-Ms. Una misma
+sentencia (misma forma, con los parámetros y las listas IN colapsados)
+repetida DB_UMBRAL_N_MAS_1 veces o más se marca como posible N+1. Con
+DB_CONSULTAS_ESTRICTO, superar DB_PRESUPUESTO_CONSULTAS o detectar un N+1
+responde 500 en lugar de solo avisar (pensado para pruebas y desarrollo).
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Iterator, List, Optional, Tuple
+import json
+import re
+import time
+
+from src.utils.contexto import en_contexto
+from src.utils.rutas import plantilla_ruta
+
+
+_LISTA_PARAMETROS = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s)(?:\s*,\s*(?:\?|%s|%\(\w+\)s))*\s*\)")
+
+
+def forma_sentencia(sentencia: str) -> str:
+    """Sentencia con las listas de parámetros colapsadas (IN (?, ?, ?) -> IN (?))"""
+    return _LISTA_PARAMETROS.sub("(?)", " ".join(sentencia.split()))
+
+
+class ContadorConsultas:
+    """Sentencias y tiempo en base de datos de una unidad de trabajo (petición, prueba)"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_seg = 0.0
+        self.formas: Counter = Counter()
+
+    def registrar(self, sentencia: str, segundos: float):
+        self.consultas += 1
+        self.tiempo_seg += segundos
+        self.formas[sentencia] += 1
+
+    def repetidas(self, umbral: int) -> List[Tuple[str, int]]:
+        """Formas de sentencia ejecutadas `umbral` veces o más (posibles N+1)"""
+        if umbral <= 0:
+            return []
+        conteos = Counter()
+        for sentencia, veces in self.formas.items():
+            conteos[forma_sentencia(sentencia)] += veces
+        return [(forma, veces) for forma, veces in conteos.most_common() if veces >= umbral]
+
+
+_contador_actual: ContextVar[Optional[ContadorConsultas]] = ContextVar("contador_consultas", default=None)
+
+
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    if _contador_actual.get() is not None:
+        context._consulta_inicio = time.perf_counter()
+
+
+def _despues(conn, cursor, statement, parameters, context, executemany):
+    contador = _contador_actual.get()
+    inicio = getattr(context, "_consulta_inicio", None)
+    if contador is not None and inicio is not None:
+        contador.registrar(statement, time.perf_counter() - inicio)
+
+
+def instalar_contador():
+    """Registra los listeners en todos los engines (idempotente)"""
+    if not event.contains(Engine, "before_cursor_execute", _antes):
+        event.listen(Engine, "before_cursor_execute", _antes)
+        event.listen(Engine, "after_cursor_execute", _despues)
+
+
+@contextmanager
+def contar_consultas() -> Iterator[ContadorConsultas]:
+    """Cuenta las sentencias ejecutadas dentro del bloque (en este contexto)"""
+    contador = ContadorConsultas()
+    token = _contador_actual.set(contador)
+    try:
+        yield contador
+    finally:
+        _contador_actual.reset(token)
+
+
+class PresupuestoConsultasExcedido(AssertionError):
+    """Una unidad de trabajo superó el presupuesto de consultas o repitió una sentencia"""
+
+
+def verificar_presupuesto(contador: ContadorConsultas, presupuesto: int, umbral_n_mas_1: int) -> List[str]:
+    """Problemas encontrados (vacío si está dentro del presupuesto y sin N+1)"""
+    problemas = []
+    if presupuesto and contador.consultas > presupuesto:
+        problemas.append(f"{contador.consultas} consultas (presupuesto {presupuesto})")
+    for forma, veces in contador.repetidas(umbral_n_mas_1):
+        problemas.append(f"posible N+1: {veces}× {forma[:160]}")
+    return problemas
+
+
+class ConsultasMiddleware:
+    """Cuenta las consultas de cada petición y las reporta en los headers"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        presupuesto: int = 0,
+        umbral_n_mas_1: int = 10,
+        estricto: bool = False,
+        registrar_todas: bool = False
+    ):
+        self.app = app
+        self.presupuesto = presupuesto
+        self.umbral_n_mas_1 = umbral_n_mas_1
+        self.estricto = estricto
+        self.registrar_todas = registrar_todas
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rechazada = False
+
+        async def enviar(mensaje: Message):
+            nonlocal rechazada
+            if mensaje["type"] == "http.response.start":
+                problemas = verificar_presupuesto(contador, self.presupuesto, self.umbral_n_mas_1)
+                ruta = f"{scope['method']} {plantilla_ruta(scope)}"
+                tiempo_ms = contador.tiempo_seg * 1000
+
+                if problemas:
+                    print(f"🐢 {ruta}: " + "; ".join(problemas))
+                elif self.registrar_todas:
+                    print(f"🗃️  {ruta}: {contador.consultas} consultas, {tiempo_ms:.1f} ms en DB")
+
+                if problemas and self.estricto:
+                    rechazada = True
+                    cuerpo = json.dumps({
+                        "detail": "Presupuesto de consultas excedido",
+                        "ruta": ruta,
+                        "consultas": contador.consultas,
+                        "problemas": problemas
+                    }).encode()
+                    await send({
+                        "type": "http.response.start",
+                        "status": 500,
+                        "headers": [
+                            (b"content-type", b"application/json"),
+                            (b"content-length", str(len(cuerpo)).encode())
+                        ]
+                    })
+                    await send({"type": "http.response.body", "body": cuerpo})
+                    return
+
+                headers = MutableHeaders(raw=mensaje["headers"])
+                headers["X-DB-Consultas"] = str(contador.consultas)
+                headers["X-DB-Tiempo-Ms"] = f"{tiempo_ms:.1f}"
+                if problemas:
+                    headers["X-DB-Alerta"] = str(len(problemas))
+            elif rechazada:
+                return
+            await send(mensaje)
+
+        with contar_consultas() as contador, en_contexto(scope):
+            await self.app(scope, receive, enviar)
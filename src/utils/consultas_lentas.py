@@ -0,0 +1,199 @@
+"""
+Registro de consultas lentas con EXPLAIN automático
+
+Cada sentencia que tarda CONSULTAS_LENTAS_UMBRAL_MS o más se guarda en un
+buffer circular en memoria (las últimas CONSULTAS_LENTAS_MAX) junto con su
+contexto (ruta de la petición, tick o job) y los parámetros redactados: solo
+se conserva el tipo y el largo de cada valor, y los literales de texto del
+SQL se reemplazan por '?'.
+
+La primera vez que una forma de sentencia (parámetros e IN colapsados) es
+lenta se ejecuta su EXPLAIN con los valores reales. En MySQL corre en un
+hilo aparte y con otra conexión del mismo engine, para no alargar la
+petición ni interferir con un cursor en curso. En SQLite, EXPLAIN QUERY PLAN
+no ejecuta la consulta y se hace en el momento con otro cursor de la misma
+conexión (con ":memory:" hay una sola conexión compartida y devolverla al
+pool haría rollback de la transacción en curso). El plan queda asociado a
+la forma y se muestra con cada entrada en /admin/consultas-lentas.
+"""
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from typing import Deque, Dict, List, Optional
+import hashlib
+import re
+import threading
+import time
+
+from src.utils.consultas import forma_sentencia
+from src.utils.contexto import contexto_actual
+
+
+MAX_LARGO_SENTENCIA = 2000
+MAX_FORMAS = 500
+
+_LITERAL_TEXTO = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_EXPLICABLE = re.compile(r"\s*(SELECT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+
+def redactar_sentencia(sentencia: str) -> str:
+    """SQL sin literales de texto, en una línea y acotado"""
+    return _LITERAL_TEXTO.sub("'?'", " ".join(sentencia.split()))[:MAX_LARGO_SENTENCIA]
+
+
+def redactar_parametros(parametros) -> object:
+    """Tipo (y largo, para textos y bytes) de cada parámetro, sin los valores"""
+    if isinstance(parametros, dict):
+        return {clave: redactar_parametros(valor) for clave, valor in parametros.items()}
+    if isinstance(parametros, (list, tuple)):
+        return [redactar_parametros(valor) for valor in parametros]
+    if parametros is None:
+        return None
+    nombre = type(parametros).__name__
+    if isinstance(parametros, (str, bytes)):
+        return f"{nombre}({len(parametros)})"
+    return nombre
+
+
+class RegistroConsultasLentas:
+    """Buffer circular de consultas lentas y planes por forma de sentencia"""
+
+    def __init__(self, umbral_ms: float, maximo: int = 200, explain: bool = True):
+        self.umbral_seg = umbral_ms / 1000
+        self.explain = explain
+        self.entradas: Deque[Dict] = deque(maxlen=maximo)
+        # forma -> {id, veces, total_ms, max_ms, plan}; LRU acotado
+        self.formas: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._explicador = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+
+    # --- Listeners de SQLAlchemy ---
+
+    def _antes(self, conn, cursor, statement, parameters, context, executemany):
+        context._lenta_inicio = time.perf_counter()
+
+    def _despues(self, conn, cursor, statement, parameters, context, executemany):
+        inicio = getattr(context, "_lenta_inicio", None)
+        if inicio is None:
+            return
+        duracion = time.perf_counter() - inicio
+        if duracion >= self.umbral_seg:
+            self.registrar(conn, statement, parameters, duracion, executemany)
+
+    def instalar(self):
+        """Mide todas las sentencias de todos los engines"""
+        event.listen(Engine, "before_cursor_execute", self._antes)
+        event.listen(Engine, "after_cursor_execute", self._despues)
+
+    def desinstalar(self):
+        event.remove(Engine, "before_cursor_execute", self._antes)
+        event.remove(Engine, "after_cursor_execute", self._despues)
+        self._explicador.shutdown(wait=False)
+
+    # --- Registro ---
+
+    def registrar(self, conn: Connection, sentencia: str, parametros, duracion_seg: float, executemany: bool):
+        forma = forma_sentencia(sentencia)
+        duracion_ms = round(duracion_seg * 1000, 2)
+        explicar = False
+
+        with self._lock:
+            datos = self.formas.get(forma)
+            if datos is None:
+                datos = {
+                    "id": hashlib.sha1(forma.encode()).hexdigest()[:12],
+                    "sentencia": redactar_sentencia(forma),
+                    "veces": 0, "total_ms": 0.0, "max_ms": 0.0, "plan": None
+                }
+                self.formas[forma] = datos
+                if len(self.formas) > MAX_FORMAS:
+                    self.formas.popitem(last=False)
+                explicar = self.explain and bool(_EXPLICABLE.match(sentencia))
+            else:
+                self.formas.move_to_end(forma)
+            datos["veces"] += 1
+            datos["total_ms"] = round(datos["total_ms"] + duracion_ms, 2)
+            datos["max_ms"] = max(datos["max_ms"], duracion_ms)
+
+            self.entradas.append({
+                "momento": datetime.now().isoformat(timespec="milliseconds"),
+                "duracion_ms": duracion_ms,
+                "contexto": contexto_actual(),
+                "forma_id": datos["id"],
+                "sentencia": redactar_sentencia(sentencia),
+                "parametros": redactar_parametros(parametros[0] if executemany and parametros else parametros)
+            })
+
+        print(f"🐌 Consulta lenta ({duracion_ms} ms) en {contexto_actual()}: {datos['sentencia'][:120]}")
+        if explicar:
+            valores = parametros[0] if executemany and parametros else parametros
+            if conn.dialect.name == "sqlite":
+                datos["plan"] = self._explicar(
+                    conn.connection.dbapi_connection, "EXPLAIN QUERY PLAN", sentencia, valores
+                )
+            else:
+                self._explicador.submit(self._explicar_aparte, conn.engine, sentencia, valores, datos)
+
+    @staticmethod
+    def _explicar(dbapi_conexion, prefijo: str, sentencia: str, parametros):
+        """Plan como lista de filas (dict por columna) o {"error": ...}"""
+        cursor = dbapi_conexion.cursor()
+        try:
+            cursor.execute(f"{prefijo} {sentencia}", parametros or ())
+            columnas = [columna[0] for columna in cursor.description]
+            return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+        except Exception as e:
+            return {"error": str(e)[:300]}
+        finally:
+            cursor.close()
+
+    @classmethod
+    def _explicar_aparte(cls, engine: Engine, sentencia: str, parametros, datos: Dict):
+        """EXPLAIN con una conexión propia (hilo del explicador)"""
+        try:
+            with engine.connect() as conexion:
+                datos["plan"] = cls._explicar(conexion.connection.dbapi_connection, "EXPLAIN", sentencia, parametros)
+        except Exception as e:
+            datos["plan"] = {"error": str(e)[:300]}
+
+    def esperar_explains(self):
+        """Espera los EXPLAIN encolados hasta ahora (pruebas)"""
+        # Un solo hilo atiende la cola en orden: al terminar esta tarea vacía terminaron las anteriores
+        self._explicador.submit(lambda: None).result()
+
+    # --- Lectura ---
+
+    def listar(self, limite: int = 50, contexto: Optional[str] = None) -> List[Dict]:
+        """Entradas más recientes primero, con el plan de su forma"""
+        with self._lock:
+            entradas = list(self.entradas)
+            planes = {datos["id"]: datos["plan"] for datos in self.formas.values()}
+        if contexto:
+            entradas = [e for e in entradas if e["contexto"] == contexto]
+        return [{**e, "plan": planes.get(e["forma_id"])} for e in reversed(entradas)][:limite]
+
+    def resumen_formas(self) -> List[Dict]:
+        """Formas lentas ordenadas por tiempo total"""
+        with self._lock:
+            formas = [dict(datos) for datos in self.formas.values()]
+        return sorted(formas, key=lambda datos: datos["total_ms"], reverse=True)
+
+    def limpiar(self):
+        with self._lock:
+            self.entradas.clear()
+            self.formas.clear()
+
+
+# Instancia de la aplicación (None si CONSULTAS_LENTAS_UMBRAL_MS = 0)
+registro_lentas: Optional[RegistroConsultasLentas] = None
+
+
+def instalar_registro_lentas(umbral_ms: float, maximo: int, explain: bool) -> Optional[RegistroConsultasLentas]:
+    """Crea e instala el registro de la aplicación (umbral 0 = deshabilitado, sin costo)"""
+    global registro_lentas
+    if umbral_ms > 0 and registro_lentas is None:
+        registro_lentas = RegistroConsultasLentas(umbral_ms, maximo, explain)
+        registro_lentas.instalar()
+    return registro_lentas
@@ -0,0 +1,42 @@
+"""
+Contexto de ejecución actual: la petición HTTP o el job del scheduler
+
+Permite atribuir lo que pasa en capas internas (consultas SQL lentas, por
+ejemplo) a quien lo originó sin pasar parámetros. Para una petición se
+guarda el scope ASGI y la ruta se resuelve solo cuando se necesita (al
+entrar al middleware el router todavía no eligió la ruta).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Union
+
+from src.utils.rutas import plantilla_ruta
+
+
+SIN_CONTEXTO = "sin_contexto"
+
+_contexto: ContextVar[Optional[Union[str, dict]]] = ContextVar("contexto_ejecucion", default=None)
+
+
+@contextmanager
+def en_contexto(contexto: Union[str, dict]) -> Iterator[None]:
+    """
+    Marca el contexto del bloque: un nombre ("tick", "job:archivado") o el scope de la petición
+
+    También sirve como decorador: @en_contexto("tick")
+    """
+    token = _contexto.set(contexto)
+    try:
+        yield
+    finally:
+        _contexto.reset(token)
+
+
+def contexto_actual() -> str:
+    """'GET /ordenes/{orden_id}', 'tick', ... o SIN_CONTEXTO"""
+    contexto = _contexto.get()
+    if contexto is None:
+        return SIN_CONTEXTO
+    if isinstance(contexto, str):
+        return contexto
+    return f"{contexto.get('method', '')} {plantilla_ruta(contexto)}".strip()
@@ -0,0 +1,129 @@
+"""
+Sketch de cuantiles con error relativo acotado (estilo DDSketch)
+
+Cada valor positivo cae en el bucket i = ceil(log_gamma(x)), con
+gamma = (1 + alpha) / (1 - alpha); el cuantil estimado está a menos de
+alpha (relativo) del real. Dos sketches con el mismo alpha se combinan
+sumando buckets, así que pueden mantenerse por proceso y fusionarse al
+persistir. El tamaño depende del rango de valores, no de cuántos haya:
+segundos entre 1 y un año caben en ~900 buckets con alpha=0.01.
+"""
+from typing import Dict, Optional
+import math
+
+
+class DDSketch:
+    """Sketch mergeable de cuantiles para valores >= 0"""
+
+    def __init__(self, alpha: float = 0.01, max_buckets: int = 2048):
+        self.alpha = alpha
+        self.max_buckets = max_buckets
+        self._gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: Dict[int, int] = {}
+        self.ceros = 0
+        self.total = 0
+        self.suma = 0.0
+        self.minimo: Optional[float] = None
+        self.maximo: Optional[float] = None
+
+    def agregar(self, valor: float, veces: int = 1):
+        """Registra un valor (los negativos se tratan como 0)"""
+        if valor <= 0:
+            valor = 0
+            self.ceros += veces
+        else:
+            indice = math.ceil(math.log(valor) / self._log_gamma)
+            self.buckets[indice] = self.buckets.get(indice, 0) + veces
+            if len(self.buckets) > self.max_buckets:
+                self._colapsar()
+
+        self.total += veces
+        self.suma += valor * veces
+        self.minimo = valor if self.minimo is None else min(self.minimo, valor)
+        self.maximo = valor if self.maximo is None else max(self.maximo, valor)
+
+    def combinar(self, otro: "DDSketch"):
+        """Suma otro sketch (mismo alpha) sobre este"""
+        if otro.alpha != self.alpha:
+            raise ValueError("Solo se pueden combinar sketches con el mismo alpha")
+        for indice, cantidad in otro.buckets.items():
+            self.buckets[indice] = self.buckets.get(indice, 0) + cantidad
+        if len(self.buckets) > self.max_buckets:
+            self._colapsar()
+
+        self.ceros += otro.ceros
+        self.total += otro.total
+        self.suma += otro.suma
+        for valor in (otro.minimo, otro.maximo):
+            if valor is not None:
+                self.minimo = valor if self.minimo is None else min(self.minimo, valor)
+                self.maximo = valor if self.maximo is None else max(self.maximo, valor)
+
+    def con_alpha(self, alpha: float) -> "DDSketch":
+        """
+        Copia re-agrupada con otro alpha (p. ej. tras cambiar la configuración)
+
+        Cada bucket se reubica por su valor representativo: el error relativo de
+        la copia queda acotado por la suma de ambos alpha.
+        """
+        copia = DDSketch(alpha=alpha, max_buckets=self.max_buckets)
+        for indice, cantidad in self.buckets.items():
+            copia.agregar(2 * self._gamma ** indice / (self._gamma + 1), cantidad)
+        copia.ceros = self.ceros
+        copia.total = self.total
+        copia.suma = self.suma
+        copia.minimo = self.minimo
+        copia.maximo = self.maximo
+        return copia
+
+    def cuantil(self, q: float) -> Optional[float]:
+        """Valor estimado del cuantil q (0..1); None si el sketch está vacío"""
+        if self.total == 0:
+            return None
+        if q <= 0:
+            return self.minimo
+        if q >= 1:
+            return self.maximo
+
+        rango = q * (self.total - 1)
+        acumulado = self.ceros
+        if rango < acumulado:
+            return 0.0
+
+        for indice in sorted(self.buckets):
+            acumulado += self.buckets[indice]
+            if rango < acumulado:
+                valor = 2 * self._gamma ** indice / (self._gamma + 1)
+                return min(max(valor, self.minimo), self.maximo)
+        return self.maximo
+
+    def _colapsar(self):
+        """Une los buckets más bajos para respetar max_buckets (pierde precisión solo abajo)"""
+        indices = sorted(self.buckets)
+        exceso = len(indices) - self.max_buckets + 1
+        destino = indices[exceso]
+        for indice in indices[:exceso]:
+            self.buckets[destino] += self.buckets.pop(indice)
+
+    def a_dict(self) -> dict:
+        return {
+            "alpha": self.alpha,
+            "buckets": {str(i): c for i, c in self.buckets.items()},
+            "ceros": self.ceros,
+            "total": self.total,
+            "suma": self.suma,
+            "minimo": self.minimo,
+            "maximo": self.maximo
+        }
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> "DDSketch":
+        sketch = cls(alpha=datos["alpha"])
+        sketch.buckets = {int(i): c for i, c in datos["buckets"].items()}
+        sketch.ceros = datos["ceros"]
+        sketch.total = datos["total"]
+        sketch.suma = datos["suma"]
+        sketch.minimo = datos["minimo"]
+        sketch.maximo = datos["maximo"]
+        return sketch
@@ -0,0 +1,67 @@
+"""
+Archivos estáticos con variantes precomprimidas y cache inmutable
+
+Sirve `<archivo>.br` o `<archivo>.gz` si existen junto al original y el
+cliente los acepta (los genera scripts/precomprimir_estaticos.py). Los
+nombres con hash de contenido (ordenes.3fa2b1c9d0.js) se marcan como
+inmutables por un año; el resto (HTML) se revalida en cada carga.
+"""
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Scope
+from typing import Optional
+import mimetypes
+import re
+import stat
+
+import anyio
+
+from src.utils.compresion import codificaciones_aceptadas
+
+# nombre.<10 hex>.ext
+PATRON_HASH = re.compile(r"\.[0-9a-f]{10}\.[a-z0-9]+$")
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+
+# En orden de preferencia
+VARIANTES = (("br", ".br"), ("gzip", ".gz"))
+
+
+class EstaticosPrecomprimidos(StaticFiles):
+    """StaticFiles que negocia variantes .br/.gz y agrega Cache-Control"""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        respuesta = await self._variante_comprimida(path, scope)
+        if respuesta is None:
+            respuesta = await super().get_response(path, scope)
+
+        if respuesta.status_code in (200, 304):
+            respuesta.headers["Cache-Control"] = (
+                CACHE_INMUTABLE if PATRON_HASH.search(path) else CACHE_REVALIDAR
+            )
+        return respuesta
+
+    async def _variante_comprimida(self, path: str, scope: Scope) -> Optional[Response]:
+        if scope["method"] not in ("GET", "HEAD"):
+            return None
+
+        aceptadas = codificaciones_aceptadas(Headers(scope=scope).get("accept-encoding", ""))
+        for codificacion, extension in VARIANTES:
+            if codificacion not in aceptadas:
+                continue
+            ruta, resultado = await anyio.to_thread.run_sync(self.lookup_path, path + extension)
+            if not (resultado and stat.S_ISREG(resultado.st_mode)):
+                continue
+
+            respuesta = self.file_response(ruta, resultado, scope)
+            if respuesta.status_code == 200:
+                tipo = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                if tipo.startswith("text/") or tipo == "application/javascript":
+                    tipo += "; charset=utf-8"
+                respuesta.headers["Content-Type"] = tipo
+            respuesta.headers["Content-Encoding"] = codificacion
+            respuesta.headers["Vary"] = "Accept-Encoding"
+            return respuesta
+        return None
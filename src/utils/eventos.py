@@ -0,0 +1,70 @@
+"""
+Bus de eventos en proceso para el feed de cambios (Server-Sent Events)
+
+Los servicios y el temporizador publican desde cualquier hilo; cada cliente SSE
+tiene una cola asyncio en el event loop del servidor. Publicar no consulta la
+base de datos ni bloquea: si un cliente lento llena su cola se descarta su
+mensaje más antiguo.
+"""
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Dict
+import asyncio
+import threading
+
+
+class BusEventos:
+    """Difusión de eventos a los suscriptores conectados"""
+
+    def __init__(self, max_pendientes: int = 100):
+        self._lock = threading.Lock()
+        self._suscriptores = set()
+        self._max_pendientes = max_pendientes
+
+    @property
+    def tiene_suscriptores(self) -> bool:
+        return bool(self._suscriptores)
+
+    def publicar(self, tipo: str, datos: Dict[str, Any]):
+        """Envía un evento a todos los suscriptores (seguro desde cualquier hilo)"""
+        if not self._suscriptores:
+            return
+
+        mensaje = {
+            "tipo": tipo,
+            "datos": datos,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+
+        for loop, cola in suscriptores:
+            try:
+                loop.call_soon_threadsafe(self._encolar, cola, mensaje)
+            except RuntimeError:
+                pass  # Event loop cerrado: la suscripción se elimina al salir
+
+    @staticmethod
+    def _encolar(cola: asyncio.Queue, mensaje: dict):
+        if cola.full():
+            cola.get_nowait()
+        cola.put_nowait(mensaje)
+
+    @asynccontextmanager
+    async def suscripcion(self):
+        """Registra una cola para el cliente actual mientras dure el contexto"""
+        cola = asyncio.Queue(maxsize=self._max_pendientes)
+        entrada = (asyncio.get_running_loop(), cola)
+
+        with self._lock:
+            self._suscriptores.add(entrada)
+        try:
+            yield cola
+        finally:
+            with self._lock:
+                self._suscriptores.discard(entrada)
+
+
+# Instancia global del bus
+bus_eventos = BusEventos()
@@ -0,0 +1,74 @@
+"""
+Formatos de exportación en streaming (NDJSON y CSV)
+
+Reciben un iterador de dicts y producen bloques de bytes de `lote`
+registros, para que StreamingResponse no haga una escritura por fila.
+"""
+from datetime import date, datetime
+from typing import Iterable, Iterator, List
+import csv
+import io
+
+from src.utils.serializacion import a_json
+
+
+def bloques_ndjson(registros: Iterable[dict], lote: int = 500) -> Iterator[bytes]:
+    """Un objeto JSON por línea"""
+    bloque = []
+    for registro in registros:
+        bloque.append(a_json(registro))
+        if len(bloque) >= lote:
+            yield b"\n".join(bloque) + b"\n"
+            bloque = []
+    if bloque:
+        yield b"\n".join(bloque) + b"\n"
+
+
+def _celda(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def bloques_csv(
+    registros: Iterable[dict],
+    columnas: List[str],
+    anidados: str = None,
+    columnas_anidadas: List[str] = (),
+    prefijo: str = "",
+    lote: int = 500
+) -> Iterator[bytes]:
+    """
+    CSV con encabezado; si `anidados` se indica, una fila por elemento de
+    esa lista (columnas con `prefijo`) repitiendo las del registro padre.
+    Un registro sin elementos anidados genera una fila con esas celdas vacías.
+    """
+    encabezado = list(columnas)
+    if anidados:
+        encabezado += [prefijo + c for c in columnas_anidadas]
+
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(encabezado)
+
+    filas = 0
+    for registro in registros:
+        base = [_celda(registro.get(c)) for c in columnas]
+        if not anidados:
+            escritor.writerow(base)
+            filas += 1
+        else:
+            for elemento in registro.get(anidados) or [{}]:
+                escritor.writerow(base + [_celda(elemento.get(c)) for c in columnas_anidadas])
+                filas += 1
+
+        if filas >= lote:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            filas = 0
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
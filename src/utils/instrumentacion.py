@@ -0,0 +1,195 @@
+"""
+Métricas de la aplicación (expuestas en GET /metrics)
+
+Todo se agrega en memoria al momento de ocurrir (histogramas de buckets
+fijos, contadores con un lock por métrica); el scrape solo recorre esos
+valores, así que Prometheus puede consultar cada pocos segundos sin tocar
+la base de datos ni el camino caliente:
+
+- Peticiones: latencia por ruta (plantilla, no path), en curso y totales
+  por código de estado (MetricasMiddleware)
+- Pool de conexiones: en uso/libres/overflow y checkouts (colector)
+- Temporizador: duración y retraso de cada tick, áreas, timeouts y órdenes
+  recalculadas (registrar_tick, desde el job del scheduler)
+- Historial: eventos escritos (evento after_insert del ORM; la importación
+  masiva inserta con Core y suma su lote directamente)
+- Caches: aciertos, fallos y tasa de aciertos (colector)
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Mapper, Session, object_session
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, Iterable, Optional
+import time
+
+from src.utils.cache import estadisticas_caches
+from src.utils.metricas import BUCKETS_LATENCIA, FamiliaColectada, RegistroMetricas
+from src.utils.pool import PoolMedido
+from src.utils.rutas import plantilla_ruta
+
+
+registro = RegistroMetricas()
+
+# Peticiones HTTP
+peticion_duracion = registro.histograma(
+    "http_peticion_duracion_segundos", "Latencia de las peticiones por ruta", ("metodo", "ruta")
+)
+peticiones_total = registro.contador(
+    "http_peticiones_total", "Peticiones atendidas por ruta y código", ("metodo", "ruta", "codigo")
+)
+peticiones_en_curso = registro.medidor("http_peticiones_en_curso", "Peticiones en curso")
+
+# Temporizador (buckets hasta 60 s: un tick lento puede acercarse a N_SEG)
+BUCKETS_TICK = (*BUCKETS_LATENCIA, 30.0, 60.0)
+tick_duracion = registro.histograma(
+    "temporizador_tick_duracion_segundos", "Duración de cada tick", limites=BUCKETS_TICK
+)
+tick_retraso = registro.medidor(
+    "temporizador_tick_retraso_segundos", "Retraso del último tick respecto de su hora programada"
+)
+ticks_total = registro.contador("temporizador_ticks_total", "Ticks ejecutados")
+tick_errores = registro.contador("temporizador_tick_errores_total", "Ticks con error (revertidos)")
+tick_areas = registro.contador(
+    "temporizador_areas_actualizadas_total", "Áreas activas incrementadas por los ticks"
+)
+tick_timeouts = registro.contador("temporizador_timeouts_total", "Timeouts SLA aplicados")
+tick_ordenes = registro.contador(
+    "temporizador_ordenes_recalculadas_total", "Órdenes con estado global recalculado por los ticks"
+)
+tick_ultimo = registro.medidor(
+    "temporizador_ultimo_tick_timestamp_segundos", "Hora (epoch) del último tick terminado"
+)
+
+# Historial
+historial_escritos = registro.contador("historial_eventos_escritos_total", "Eventos de historial confirmados")
+
+
+class MetricasMiddleware:
+    """Latencia, peticiones en curso y totales por ruta"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        codigo = 500
+        stream = False
+
+        async def enviar(mensaje: Message):
+            nonlocal codigo, stream
+            if mensaje["type"] == "http.response.start":
+                codigo = mensaje["status"]
+                stream = any(
+                    clave == b"content-type" and valor.startswith(b"text/event-stream")
+                    for clave, valor in mensaje.get("headers", [])
+                )
+            await send(mensaje)
+
+        peticiones_en_curso.sumar(1)
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            peticiones_en_curso.sumar(-1)
+            ruta = plantilla_ruta(scope)
+            peticiones_total.hijo(scope["method"], ruta, str(codigo)).incrementar()
+            # Los feeds SSE duran lo que dure la conexión: no son latencia
+            if not stream:
+                peticion_duracion.hijo(scope["method"], ruta).observar(time.perf_counter() - inicio)
+
+
+def registrar_tick(resultado: Dict, duracion_seg: float):
+    """Registra un tick del temporizador (resultado de TemporizadorService.ejecutar_tick)"""
+    ticks_total.incrementar()
+    tick_duracion.observar(duracion_seg)
+    tick_ultimo.fijar(time.time())
+    if resultado["errores"]:
+        tick_errores.incrementar()
+        return
+    tick_areas.incrementar(resultado["areas_actualizadas"])
+    tick_timeouts.incrementar(resultado["timeouts_aplicados"])
+    tick_ordenes.incrementar(len(resultado["ordenes_recalculadas"]))
+
+
+_CLAVE_HISTORIAL = "historial_por_confirmar"
+
+
+def _contar_historial(mapper, conexion, objetivo):
+    # after_insert corre en el flush: se acumula en la sesión hasta el commit
+    if mapper.local_table.name == "historial":
+        sesion = object_session(objetivo)
+        if sesion is not None:
+            sesion.info[_CLAVE_HISTORIAL] = sesion.info.get(_CLAVE_HISTORIAL, 0) + 1
+
+
+def _confirmar_historial(session: Session):
+    escritos = session.info.pop(_CLAVE_HISTORIAL, 0)
+    if escritos:
+        historial_escritos.incrementar(escritos)
+
+
+def _descartar_historial(session: Session, transaccion_anterior):
+    if not transaccion_anterior.nested:
+        session.info.pop(_CLAVE_HISTORIAL, None)
+
+
+def instalar_metricas_orm():
+    """Cuenta los eventos de historial que el ORM inserta y confirma (idempotente)"""
+    for destino, nombre, funcion in (
+        (Mapper, "after_insert", _contar_historial),
+        (Session, "after_commit", _confirmar_historial),
+        (Session, "after_soft_rollback", _descartar_historial),
+    ):
+        if not event.contains(destino, nombre, funcion):
+            event.listen(destino, nombre, funcion)
+
+
+def colector_pools(engines: Dict[str, Optional[Engine]]):
+    """Colector de los pools de conexiones de los engines indicados"""
+
+    def colectar() -> Iterable[FamiliaColectada]:
+        conexiones, tamano, checkouts, esperas, timeouts, creadas, latencias = [], [], [], [], [], [], []
+        for nombre, engine in engines.items():
+            if engine is None:
+                continue
+            pool = engine.pool
+            if not isinstance(pool, PoolMedido):
+                continue
+            etiqueta = {"pool": nombre}
+            conexiones.append(({**etiqueta, "estado": "en_uso"}, pool.checkedout()))
+            conexiones.append(({**etiqueta, "estado": "libres"}, pool.checkedin()))
+            conexiones.append(({**etiqueta, "estado": "overflow"}, max(pool.overflow(), 0)))
+            tamano.append((etiqueta, pool.size() + max(pool._max_overflow, 0)))
+            estadisticas = pool.estadisticas
+            checkouts.append((etiqueta, estadisticas.checkouts))
+            esperas.append((etiqueta, estadisticas.esperas))
+            timeouts.append((etiqueta, estadisticas.timeouts))
+            creadas.append((etiqueta, estadisticas.conexiones_creadas))
+            latencias.append((etiqueta, estadisticas.latencia_checkout))
+
+        yield "db_pool_conexiones", "gauge", "Conexiones del pool por estado", conexiones
+        yield "db_pool_conexiones_max", "gauge", "pool_size + max_overflow", tamano
+        yield "db_pool_checkouts_total", "counter", "Conexiones entregadas por el pool", checkouts
+        yield "db_pool_esperas_total", "counter", "Checkouts que esperaron una conexión libre", esperas
+        yield "db_pool_timeouts_total", "counter", "Checkouts que agotaron DB_POOL_TIMEOUT_SEG", timeouts
+        yield "db_pool_conexiones_creadas_total", "counter", "Conexiones abiertas contra la base", creadas
+        yield "db_pool_checkout_segundos", "histogram", "Latencia del checkout de conexiones", latencias
+
+    return colectar
+
+
+@registro.colector
+def _colectar_caches() -> Iterable[FamiliaColectada]:
+    caches = list(estadisticas_caches.values())
+    yield "cache_aciertos_total", "counter", "Lecturas servidas desde cache", [
+        ({"cache": c.nombre}, c.aciertos) for c in caches
+    ]
+    yield "cache_fallos_total", "counter", "Lecturas que recalcularon el valor", [
+        ({"cache": c.nombre}, c.fallos) for c in caches
+    ]
+    yield "cache_tasa_aciertos", "gauge", "Aciertos / lecturas desde el inicio", [
+        ({"cache": c.nombre}, c.tasa_aciertos) for c in caches if c.tasa_aciertos is not None
+    ]
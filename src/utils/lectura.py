@@ -0,0 +1,39 @@
+"""
+Marca de escritura para read-your-writes con réplica de lectura
+
+Cada POST/PUT/PATCH/DELETE exitoso deja la cookie `ultima_escritura` con la
+hora de la escritura. get_read_db la consulta para enviar al primario las
+lecturas de ese cliente mientras la réplica puede no tener su cambio.
+"""
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import time
+
+from src.database import COOKIE_ESCRITURA
+
+
+METODOS_ESCRITURA = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class MarcaEscrituraMiddleware:
+    """Agrega la cookie de última escritura a las mutaciones exitosas"""
+
+    def __init__(self, app: ASGIApp, ventana_seg: int):
+        self.app = app
+        self.ventana_seg = ventana_seg
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in METODOS_ESCRITURA:
+            await self.app(scope, receive, send)
+            return
+
+        async def enviar(mensaje: Message):
+            if mensaje["type"] == "http.response.start" and mensaje["status"] < 400:
+                MutableHeaders(raw=mensaje["headers"]).append(
+                    "Set-Cookie",
+                    f"{COOKIE_ESCRITURA}={time.time():.3f}; Max-Age={self.ventana_seg}; "
+                    f"Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(mensaje)
+
+        await self.app(scope, receive, enviar)
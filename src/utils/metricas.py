@@ -0,0 +1,212 @@
+"""
+Primitivas de métricas en memoria
+
+Histogramas de buckets fijos: registrar un valor es una búsqueda binaria y
+un incremento bajo un lock, así que se pueden usar en el camino caliente
+(checkout de conexiones, peticiones) y leerse en cualquier momento.
+
+Contadores y medidores siguen la misma idea (un lock por métrica, sin
+contención global). RegistroMetricas agrupa las métricas con nombre, ayuda y
+etiquetas y las expone en el formato de texto de Prometheus; los valores que
+ya existen en otro lado (pools, caches) se leen al momento del scrape con
+colectores, sin costo en el camino caliente.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import math
+import threading
+
+
+# Límites superiores en segundos (1 ms .. 10 s)
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histograma:
+    """Histograma acumulativo de buckets fijos (estilo Prometheus)"""
+
+    def __init__(self, limites: Sequence[float] = BUCKETS_LATENCIA):
+        self.limites = tuple(limites)
+        self._conteos: List[int] = [0] * (len(self.limites) + 1)  # el último es +Inf
+        self._suma = 0.0
+        self._maximo = 0.0
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float):
+        indice = bisect_left(self.limites, valor)
+        with self._lock:
+            self._conteos[indice] += 1
+            self._suma += valor
+            if valor > self._maximo:
+                self._maximo = valor
+
+    def instantanea(self) -> Dict:
+        """Conteos acumulados por límite, total, suma y máximo"""
+        with self._lock:
+            conteos = list(self._conteos)
+            suma, maximo = self._suma, self._maximo
+
+        acumulados, total = [], 0
+        for conteo in conteos:
+            total += conteo
+            acumulados.append(total)
+        return {
+            "buckets": dict(zip([*self.limites, float("inf")], acumulados)),
+            "total": total,
+            "suma": suma,
+            "maximo": maximo
+        }
+
+    def cuantil(self, q: float) -> Optional[float]:
+        """Límite superior del bucket que contiene el cuantil q (None si está vacío)"""
+        datos = self.instantanea()
+        if not datos["total"]:
+            return None
+        objetivo = q * datos["total"]
+        for limite, acumulado in datos["buckets"].items():
+            if acumulado >= objetivo:
+                return min(limite, datos["maximo"])
+        return datos["maximo"]
+
+
+class Contador:
+    """Valor que solo crece (peticiones, filas, eventos)"""
+
+    def __init__(self):
+        self._valor = 0.0
+        self._lock = threading.Lock()
+
+    def incrementar(self, cantidad: float = 1):
+        with self._lock:
+            self._valor += cantidad
+
+    @property
+    def valor(self) -> float:
+        return self._valor
+
+
+class Medidor:
+    """Valor que sube y baja (peticiones en curso, último retraso)"""
+
+    def __init__(self):
+        self._valor = 0.0
+        self._lock = threading.Lock()
+
+    def fijar(self, valor: float):
+        self._valor = valor
+
+    def sumar(self, cantidad: float = 1):
+        with self._lock:
+            self._valor += cantidad
+
+    @property
+    def valor(self) -> float:
+        return self._valor
+
+
+Metrica = Union[Contador, Medidor, Histograma]
+
+
+class Familia:
+    """Métricas del mismo nombre, una por combinación de etiquetas"""
+
+    def __init__(self, etiquetas: Sequence[str], crear: Callable[[], Metrica]):
+        self.etiquetas = tuple(etiquetas)
+        self._crear = crear
+        self._hijos: Dict[Tuple[str, ...], Metrica] = {}
+        self._lock = threading.Lock()
+
+    def hijo(self, *valores: str) -> Metrica:
+        """Métrica de esas etiquetas (el lock solo se toma la primera vez)"""
+        metrica = self._hijos.get(valores)
+        if metrica is None:
+            with self._lock:
+                metrica = self._hijos.setdefault(valores, self._crear())
+        return metrica
+
+    def muestras(self) -> List[Tuple[Dict[str, str], Metrica]]:
+        return [
+            (dict(zip(self.etiquetas, valores)), metrica)
+            for valores, metrica in list(self._hijos.items())
+        ]
+
+
+# Muestras de un colector: (etiquetas, valor numérico o Histograma)
+Muestras = List[Tuple[Dict[str, str], Union[float, Histograma]]]
+# Familia producida por un colector: (nombre, tipo, ayuda, muestras)
+FamiliaColectada = Tuple[str, str, str, Muestras]
+
+
+def _numero(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(etiquetas: Dict[str, str]) -> str:
+    if not etiquetas:
+        return ""
+    return "{" + ",".join(f'{clave}="{_escapar(valor)}"' for clave, valor in etiquetas.items()) + "}"
+
+
+def _lineas_familia(nombre: str, tipo: str, ayuda: str, muestras: Muestras) -> Iterable[str]:
+    yield f"# HELP {nombre} {ayuda}"
+    yield f"# TYPE {nombre} {tipo}"
+    for etiquetas, valor in muestras:
+        if isinstance(valor, Histograma):
+            datos = valor.instantanea()
+            for limite, acumulado in datos["buckets"].items():
+                yield f"{nombre}_bucket{_etiquetas({**etiquetas, 'le': _numero(limite)})} {acumulado}"
+            yield f"{nombre}_sum{_etiquetas(etiquetas)} {_numero(datos['suma'])}"
+            yield f"{nombre}_count{_etiquetas(etiquetas)} {datos['total']}"
+        else:
+            yield f"{nombre}{_etiquetas(etiquetas)} {_numero(getattr(valor, 'valor', valor))}"
+
+
+class RegistroMetricas:
+    """Métricas con nombre y colectores, expuestos en formato de texto de Prometheus"""
+
+    def __init__(self):
+        self._familias: List[Tuple[str, str, str, Union[Metrica, Familia]]] = []
+        self._colectores: List[Callable[[], Iterable[FamiliaColectada]]] = []
+
+    def _registrar(self, nombre: str, tipo: str, ayuda: str, etiquetas: Sequence[str], crear):
+        metrica = Familia(etiquetas, crear) if etiquetas else crear()
+        self._familias.append((nombre, tipo, ayuda, metrica))
+        return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        return self._registrar(nombre, "counter", ayuda, etiquetas, Contador)
+
+    def medidor(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        return self._registrar(nombre, "gauge", ayuda, etiquetas, Medidor)
+
+    def histograma(
+        self,
+        nombre: str,
+        ayuda: str,
+        etiquetas: Sequence[str] = (),
+        limites: Sequence[float] = BUCKETS_LATENCIA
+    ):
+        return self._registrar(nombre, "histogram", ayuda, etiquetas, lambda: Histograma(limites))
+
+    def colector(self, funcion: Callable[[], Iterable[FamiliaColectada]]):
+        """Registra una función que produce familias al momento del scrape"""
+        self._colectores.append(funcion)
+        return funcion
+
+    def exponer(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus (versión 0.0.4)"""
+        lineas: List[str] = []
+        for nombre, tipo, ayuda, metrica in self._familias:
+            muestras = metrica.muestras() if isinstance(metrica, Familia) else [({}, metrica)]
+            lineas.extend(_lineas_familia(nombre, tipo, ayuda, muestras))
+        for colector in self._colectores:
+            for nombre, tipo, ayuda, muestras in colector():
+                lineas.extend(_lineas_familia(nombre, tipo, ayuda, muestras))
+        return "\n".join(lineas) + "\n"
@@ -0,0 +1,245 @@
+"""
+Perfilador por muestreo bajo demanda (rutas y ticks en producción)
+
+Una sesión de perfilado arranca un hilo que cada `intervalo` lee las pilas
+de todos los hilos con sys._current_frames() y se queda solo con las que
+pasan por el código objetivo: el endpoint de la ruta pedida o
+TemporizadorService.ejecutar_tick. Así las muestras quedan atribuidas al
+objetivo aunque haya otras peticiones en curso, sin instrumentar nada.
+
+Sin sesión activa el costo es una comparación por petición
+(PerfiladorMiddleware) y por tick; el hilo de muestreo solo existe mientras
+dura la sesión, que termina al completar N peticiones (o el siguiente tick)
+o al vencer su timeout.
+
+Resultado:
+    colapsado   Pilas colapsadas ("raiz;func;func N"), entrada de
+                flamegraph.pl, speedscope o inferno
+    resumen     Tabla estilo pstats por función: muestras propias y acumuladas
+"""
+from collections import Counter
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Receive, Scope, Send
+from types import CodeType, FrameType
+from typing import Dict, FrozenSet, Iterable, List, Optional
+import os
+import sys
+import threading
+import time
+
+from src.utils.rutas import plantilla_ruta
+
+
+# Raíz del proyecto: las rutas de archivo se muestran relativas a ella
+_RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Etiqueta por objeto de código (se calcula una vez)
+_etiquetas: Dict[CodeType, str] = {}
+
+
+def _etiqueta(codigo: CodeType) -> str:
+    etiqueta = _etiquetas.get(codigo)
+    if etiqueta is None:
+        archivo = codigo.co_filename
+        if archivo.startswith(_RAIZ):
+            archivo = os.path.relpath(archivo, _RAIZ)
+        elif "site-packages" in archivo:
+            archivo = archivo.split("site-packages" + os.sep, 1)[-1]
+        else:
+            archivo = os.path.basename(archivo)
+        nombre = getattr(codigo, "co_qualname", codigo.co_name)
+        # ";" separa marcos en el formato colapsado
+        etiqueta = f"{archivo}:{nombre}".replace(";", ",").replace(" ", "_")
+        _etiquetas[codigo] = etiqueta
+    return etiqueta
+
+
+def codigos_de_ruta(rutas: Iterable[BaseRoute], ruta: str, metodo: str) -> FrozenSet[CodeType]:
+    """Código de los endpoints declarados para la plantilla y el método"""
+    return frozenset(
+        r.endpoint.__code__ for r in rutas
+        if getattr(r, "path_format", getattr(r, "path", None)) == ruta
+        and metodo in (getattr(r, "methods", None) or ())
+        and hasattr(getattr(r, "endpoint", None), "__code__")
+    )
+
+
+class SesionPerfilado:
+    """Muestreo de las pilas que pasan por `objetivos` hasta completar `limite` ejecuciones"""
+
+    def __init__(
+        self,
+        tipo: str,
+        descripcion: str,
+        objetivos: FrozenSet[CodeType],
+        limite: int,
+        intervalo_seg: float,
+        timeout_seg: float,
+        ruta: Optional[str] = None,
+        metodo: Optional[str] = None
+    ):
+        self.tipo = tipo  # "ruta" | "tick"
+        self.descripcion = descripcion
+        self.objetivos = objetivos
+        self.limite = limite
+        self.intervalo_seg = intervalo_seg
+        self.ruta = ruta
+        self.metodo = metodo
+
+        self.muestras: Counter = Counter()
+        self.total_muestras = 0
+        self.completadas = 0
+        self.iniciada_en = time.time()
+        self.terminada_en: Optional[float] = None
+        self.motivo_fin: Optional[str] = None
+        self._vence = time.monotonic() + timeout_seg
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name="perfilador", daemon=True)
+
+    @property
+    def activa(self) -> bool:
+        return self.terminada_en is None
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self, motivo: str):
+        if self.activa:
+            self.motivo_fin = motivo
+            self.terminada_en = time.time()
+            self._detener.set()
+
+    def ejecucion_completada(self):
+        """Una petición a la ruta (o un tick) terminó"""
+        self.completadas += 1
+        if self.completadas >= self.limite:
+            self.detener("completada")
+
+    def _muestrear(self):
+        propio = threading.get_ident()
+        while not self._detener.wait(self.intervalo_seg):
+            if time.monotonic() >= self._vence:
+                self.detener("timeout")
+                break
+            for hilo_id, marco in sys._current_frames().items():
+                if hilo_id == propio:
+                    continue
+                pila = self._pila_objetivo(marco)
+                if pila is None:
+                    continue
+                self.muestras[f"{self.descripcion};{';'.join(pila)}"] += 1
+                self.total_muestras += 1
+
+    def _pila_objetivo(self, marco: Optional[FrameType]) -> Optional[List[str]]:
+        """Marcos desde el objetivo hasta la hoja, o None si la pila no pasa por él"""
+        codigos = []
+        while marco is not None:
+            codigos.append(marco.f_code)
+            if marco.f_code in self.objetivos:
+                return [_etiqueta(codigo) for codigo in reversed(codigos)]
+            marco = marco.f_back
+        return None
+
+    def colapsado(self) -> str:
+        """Pilas colapsadas, una por línea: 'marco;marco;... muestras'"""
+        # Copia: el hilo de muestreo puede seguir agregando pilas
+        muestras = Counter(dict(self.muestras))
+        return "".join(f"{pila} {conteo}\n" for pila, conteo in muestras.most_common())
+
+    def resumen(self, limite: int = 40) -> str:
+        """Funciones por muestras propias (hoja de la pila) y acumuladas (en cualquier nivel)"""
+        propias: Counter = Counter()
+        acumuladas: Counter = Counter()
+        for pila, conteo in dict(self.muestras).items():
+            marcos = pila.split(";")[1:]
+            propias[marcos[-1]] += conteo
+            for marco in set(marcos):
+                acumuladas[marco] += conteo
+
+        total = self.total_muestras or 1
+        lineas = [
+            f"{self.descripcion}: {self.total_muestras} muestras cada {self.intervalo_seg * 1000:g} ms, "
+            f"{self.completadas} ejecuciones",
+            "",
+            f"{'propias':>9} {'%':>6} {'acumuladas':>11} {'%':>6}  función"
+        ]
+        for marco, _ in acumuladas.most_common(limite):
+            lineas.append(
+                f"{propias[marco]:>9} {100 * propias[marco] / total:>5.1f}% "
+                f"{acumuladas[marco]:>11} {100 * acumuladas[marco] / total:>5.1f}%  {marco}"
+            )
+        return "\n".join(lineas) + "\n"
+
+    def estado(self) -> Dict:
+        return {
+            "tipo": self.tipo,
+            "objetivo": self.descripcion,
+            "activa": self.activa,
+            "ejecuciones": self.completadas,
+            "limite": self.limite,
+            "muestras": self.total_muestras,
+            "intervalo_ms": self.intervalo_seg * 1000,
+            "iniciada_en": self.iniciada_en,
+            "terminada_en": self.terminada_en,
+            "motivo_fin": self.motivo_fin
+        }
+
+
+class Perfilador:
+    """Una sesión a la vez (la actual o la última terminada, con su resultado)"""
+
+    def __init__(self):
+        self.sesion: Optional[SesionPerfilado] = None
+        self._lock = threading.Lock()
+
+    @property
+    def activa(self) -> Optional[SesionPerfilado]:
+        sesion = self.sesion
+        return sesion if sesion is not None and sesion.activa else None
+
+    def iniciar(self, sesion: SesionPerfilado) -> SesionPerfilado:
+        with self._lock:
+            if self.activa is not None:
+                raise RuntimeError("Ya hay una sesión de perfilado activa")
+            self.sesion = sesion
+            sesion.iniciar()
+        print(f"🔬 Perfilando {sesion.descripcion} ({sesion.limite} ejecuciones)")
+        return sesion
+
+    def cancelar(self):
+        sesion = self.activa
+        if sesion is not None:
+            sesion.detener("cancelada")
+
+    def peticion_terminada(self, scope: Scope):
+        """Llamado por el middleware; solo cuenta peticiones a la ruta perfilada"""
+        sesion = self.activa
+        if sesion is None or sesion.tipo != "ruta":
+            return
+        if scope["method"] == sesion.metodo and plantilla_ruta(scope) == sesion.ruta:
+            sesion.ejecucion_completada()
+
+    def tick_terminado(self):
+        """Llamado por el job del temporizador después de cada tick"""
+        sesion = self.activa
+        if sesion is not None and sesion.tipo == "tick":
+            sesion.ejecucion_completada()
+
+
+perfilador = Perfilador()
+
+
+class PerfiladorMiddleware:
+    """Cuenta las peticiones terminadas de la ruta perfilada (sin sesión: una comparación)"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or perfilador.activa is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            perfilador.peticion_terminada(scope)
@@ -0,0 +1,127 @@
+"""
+Pool de conexiones instrumentado
+
+QueuePool que mide cuánto tarda cada checkout (espera por una conexión libre
+más la apertura de una nueva si hace falta) y cuenta esperas, timeouts y
+conexiones creadas. Sirve para dimensionar DB_POOL_SIZE/DB_MAX_OVERFLOW
+frente a la concurrencia real: si `esperas` crece o la latencia de checkout
+sube, los hilos del servidor están haciendo cola por conexiones.
+"""
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+from typing import Dict
+import threading
+import time
+
+from src.utils.metricas import Histograma
+
+
+class EstadisticasPool:
+    """Contadores de un pool (uno por engine)"""
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.latencia_checkout = Histograma()
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.esperas = 0
+        self.timeouts = 0
+        self.conexiones_creadas = 0
+        self.espera_total_seg = 0.0
+
+    def registrar_checkout(self, segundos: float, espero: bool):
+        self.latencia_checkout.observar(segundos)
+        with self._lock:
+            self.checkouts += 1
+            if espero:
+                self.esperas += 1
+                self.espera_total_seg += segundos
+
+    def registrar_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def registrar_conexion(self):
+        with self._lock:
+            self.conexiones_creadas += 1
+
+
+# Estadísticas por nombre de engine ("principal", "lectura", ...)
+estadisticas_pools: Dict[str, EstadisticasPool] = {}
+
+
+class PoolMedido(QueuePool):
+    """QueuePool que registra la latencia de cada checkout"""
+
+    estadisticas: EstadisticasPool = None
+
+    def _do_get(self):
+        # Sin conexiones libres ni overflow disponible: el checkout va a esperar
+        espero = self._pool.empty() and 0 <= self._max_overflow <= self._overflow
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except exc.TimeoutError:
+            self.estadisticas.registrar_timeout()
+            raise
+        self.estadisticas.registrar_checkout(time.perf_counter() - inicio, espero)
+        return conexion
+
+    def _create_connection(self):
+        self.estadisticas.registrar_conexion()
+        return super()._create_connection()
+
+
+def pool_medido(nombre: str) -> type:
+    """
+    Clase de pool con sus propias estadísticas
+
+    Se crea una subclase por engine para que pool.recreate() (que instancia
+    self.__class__) conserve las mismas estadísticas.
+    """
+    estadisticas = estadisticas_pools.setdefault(nombre, EstadisticasPool(nombre))
+    return type(f"PoolMedido_{nombre}", (PoolMedido,), {"estadisticas": estadisticas})
+
+
+def estado_pool(engine) -> Dict:
+    """Estado actual y acumulados del pool de un engine"""
+    pool = engine.pool
+    resultado = {
+        "clase": type(pool).__name__,
+        "estado": pool.status()
+    }
+    if not isinstance(pool, PoolMedido):
+        return resultado
+
+    estadisticas = pool.estadisticas
+    latencia = estadisticas.latencia_checkout
+    resultado.update({
+        "configuracion": {
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout_seg": pool._timeout,
+            "recycle_seg": pool._recycle
+        },
+        "actual": {
+            "en_uso": pool.checkedout(),
+            "libres": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0)
+        },
+        "totales": {
+            "checkouts": estadisticas.checkouts,
+            "esperas": estadisticas.esperas,
+            "timeouts": estadisticas.timeouts,
+            "conexiones_creadas": estadisticas.conexiones_creadas,
+            "espera_total_seg": round(estadisticas.espera_total_seg, 4)
+        },
+        "latencia_checkout_seg": {
+            "p50": latencia.cuantil(0.5),
+            "p95": latencia.cuantil(0.95),
+            "p99": latencia.cuantil(0.99),
+            "histograma": {
+                ("+Inf" if limite == float("inf") else str(limite)): conteo
+                for limite, conteo in latencia.instantanea()["buckets"].items()
+            }
+        }
+    })
+    return resultado
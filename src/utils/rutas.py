@@ -0,0 +1,47 @@
+"""
+Ruta declarada que atendió una petición
+
+Las métricas y diagnósticos por ruta se agrupan por la plantilla
+(/ordenes/{orden_id}) y no por el path concreto, para que la cantidad de
+series no crezca con los ids.
+"""
+from starlette.routing import Mount
+from starlette.types import Scope
+from typing import Callable, Dict
+
+
+SIN_RUTA = "<sin_ruta>"
+
+# endpoint -> plantilla (la búsqueda en app.routes se hace una vez por endpoint)
+_plantillas: Dict[Callable, str] = {}
+
+
+def plantilla_ruta(scope: Scope) -> str:
+    """
+    Plantilla de la ruta de la petición (válida después de que el router la atendió)
+
+    Starlette deja el endpoint en el scope al hacer match; las peticiones sin
+    ruta (404) se agrupan en SIN_RUTA y los montajes (/static) por su prefijo.
+    """
+    app = scope.get("app")
+    endpoint = scope.get("endpoint")
+    rutas = getattr(app, "routes", ())
+
+    if endpoint is not None:
+        plantilla = _plantillas.get(endpoint)
+        if plantilla is None:
+            plantilla = next(
+                # path_format: sin convertidores ("/ordenes/{orden_id:int}" -> "/ordenes/{orden_id}")
+                (getattr(ruta, "path_format", ruta.path) for ruta in rutas
+                 if getattr(ruta, "endpoint", None) is endpoint),
+                SIN_RUTA
+            )
+            _plantillas[endpoint] = plantilla
+        if plantilla != SIN_RUTA:
+            return plantilla
+
+    path = scope.get("path", "")
+    for ruta in rutas:
+        if isinstance(ruta, Mount) and path.startswith(ruta.path + "/"):
+            return ruta.path
+    return SIN_RUTA
@@ -0,0 +1,45 @@
+"""
+Serialización JSON rápida para respuestas de servicios confiables
+
+Los endpoints de lectura masiva (listado y detalle de órdenes, dashboard)
+devuelven RespuestaJSON directamente: FastAPI no vuelve a validar la salida
+contra el response_model (que sigue documentando el esquema en /docs), y el
+cuerpo se codifica con orjson si está instalado, o con json como respaldo.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+import json
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # Dependencia opcional
+    orjson = None
+
+
+def _por_defecto(valor: Any):
+    """Tipos que no codifican orjson/json de forma nativa"""
+    if isinstance(valor, Decimal):
+        return int(valor) if valor == valor.to_integral_value() else float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def a_json(datos: Any) -> bytes:
+    """Codifica a JSON (UTF-8) con el mismo formato de fechas que Pydantic"""
+    if orjson is not None:
+        return orjson.dumps(datos, default=_por_defecto)
+    return json.dumps(
+        datos, default=_por_defecto, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class RespuestaJSON(Response):
+    """Respuesta JSON sin validación de response_model"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return a_json(content)
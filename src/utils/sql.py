@@ -0,0 +1,93 @@
+"""
+Utilidades para ejecutar los scripts .sql del repositorio desde Python
+
+- dividir_sentencias: separa un script en sentencias respetando comillas,
+  comentarios y bloques DELIMITER (triggers y procedimientos de MySQL).
+- mysql_a_sqlite: adapta las sentencias de los seeds (DATE_SUB/NOW, TRUE)
+  para cargarlas en el backend SQLite.
+"""
+from typing import Iterator, Optional
+import re
+
+
+def dividir_sentencias(texto: str) -> Iterator[str]:
+    """
+    Sentencias de un script SQL, sin el delimitador final
+
+    Reconoce `DELIMITER xx` como hace el cliente mysql: dentro del bloque las
+    sentencias terminan en `xx` y los `;` internos se conservan.
+    """
+    delimitador = ";"
+    actual = []
+    comilla: Optional[str] = None
+    i = 0
+    n = len(texto)
+
+    while i < n:
+        # Inicio de línea fuera de comillas: ¿directiva DELIMITER?
+        if comilla is None and (i == 0 or texto[i - 1] == "\n") and not "".join(actual).strip():
+            coincidencia = re.match(r"[ \t]*DELIMITER[ \t]+(\S+)[ \t]*(\r?\n|$)", texto[i:], re.IGNORECASE)
+            if coincidencia:
+                delimitador = coincidencia.group(1)
+                actual = []
+                i += coincidencia.end()
+                continue
+
+        caracter = texto[i]
+
+        if comilla:
+            actual.append(caracter)
+            if caracter == "\\" and comilla != "`" and i + 1 < n:
+                actual.append(texto[i + 1])
+                i += 2
+                continue
+            if caracter == comilla:
+                comilla = None
+            i += 1
+            continue
+
+        if caracter in ("'", '"', "`"):
+            comilla = caracter
+        elif texto.startswith("--", i) and (i + 2 >= n or texto[i + 2] in " \t\r\n"):
+            fin = texto.find("\n", i)
+            i = n if fin == -1 else fin
+            continue
+        elif texto.startswith("/*", i):
+            fin = texto.find("*/", i + 2)
+            i = n if fin == -1 else fin + 2
+            continue
+        elif texto.startswith(delimitador, i):
+            sentencia = "".join(actual).strip()
+            if sentencia:
+                yield sentencia
+            actual = []
+            i += len(delimitador)
+            continue
+
+        actual.append(caracter)
+        i += 1
+
+    sentencia = "".join(actual).strip()
+    if sentencia:
+        yield sentencia
+
+
+_DATE_SUB = re.compile(
+    r"DATE_SUB\(\s*NOW\(\)\s*,\s*INTERVAL\s+(\d+)\s+(SECOND|MINUTE|HOUR|DAY)\s*\)", re.IGNORECASE
+)
+
+
+def mysql_a_sqlite(sentencia: str) -> Optional[str]:
+    """
+    Adapta una sentencia de los seeds a SQLite; None si no aplica
+
+    Solo se conservan los INSERT (USE, SET, TRUNCATE y las consultas de
+    verificación son propias del cliente mysql).
+    """
+    if not re.match(r"\s*INSERT\b", sentencia, re.IGNORECASE):
+        return None
+    sentencia = _DATE_SUB.sub(
+        lambda m: f"datetime('now', '-{m.group(1)} {m.group(2).lower()}s')", sentencia
+    )
+    sentencia = re.sub(r"\bNOW\(\)", "datetime('now')", sentencia, flags=re.IGNORECASE)
+    return sentencia
@@ -0,0 +1,423 @@
+"""
+Trazas locales de peticiones y ticks (spans en formato OTLP JSON)
+
+Un span mide una operación con nombre, atributos y su span padre; todos los
+spans de una petición o de un tick forman una traza. Se instrumenta:
+
+- Cada petición HTTP (TrazasMiddleware): span SERVER con el nombre de la
+  ruta ("POST /ordenes/{orden_id}/asignaciones"), raíz de la traza. Respeta
+  el header W3C `traceparent` entrante y devuelve X-Trace-Id.
+- Cada llamada a OrdenService/EstadoService que recibe una sesión
+  (instrumentar_servicio).
+- Cada sentencia SQL ejecutada dentro de una traza (listeners de Engine):
+  span CLIENT con la sentencia redactada.
+- El tick y cada una de sus fases (span() en TemporizadorService).
+
+El span actual vive en un ContextVar, así que los endpoints síncronos (que
+FastAPI ejecuta en el threadpool copiando el contexto) y los run_sync de
+las rutas async quedan anidados bajo la petición.
+
+Al cerrar el span raíz la traza completa se exporta como un
+ExportTraceServiceRequest de OTLP/JSON: a un colector en memoria (últimas
+TRAZAS_MAX, en /admin/trazas) y, si TRAZAS_ARCHIVO está definido, como una
+línea de JSON en ese archivo (lo lee el receptor `otlpjsonfile` del
+OpenTelemetry Collector, Jaeger vía collector, etc.).
+
+Sin trazas habilitadas (instalar_trazas no se llama) span() solo hace una
+comparación y no hay listeners ni servicios envueltos.
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Union
+import functools
+import inspect
+import json
+import random
+import threading
+import time
+
+from src.utils.consultas_lentas import redactar_sentencia
+from src.utils.rutas import plantilla_ruta
+
+
+NOMBRE_SERVICIO = "enrutador-ordenes"
+MAX_SPANS_POR_TRAZA = 2000
+
+# SpanKind de OTLP
+INTERNO, SERVIDOR, CLIENTE = 1, 2, 3
+# Status.code de OTLP
+OK, ERROR = 1, 2
+
+
+class Traza:
+    """Spans de una misma traza, acumulados hasta que termina la raíz"""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.raiz: Optional["Span"] = None
+        self.spans: List["Span"] = []
+        self.descartados = 0
+
+    def agregar(self, span: "Span"):
+        if len(self.spans) < MAX_SPANS_POR_TRAZA:
+            self.spans.append(span)
+        else:
+            self.descartados += 1
+
+
+class Span:
+    __slots__ = (
+        "traza", "span_id", "padre_id", "nombre", "tipo", "inicio_ns", "fin_ns", "atributos", "estado", "error"
+    )
+
+    def __init__(self, traza: Traza, padre_id: Optional[str], nombre: str, tipo: int, atributos: Dict):
+        self.traza = traza
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.padre_id = padre_id
+        self.nombre = nombre
+        self.tipo = tipo
+        self.inicio_ns = time.time_ns()
+        self.fin_ns: Optional[int] = None
+        self.atributos = atributos
+        self.estado = OK
+        self.error: Optional[str] = None
+
+    def terminar(self):
+        self.fin_ns = time.time_ns()
+        self.traza.agregar(self)
+
+    def marcar_error(self, error: BaseException):
+        self.estado = ERROR
+        self.error = f"{type(error).__name__}: {error}"[:500]
+
+    @property
+    def duracion_ms(self) -> float:
+        return ((self.fin_ns or time.time_ns()) - self.inicio_ns) / 1e6
+
+    def a_otlp(self) -> Dict:
+        span = {
+            "traceId": self.traza.trace_id,
+            "spanId": self.span_id,
+            "name": self.nombre,
+            "kind": self.tipo,
+            "startTimeUnixNano": str(self.inicio_ns),
+            "endTimeUnixNano": str(self.fin_ns),
+            "attributes": [_atributo_otlp(clave, valor) for clave, valor in self.atributos.items()],
+            "status": {"code": self.estado, **({"message": self.error} if self.error else {})}
+        }
+        if self.padre_id:
+            span["parentSpanId"] = self.padre_id
+        return span
+
+
+def _atributo_otlp(clave: str, valor) -> Dict:
+    if isinstance(valor, bool):
+        return {"key": clave, "value": {"boolValue": valor}}
+    if isinstance(valor, int):
+        return {"key": clave, "value": {"intValue": str(valor)}}
+    if isinstance(valor, float):
+        return {"key": clave, "value": {"doubleValue": valor}}
+    return {"key": clave, "value": {"stringValue": str(valor)}}
+
+
+def traza_a_otlp(traza: Traza) -> Dict:
+    """ExportTraceServiceRequest (OTLP/JSON) con todos los spans de la traza"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_atributo_otlp("service.name", NOMBRE_SERVICIO)]},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [span.a_otlp() for span in list(traza.spans)]
+            }]
+        }]
+    }
+
+
+class ColectorTrazas:
+    """Últimas trazas terminadas (memoria) y, opcionalmente, archivo OTLP JSON Lines"""
+
+    def __init__(self, maximo: int = 100, archivo: str = ""):
+        self.trazas: Deque[Traza] = deque(maxlen=maximo)
+        self.archivo = archivo
+        self._lock = threading.Lock()
+
+    def exportar(self, traza: Traza):
+        self.trazas.append(traza)
+        if self.archivo:
+            linea = json.dumps(traza_a_otlp(traza), separators=(",", ":"))
+            with self._lock, open(self.archivo, "a", encoding="utf-8") as archivo:
+                archivo.write(linea + "\n")
+
+    def buscar(self, trace_id: str) -> Optional[Traza]:
+        for traza in list(self.trazas):
+            if traza.trace_id == trace_id:
+                return traza
+        return None
+
+    def resumen(self, limite: int = 50) -> List[Dict]:
+        """Trazas más recientes primero: raíz, duración y cantidad de spans"""
+        resumenes = []
+        for traza in reversed(list(self.trazas)):
+            raiz = traza.raiz
+            resumenes.append({
+                "trace_id": traza.trace_id,
+                "raiz": raiz.nombre if raiz else None,
+                "duracion_ms": round(raiz.duracion_ms, 2) if raiz else None,
+                "error": any(s.estado == ERROR for s in traza.spans),
+                "spans": len(traza.spans),
+                "descartados": traza.descartados
+            })
+            if len(resumenes) >= limite:
+                break
+        return resumenes
+
+    def limpiar(self):
+        self.trazas.clear()
+
+
+# Colector de la aplicación (None = trazas deshabilitadas)
+colector: Optional[ColectorTrazas] = None
+muestreo = 1.0
+
+# Span actual; NO_MUESTREADA marca una traza descartada por el muestreo
+NO_MUESTREADA = object()
+_span_actual: ContextVar[Union[Span, object, None]] = ContextVar("span_actual", default=None)
+
+
+def span_actual() -> Optional[Span]:
+    actual = _span_actual.get()
+    return actual if isinstance(actual, Span) else None
+
+
+def _abrir(nombre: str, tipo: int, atributos: Dict, trace_id: Optional[str] = None, padre_id: Optional[str] = None):
+    """Nuevo span hijo del actual (o raíz de una traza nueva); None si no se traza"""
+    padre = _span_actual.get()
+    if padre is NO_MUESTREADA:
+        return None
+    if padre is not None:
+        return Span(padre.traza, padre.span_id, nombre, tipo, atributos)
+    if trace_id is None:
+        if random.random() >= muestreo:
+            return NO_MUESTREADA
+        trace_id = f"{random.getrandbits(128):032x}"
+    return Span(Traza(trace_id), padre_id, nombre, tipo, atributos)
+
+
+def _cerrar(span: Span, raiz: bool):
+    span.terminar()
+    if raiz:
+        span.traza.raiz = span
+        if colector is not None:
+            colector.exportar(span.traza)
+
+
+@contextmanager
+def span(nombre: str, tipo: int = INTERNO, **atributos) -> Iterator[Optional[Span]]:
+    """
+    Span alrededor del bloque (no hace nada si las trazas están deshabilitadas)
+
+    También sirve como decorador: @span("tick")
+    """
+    if colector is None:
+        yield None
+        return
+    raiz = _span_actual.get() is None
+    nuevo = _abrir(nombre, tipo, atributos)
+    if nuevo is None:
+        yield None
+        return
+    token = _span_actual.set(nuevo)
+    if nuevo is NO_MUESTREADA:
+        try:
+            yield None
+        finally:
+            _span_actual.reset(token)
+        return
+    try:
+        yield nuevo
+    except BaseException as e:
+        nuevo.marcar_error(e)
+        raise
+    finally:
+        _span_actual.reset(token)
+        _cerrar(nuevo, raiz)
+
+
+# --- Servicios ---
+
+_servicios_instrumentados: List[type] = []
+
+
+def instrumentar_servicio(clase: type, prefijo: Optional[str] = None):
+    """
+    Envuelve en un span los métodos estáticos que reciben una sesión (`db`)
+
+    Los helpers puros (estado_para, orden_a_dict, ...) quedan sin span para no
+    generar uno por elemento en los listados.
+    """
+    prefijo = prefijo or clase.__name__
+    for nombre, atributo in list(vars(clase).items()):
+        if not isinstance(atributo, staticmethod) or getattr(atributo.__func__, "_trazado", False):
+            continue
+        funcion = atributo.__func__
+        if inspect.isgeneratorfunction(funcion):
+            continue
+        parametros = list(inspect.signature(funcion).parameters)
+        if not parametros or parametros[0] != "db":
+            continue
+        setattr(clase, nombre, staticmethod(_envolver(funcion, f"{prefijo}.{nombre}")))
+    if clase not in _servicios_instrumentados:
+        _servicios_instrumentados.append(clase)
+
+
+def _envolver(funcion, nombre_span: str):
+    if inspect.iscoroutinefunction(funcion):
+        @functools.wraps(funcion)
+        async def envuelta_async(*args, **kwargs):
+            with span(nombre_span, **{"code.function": funcion.__qualname__}):
+                return await funcion(*args, **kwargs)
+        envuelta_async._trazado = True
+        return envuelta_async
+
+    @functools.wraps(funcion)
+    def envuelta(*args, **kwargs):
+        with span(nombre_span, **{"code.function": funcion.__qualname__}):
+            return funcion(*args, **kwargs)
+    envuelta._trazado = True
+    return envuelta
+
+
+# --- SQL ---
+
+def _sql_antes(conn, cursor, statement, parameters, context, executemany):
+    padre = _span_actual.get()
+    if not isinstance(padre, Span):
+        return
+    operacion = statement.split(None, 1)[0].upper() if statement.strip() else "SQL"
+    context._span_sql = Span(padre.traza, padre.span_id, f"SQL {operacion}", CLIENTE, {
+        "db.system": conn.dialect.name,
+        "db.operation": operacion,
+        "db.statement": redactar_sentencia(statement)[:1000]
+    })
+
+
+def _sql_despues(conn, cursor, statement, parameters, context, executemany):
+    span_sql = getattr(context, "_span_sql", None)
+    if span_sql is not None:
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            span_sql.atributos["db.filas"] = cursor.rowcount
+        span_sql.terminar()
+
+
+def _sql_error(contexto_excepcion):
+    contexto = contexto_excepcion.execution_context
+    span_sql = getattr(contexto, "_span_sql", None) if contexto is not None else None
+    if span_sql is not None:
+        span_sql.marcar_error(contexto_excepcion.original_exception)
+        span_sql.terminar()
+
+
+# --- Peticiones ---
+
+def _leer_traceparent(valor: str):
+    """(trace_id, span_id padre, muestreada) del header W3C traceparent, o None"""
+    partes = valor.strip().split("-")
+    if len(partes) != 4 or len(partes[1]) != 32 or len(partes[2]) != 16:
+        return None
+    try:
+        int(partes[1], 16), int(partes[2], 16), int(partes[3], 16)
+    except ValueError:
+        return None
+    return partes[1], partes[2], bool(int(partes[3], 16) & 1)
+
+
+class TrazasMiddleware:
+    """Span raíz por petición (nombre = método + plantilla de ruta) y header X-Trace-Id"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or colector is None:
+            await self.app(scope, receive, send)
+            return
+
+        remoto = None
+        for clave, valor in scope.get("headers", []):
+            if clave == b"traceparent":
+                remoto = _leer_traceparent(valor.decode("latin-1"))
+                break
+
+        atributos = {"http.method": scope["method"], "http.target": scope["path"]}
+        if remoto is not None and not remoto[2]:
+            nuevo = NO_MUESTREADA
+        elif remoto is not None:
+            nuevo = _abrir(scope["method"], SERVIDOR, atributos, trace_id=remoto[0], padre_id=remoto[1])
+        else:
+            nuevo = _abrir(scope["method"], SERVIDOR, atributos)
+
+        if not isinstance(nuevo, Span):
+            token = _span_actual.set(nuevo or NO_MUESTREADA)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _span_actual.reset(token)
+            return
+
+        async def enviar(mensaje: Message):
+            if mensaje["type"] == "http.response.start":
+                nuevo.atributos["http.status_code"] = mensaje["status"]
+                if mensaje["status"] >= 500:
+                    nuevo.estado = ERROR
+                MutableHeaders(raw=mensaje["headers"])["X-Trace-Id"] = nuevo.traza.trace_id
+            await send(mensaje)
+
+        token = _span_actual.set(nuevo)
+        try:
+            await self.app(scope, receive, enviar)
+        except BaseException as e:
+            nuevo.marcar_error(e)
+            raise
+        finally:
+            _span_actual.reset(token)
+            ruta = plantilla_ruta(scope)
+            nuevo.nombre = f"{scope['method']} {ruta}"
+            nuevo.atributos["http.route"] = ruta
+            _cerrar(nuevo, raiz=True)
+
+
+def instalar_trazas(
+    maximo: int = 100, archivo: str = "", fraccion_muestreo: float = 1.0, servicios: Iterable[type] = ()
+) -> ColectorTrazas:
+    """Habilita las trazas: colector, listeners SQL y servicios instrumentados (idempotente)"""
+    global colector, muestreo
+    if colector is None:
+        colector = ColectorTrazas(maximo, archivo)
+    muestreo = fraccion_muestreo
+    if not event.contains(Engine, "before_cursor_execute", _sql_antes):
+        event.listen(Engine, "before_cursor_execute", _sql_antes)
+        event.listen(Engine, "after_cursor_execute", _sql_despues)
+        event.listen(Engine, "handle_error", _sql_error)
+    for servicio in servicios:
+        instrumentar_servicio(servicio)
+    return colector
+
+
+def desinstalar_trazas():
+    """Deshace instalar_trazas: quita listeners y restaura los métodos originales (pruebas)"""
+    global colector
+    colector = None
+    if event.contains(Engine, "before_cursor_execute", _sql_antes):
+        event.remove(Engine, "before_cursor_execute", _sql_antes)
+        event.remove(Engine, "after_cursor_execute", _sql_despues)
+        event.remove(Engine, "handle_error", _sql_error)
+    for clase in _servicios_instrumentados:
+        for nombre, atributo in list(vars(clase).items()):
+            if isinstance(atributo, staticmethod) and getattr(atributo.__func__, "_trazado", False):
+                setattr(clase, nombre, staticmethod(atributo.__func__.__wrapped__))
+    _servicios_instrumentados.clear()
@@ -1,14 +1,31 @@
 """
 Configuración compartida para pruebas
+
+Por defecto las pruebas usan SQLite en memoria con el esquema de los modelos
+y los seeds (sin servicios externos). Para correrlas contra MySQL:
+    DATABASE_BACKEND=mysql pytest tests/
+
+Las consultas por petición corren en modo estricto: una ruta que repite una
+sentencia DB_UMBRAL_N_MAS_1 veces (N+1) responde 500 y la prueba falla.
 """
+import os
+
+os.environ.setdefault("DATABASE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+os.environ.setdefault("DB_CONSULTAS_ESTRICTO", "true")
+
 import pytest
+from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
 from src.config import settings
-from src.database import Base
+from src.database import Base, engine, inicializar_sqlite
+from src.utils.consultas import contar_consultas, verificar_presupuesto, PresupuestoConsultasExcedido
+
+if settings.DATABASE_BACKEND == "sqlite":
+    inicializar_sqlite(engine)
 
-# Usar la base de datos real (no SQLite) para pruebas de integración
-engine = create_engine(settings.database_url)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -16,7 +33,7 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 def db() -> Session:
     """
     Fixture que provee una sesión de base de datos para pruebas
-    Usa la base de datos real con seed data
+    Usa la base configurada (SQLite con seeds, o MySQL real con seed data)
     """
     db = TestingSessionLocal()
     try:
@@ -25,6 +42,43 @@ def db() -> Session:
         db.close()
 
 
+@pytest.fixture
+def sqlite_vacia() -> sessionmaker:
+    """
+    Fábrica de sesiones sobre un SQLite en memoria propio de la prueba
+
+    Solo el esquema de los modelos, sin seeds; una única conexión compartida
+    (StaticPool) para que todas las sesiones e hilos vean los mismos datos.
+    """
+    engine_vacio = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine_vacio)
+    try:
+        yield sessionmaker(autocommit=False, autoflush=False, bind=engine_vacio)
+    finally:
+        engine_vacio.dispose()
+
+
+@pytest.fixture
+def presupuesto_consultas():
+    """
+    Falla si el bloque supera `maximo` consultas o repite una sentencia (N+1)
+
+        with presupuesto_consultas(3) as contador:
+            OrdenService.obtener_orden(db, orden_id)
+    """
+    @contextmanager
+    def verificar(maximo: int, umbral_n_mas_1: int = settings.DB_UMBRAL_N_MAS_1):
+        with contar_consultas() as contador:
+            yield contador
+        problemas = verificar_presupuesto(contador, maximo, umbral_n_mas_1)
+        if problemas:
+            raise PresupuestoConsultasExcedido("; ".join(problemas))
+
+    return verificar
+
+
 @pytest.fixture(scope="function")
 def clean_test_orden(db: Session):
     """
@@ -50,4 +104,4 @@ def clean_test_orden(db: Session):
     db.query(Historial).filter(Historial.orden_id == orden.id).delete()
     db.query(OrdenArea).filter(OrdenArea.orden_id == orden.id).delete()
     db.query(Orden).filter(Orden.id == orden.id).delete()
-    db.commit()
\ No newline at end of file
+    db.commit()
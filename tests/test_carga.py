@@ -0,0 +1,102 @@
+"""
+Tests del generador de datos sintéticos y del cálculo de percentiles de la carga
+"""
+import random
+import sys
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from src.config import settings
+from src.services.estado_service import EstadoService
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from carga import percentil
+from generar_datos import FRACCION_SIN_ASIGNAR, PRIORIDADES, generar_lote
+
+
+AHORA = datetime(2026, 1, 1)
+
+
+def _lote(cantidad=4000, por_orden=3.0):
+    return generar_lote(random.Random(7), 1, cantidad, list(range(1, 21)), por_orden, AHORA, 180)
+
+
+def test_percentil_rango_mas_cercano():
+    valores = list(range(1, 101))
+    assert percentil(valores, 50) == 50
+    assert percentil(valores, 95) == 95
+    assert percentil(valores, 99) == 99
+    assert percentil(valores, 100) == 100
+    assert percentil(valores, 0) == 1
+
+    assert percentil([1, 2, 3, 4], 50) == 2
+    assert percentil([1, 2, 3, 4], 51) == 3
+    assert percentil([7.5], 99) == 7.5
+    assert percentil([], 50) == 0.0
+
+
+def test_lote_distribuciones():
+    ordenes, asignaciones, _ = _lote()
+    total = len(ordenes)
+    assert [o["id"] for o in ordenes] == list(range(1, total + 1))
+
+    prioridades = Counter(o["prioridad"] for o in ordenes)
+    for prioridad, peso in PRIORIDADES:
+        assert abs(prioridades[prioridad] / total - peso / 100) < 0.03
+
+    por_orden = Counter(a["orden_id"] for a in asignaciones)
+    sin_asignar = total - len(por_orden)
+    assert abs(sin_asignar / total - FRACCION_SIN_ASIGNAR) < 0.015
+    assert all(o["estado_global"] == "NUEVA" for o in ordenes if o["id"] not in por_orden)
+    assert all(k == 3 for k in por_orden.values())
+
+    # Las más viejas se cierran con más frecuencia que las recientes
+    def cerradas(filas):
+        return sum(o["estado_global"] in ("COMPLETADA", "CERRADA_SIN_SOLUCION") for o in filas) / len(filas)
+    recientes = [o for o in ordenes if (AHORA - o["creada_en"]).days < 30]
+    viejas = [o for o in ordenes if (AHORA - o["creada_en"]).days > 150]
+    assert cerradas(viejas) > cerradas(recientes) + 0.3
+
+    # Las activas quedan por debajo del SLA; las vencidas lo superan
+    for fila in asignaciones:
+        if fila["estado_parcial"] in ("ASIGNADA", "EN_PROGRESO", "PENDIENTE"):
+            assert fila["seg_acumulados"] < settings.SLA_SEG
+        elif fila["estado_parcial"] == settings.ESTADO_TIMEOUT:
+            assert fila["seg_acumulados"] >= settings.SLA_SEG
+
+
+def test_lote_estado_global_e_historial_coherentes():
+    ordenes, asignaciones, historial = _lote(cantidad=1000, por_orden=2.5)
+    filas_por_orden, eventos_por_orden = defaultdict(list), defaultdict(list)
+    for fila in asignaciones:
+        filas_por_orden[fila["orden_id"]].append(fila)
+    for evento in historial:
+        eventos_por_orden[evento["orden_id"]].append(evento)
+
+    claves = set(historial[0])
+    assert all(set(evento) == claves for evento in historial)
+
+    for orden in ordenes:
+        filas, eventos = filas_por_orden[orden["id"]], eventos_por_orden[orden["id"]]
+        assert orden["estado_global"] == EstadoService.estado_para([f["estado_parcial"] for f in filas])
+        assert len({f["area_id"] for f in filas}) == len(filas)
+
+        por_tipo = defaultdict(list)
+        for evento in eventos:
+            por_tipo[evento["evento"]].append(evento)
+        assert len(por_tipo["CREADA"]) == 1 and por_tipo["CREADA"][0]["timestamp"] == orden["creada_en"]
+        assert sorted(e["area_id"] for e in por_tipo["AREA_ASIGNADA"]) == sorted(f["area_id"] for f in filas)
+
+        transiciones = {e["area_id"]: e["estado_hasta"] for e in por_tipo["CAMBIO_ESTADO_PARCIAL"]}
+        transiciones.update({e["area_id"]: e["estado_hasta"] for e in por_tipo["TIMEOUT_SLA"]})
+        assert transiciones == {
+            f["area_id"]: f["estado_parcial"] for f in filas if f["estado_parcial"] != "ASIGNADA"
+        }
+
+        globales = por_tipo["CAMBIO_ESTADO_GLOBAL"]
+        if orden["estado_global"] == "NUEVA":
+            assert globales == []
+        else:
+            assert [e["estado_hasta"] for e in globales] == [orden["estado_global"]]
+            assert globales[0]["timestamp"] == orden["actualizada_en"]
@@ -0,0 +1,93 @@
+"""
+Tests de compresión de respuestas y estáticos precomprimidos
+"""
+import gzip
+import sys
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.utils.compresion import CompresionMiddleware, elegir_codificacion
+from src.utils.estaticos import EstaticosPrecomprimidos, CACHE_INMUTABLE
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from precomprimir_estaticos import construir
+
+
+app = FastAPI()
+app.add_middleware(CompresionMiddleware, minimo_bytes=100)
+
+
+@app.get("/grande")
+def grande():
+    return {"ordenes": [{"id": i, "titulo": "Orden de prueba"} for i in range(200)]}
+
+
+@app.get("/chica")
+def chica():
+    return PlainTextResponse("ok")
+
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse((f"linea {i}\n" for i in range(50)), media_type="application/x-ndjson")
+
+
+@app.get("/sse")
+def sse():
+    return StreamingResponse(iter(["data: x\n\n" * 100]), media_type="text/event-stream")
+
+
+client = TestClient(app)
+
+
+def test_elegir_codificacion():
+    assert elegir_codificacion("gzip, deflate") == "gzip"
+    assert elegir_codificacion("gzip;q=0, identity") is None
+    assert elegir_codificacion("") is None
+
+
+def test_comprime_sobre_umbral_y_respeta_excepciones():
+    grande = client.get("/grande", headers={"Accept-Encoding": "gzip"})
+    assert grande.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in grande.headers["vary"]
+    assert len(grande.json()["ordenes"]) == 200
+
+    assert "content-encoding" not in client.get("/chica", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/grande", headers={"Accept-Encoding": "identity"}).headers
+    assert "content-encoding" not in client.get("/sse", headers={"Accept-Encoding": "gzip"}).headers
+
+    stream = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert stream.headers["content-encoding"] == "gzip"
+    assert stream.text.splitlines()[-1] == "linea 49"
+
+
+def test_build_sirve_variante_gzip_con_cache_inmutable(tmp_path):
+    origen = tmp_path / "static"
+    (origen / "js").mkdir(parents=True)
+    (origen / "js" / "app.js").write_text("console.log('hola');\n" * 50)
+    (origen / "index.html").write_text('<script src="js/app.js"></script>')
+
+    manifest = construir(origen, tmp_path / "build")
+    con_hash = manifest["js/app.js"]
+    assert con_hash != "js/app.js"
+    assert f'/static/{con_hash}' in (tmp_path / "build" / "index.html").read_text()
+
+    estaticos = FastAPI()
+    estaticos.mount("/static", EstaticosPrecomprimidos(directory=str(tmp_path / "build")))
+    cliente = TestClient(estaticos)
+
+    js = cliente.get(f"/static/{con_hash}", headers={"Accept-Encoding": "gzip"})
+    assert js.headers["content-encoding"] == "gzip"
+    assert js.headers["content-type"].startswith("text/javascript")
+    assert js.headers["cache-control"] == CACHE_INMUTABLE
+    assert js.text.startswith("console.log")
+    assert int(js.headers["content-length"]) == len(
+        gzip.compress((origen / "js" / "app.js").read_bytes(), compresslevel=9, mtime=0)
+    )
+
+    html = cliente.get("/static/index.html", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in html.headers
+    assert html.headers["cache-control"] == "no-cache"
@@ -0,0 +1,75 @@
+"""
+Tests del contador de consultas por petición y del detector de N+1
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from src.database import SessionLocal
+from src.main import app
+from src.models import Area
+from src.utils.consultas import ConsultasMiddleware, PresupuestoConsultasExcedido, forma_sentencia
+
+
+def app_con_n_mas_1(**opciones) -> FastAPI:
+    """App mínima con una ruta que consulta cada área por separado"""
+    prueba = FastAPI()
+    prueba.add_middleware(ConsultasMiddleware, **opciones)
+
+    @prueba.get("/areas/{cantidad}")
+    def areas_una_a_una(cantidad: int):
+        db = SessionLocal()
+        try:
+            return [db.get(Area, area_id) is not None for area_id in range(1, cantidad + 1)]
+        finally:
+            db.close()
+
+    return prueba
+
+
+def test_headers_con_consultas_y_tiempo():
+    response = TestClient(app).get("/ordenes?limit=5")
+    assert response.status_code == 200
+    assert int(response.headers["X-DB-Consultas"]) >= 1
+    assert float(response.headers["X-DB-Tiempo-Ms"]) >= 0
+    assert "X-DB-Alerta" not in response.headers
+
+
+def test_n_mas_1_marcado_sin_modo_estricto(capsys):
+    cliente = TestClient(app_con_n_mas_1(umbral_n_mas_1=3))
+
+    response = cliente.get("/areas/2")
+    assert response.status_code == 200
+    assert "X-DB-Alerta" not in response.headers
+
+    response = cliente.get("/areas/4")
+    assert response.status_code == 200
+    assert response.headers["X-DB-Alerta"] == "1"
+    assert "posible N+1: 4×" in capsys.readouterr().out
+
+
+def test_modo_estricto_rechaza_presupuesto_excedido():
+    cliente = TestClient(app_con_n_mas_1(presupuesto=2, umbral_n_mas_1=0, estricto=True))
+
+    assert cliente.get("/areas/2").status_code == 200
+    response = cliente.get("/areas/3")
+    assert response.status_code == 500
+    assert response.json()["ruta"] == "GET /areas/{cantidad}"
+    assert response.json()["consultas"] == 3
+
+
+def test_forma_colapsa_listas_de_parametros():
+    assert forma_sentencia("SELECT * FROM t WHERE id IN (?, ?,\n ?)") == "SELECT * FROM t WHERE id IN (?)"
+    assert forma_sentencia("SELECT * FROM t WHERE id IN (%s, %s)") == "SELECT * FROM t WHERE id IN (?)"
+
+
+def test_fixture_presupuesto(db, presupuesto_consultas):
+    with presupuesto_consultas(2) as contador:
+        db.execute(text("SELECT 1"))
+    assert contador.consultas == 1
+
+    with pytest.raises(PresupuestoConsultasExcedido, match="posible N\\+1"):
+        with presupuesto_consultas(0, umbral_n_mas_1=3):
+            for area_id in range(1, 4):
+                db.execute(text("SELECT nombre FROM areas WHERE id = :id"), {"id": area_id})
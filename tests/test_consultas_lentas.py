@@ -0,0 +1,85 @@
+"""
+Tests del registro de consultas lentas y de /admin/consultas-lentas
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from src.config import settings
+from src.main import app
+from src.utils import consultas_lentas
+from src.utils.consultas_lentas import RegistroConsultasLentas, redactar_parametros, redactar_sentencia
+from src.utils.contexto import en_contexto
+
+
+@pytest.fixture
+def registro():
+    """Registro con umbral 0: toda sentencia cuenta como lenta"""
+    registro = RegistroConsultasLentas(umbral_ms=0, maximo=5)
+    registro.instalar()
+    yield registro
+    registro.desinstalar()
+
+
+def test_redaccion_de_literales_y_parametros():
+    assert redactar_sentencia("SELECT *\n FROM t WHERE a = 'secreto' AND b = ?") == (
+        "SELECT * FROM t WHERE a = '?' AND b = ?"
+    )
+    assert redactar_parametros(("ORD-123", 7, None)) == ["str(7)", "int", None]
+    assert redactar_parametros({"codigo": "ORD-123"}) == {"codigo": "str(7)"}
+
+
+def test_captura_contexto_parametros_y_plan_una_vez(db, registro, monkeypatch):
+    explains = []
+    original = RegistroConsultasLentas._explicar
+    monkeypatch.setattr(
+        RegistroConsultasLentas, "_explicar",
+        staticmethod(lambda *args: explains.append(args) or original(*args))
+    )
+
+    with en_contexto("tick"):
+        for titulo in ("ORD-SECRETA-1", "ORD-SECRETA-2"):
+            db.execute(text("SELECT id FROM ordenes WHERE titulo = :titulo"), {"titulo": titulo})
+    registro.esperar_explains()
+
+    entradas = registro.listar()
+    assert len(entradas) == 2
+    assert {e["contexto"] for e in entradas} == {"tick"}
+    assert entradas[0]["parametros"] == ["str(13)"]
+    assert "ORD-SECRETA" not in str(entradas)
+
+    # Mismo plan para las dos ejecuciones, calculado una sola vez
+    assert len(explains) == 1
+    assert entradas[0]["forma_id"] == entradas[1]["forma_id"]
+    assert isinstance(entradas[0]["plan"], list) and entradas[0]["plan"]
+    forma = registro.resumen_formas()[0]
+    assert forma["veces"] == 2 and forma["plan"] == entradas[0]["plan"]
+
+
+def test_buffer_acotado_y_limpiar(db, registro):
+    for area_id in range(10):
+        db.execute(text("SELECT nombre FROM areas WHERE id = :id"), {"id": area_id})
+    assert len(registro.listar(limite=100)) == 5
+
+    registro.limpiar()
+    assert registro.listar() == [] and registro.resumen_formas() == []
+
+
+def test_admin_consultas_lentas(monkeypatch, registro):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secreto")
+    cliente = TestClient(app)
+    headers = {"X-Admin-Token": "secreto"}
+
+    monkeypatch.setattr(consultas_lentas, "registro_lentas", None)
+    assert cliente.get("/admin/consultas-lentas", headers=headers).status_code == 404
+
+    monkeypatch.setattr(consultas_lentas, "registro_lentas", registro)
+    assert cliente.get("/ordenes?limit=5").status_code == 200
+    response = cliente.get("/admin/consultas-lentas", params={"contexto": "GET /ordenes/"}, headers=headers)
+    assert response.status_code == 200
+    cuerpo = response.json()
+    assert cuerpo["umbral_ms"] == 0
+    assert cuerpo["consultas"] and all(e["contexto"] == "GET /ordenes/" for e in cuerpo["consultas"])
+
+    assert cliente.delete("/admin/consultas-lentas", headers=headers).status_code == 200
+    assert registro.listar() == []
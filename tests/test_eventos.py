@@ -0,0 +1,55 @@
+"""
+Pruebas del feed de eventos (bus en proceso)
+"""
+import asyncio
+import threading
+import pytest
+
+from src.schemas.orden import OrdenCreate
+from src.services.orden_service import OrdenService
+from src.utils.eventos import BusEventos, bus_eventos
+
+
+@pytest.fixture
+def db(sqlite_vacia):
+    db = sqlite_vacia()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def test_publicar_desde_otro_hilo_y_descartar_antiguos():
+    """Un hilo (como el scheduler) publica; el suscriptor conserva los más recientes"""
+    bus = BusEventos(max_pendientes=2)
+
+    async def escenario():
+        async with bus.suscripcion() as cola:
+            assert bus.tiene_suscriptores
+            hilo = threading.Thread(
+                target=lambda: [bus.publicar("tick", {"n": n}) for n in range(3)]
+            )
+            hilo.start()
+            hilo.join()
+            await asyncio.sleep(0)  # Procesar los call_soon_threadsafe
+            recibidos = [cola.get_nowait()["datos"]["n"] for _ in range(cola.qsize())]
+        assert not bus.tiene_suscriptores
+        return recibidos
+
+    assert asyncio.run(escenario()) == [1, 2]
+
+
+def test_crear_orden_publica_evento(db):
+    async def escenario():
+        async with bus_eventos.suscripcion() as cola:
+            orden = OrdenService.crear_orden(db, OrdenCreate(
+                titulo="Orden SSE", descripcion="Prueba del feed", creador="test"
+            ))
+            mensaje = await asyncio.wait_for(cola.get(), timeout=1)
+        return orden, mensaje
+
+    orden, mensaje = asyncio.run(escenario())
+    assert mensaje["tipo"] == "orden"
+    assert mensaje["datos"] == {
+        "accion": "creada", "orden_id": orden.id, "estado_global": orden.estado_global
+    }
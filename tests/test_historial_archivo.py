@@ -0,0 +1,126 @@
+"""
+Pruebas del archivado de historial en almacenamiento frío
+"""
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Query
+
+from src.models import Orden, Historial
+from src.schemas.historial import FiltrosHistorial
+from src.services.archivo_service import ArchivoService, archivo_historial
+from src.services.historial_service import HistorialService
+
+
+@pytest.fixture
+def db(sqlite_vacia, tmp_path, monkeypatch):
+    """Sesión SQLite en memoria y archivo de historial en un directorio temporal"""
+    monkeypatch.setattr(archivo_historial, "directorio", str(tmp_path))
+
+    db = sqlite_vacia()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _crear_orden(db, estado: str, dias: int, num_eventos: int) -> Orden:
+    """Crea una orden actualizada hace `dias` días con num_eventos en historial"""
+    antigua = datetime.utcnow() - timedelta(days=dias)
+    orden = Orden(
+        titulo="Orden de prueba", descripcion="Orden para archivado",
+        creador="test", estado_global=estado, actualizada_en=antigua
+    )
+    db.add(orden)
+    db.flush()
+    for i in range(num_eventos):
+        db.add(Historial(
+            orden_id=orden.id, evento="NOTA", detalle=f"Evento {i}",
+            timestamp=antigua.replace(microsecond=0), actor="ana" if i % 2 else "luis"
+        ))
+    db.commit()
+    return orden
+
+
+def test_archiva_solo_ordenes_cerradas_fuera_de_retencion(db):
+    """Solo se archivan órdenes COMPLETADA/CERRADA_SIN_SOLUCION más viejas que la retención"""
+    cerrada = _crear_orden(db, "COMPLETADA", dias=365, num_eventos=4)
+    abierta = _crear_orden(db, "EN_PROGRESO", dias=365, num_eventos=2)
+    reciente = _crear_orden(db, "COMPLETADA", dias=1, num_eventos=2)
+
+    resultado = ArchivoService.archivar_historial(db)
+
+    assert resultado == {"ordenes_archivadas": 1, "filas_archivadas": 4}
+    assert db.query(Historial).filter(Historial.orden_id == cerrada.id).count() == 0
+    assert db.query(Historial).filter(Historial.orden_id == abierta.id).count() == 2
+    assert db.query(Historial).filter(Historial.orden_id == reciente.id).count() == 2
+
+    # Una segunda ejecución no encuentra nada nuevo
+    assert ArchivoService.archivar_historial(db)["ordenes_archivadas"] == 0
+
+
+def test_historial_lee_archivados_de_forma_transparente(db):
+    """El historial combina filas archivadas y nuevas, con paginación y filtros"""
+    orden = _crear_orden(db, "CERRADA_SIN_SOLUCION", dias=365, num_eventos=5)
+    ids_archivados = [h.id for h in db.query(Historial).filter(Historial.orden_id == orden.id)]
+    ArchivoService.archivar_historial(db)
+
+    # Evento posterior al archivado (p. ej. la orden se reabrió)
+    db.add(Historial(orden_id=orden.id, evento="REABIERTA", actor="ana"))
+    db.commit()
+
+    vistos = []
+    cursor = None
+    while True:
+        pagina, cursor = HistorialService.listar_historial(
+            db, orden.id, FiltrosHistorial(), limit=2, cursor=cursor
+        )
+        vistos.extend(pagina)
+        if not cursor:
+            break
+
+    assert vistos[0].evento == "REABIERTA"
+    assert [h.id for h in vistos[1:]] == sorted(ids_archivados, reverse=True)
+
+    por_actor, _ = HistorialService.listar_historial(db, orden.id, FiltrosHistorial(actor="ana"))
+    assert [h.actor for h in por_actor] == ["ana"] * 3
+
+    exportado = list(HistorialService.iterar_historial(db, orden.id, FiltrosHistorial()))
+    assert [h.id for h in exportado] == [h.id for h in vistos]
+
+
+def test_lectura_deduplica_archivado_interrumpido(db):
+    """Si el DELETE no llegó a confirmarse, las filas repetidas se leen una sola vez"""
+    orden = _crear_orden(db, "COMPLETADA", dias=365, num_eventos=3)
+    eventos = db.query(Historial).filter(Historial.orden_id == orden.id).all()
+    archivo_historial.anexar(orden.id, [ArchivoService.serializar(e) for e in eventos])
+
+    ArchivoService.archivar_historial(db)
+
+    assert len(archivo_historial.leer(orden.id)) == 3
+
+
+def test_delete_fallido_no_duplica_el_historial(db, monkeypatch):
+    """Si el DELETE falla tras anexar al archivo, cada evento se sigue leyendo una sola vez"""
+    orden = _crear_orden(db, "COMPLETADA", dias=365, num_eventos=3)
+    ids = sorted((h.id for h in db.query(Historial).filter(Historial.orden_id == orden.id)), reverse=True)
+
+    def delete_fallido(self, *args, **kwargs):
+        raise RuntimeError("DELETE interrumpido")
+
+    with monkeypatch.context() as m:
+        m.setattr(Query, "delete", delete_fallido)
+        with pytest.raises(RuntimeError):
+            ArchivoService.archivar_historial(db)
+    db.rollback()
+
+    assert archivo_historial.tiene(orden.id)
+    assert db.query(Historial).filter(Historial.orden_id == orden.id).count() == 3
+
+    pagina, cursor = HistorialService.listar_historial(db, orden.id, FiltrosHistorial(), limit=2)
+    resto, _ = HistorialService.listar_historial(db, orden.id, FiltrosHistorial(), limit=2, cursor=cursor)
+    assert [h.id for h in pagina + resto] == ids
+    assert [h.id for h in HistorialService.iterar_historial(db, orden.id, FiltrosHistorial())] == ids
+
+    # El reintento completa el archivado sin duplicar filas en el archivo
+    assert ArchivoService.archivar_historial(db) == {"ordenes_archivadas": 1, "filas_archivadas": 3}
+    assert [h.id for h in HistorialService.iterar_historial(db, orden.id, FiltrosHistorial())] == ids
@@ -0,0 +1,112 @@
+"""
+Pruebas del snapshot de KPIs y de los contadores incrementales
+"""
+import threading
+import pytest
+from sqlalchemy import event
+
+from src.models import Orden, Area
+from src.schemas.orden import OrdenCreate, AsignacionCreate, CambioEstadoRequest
+from src.services.contadores_service import ContadoresService
+from src.services.kpi_service import KpiService
+from src.services.orden_service import OrdenService
+
+
+@pytest.fixture
+def entorno(sqlite_vacia, monkeypatch):
+    """Sesiones SQLite en memoria, contador de SELECT y snapshot vacío"""
+    consultas = []
+
+    @event.listens_for(sqlite_vacia.kw["bind"], "before_cursor_execute")
+    def contar(conn, cursor, sentencia, parametros, contexto, multiples):
+        if sentencia.lstrip().upper().startswith("SELECT"):
+            consultas.append(sentencia)
+
+    monkeypatch.setattr(KpiService, "_snapshot", None)
+    monkeypatch.setattr(KpiService, "_cambios_pendientes", True)
+    Sesion = sqlite_vacia
+
+    db = Sesion()
+    for estado in ['NUEVA', 'EN_PROGRESO', 'COMPLETADA', 'COMPLETADA', 'VENCIDA']:
+        db.add(Orden(titulo="Orden", descripcion="KPIs", creador="test", estado_global=estado))
+    db.commit()
+    # Filas cargadas sin pasar por los servicios: el reconciliador inicializa contadores
+    ContadoresService.reconciliar(db)
+    db.close()
+    consultas.clear()
+    return Sesion, consultas
+
+
+def test_kpis_en_una_consulta(entorno):
+    Sesion, consultas = entorno
+    with Sesion() as db:
+        kpis = KpiService.calcular_kpis(db)
+
+    assert kpis == {
+        "total_ordenes": 5, "completadas": 2, "pendientes": 2,
+        "cerradas_sin_solucion": 0, "vencidas": 1
+    }
+    assert len(consultas) == 1
+
+
+def test_snapshot_single_flight_y_refresco_por_tick(entorno):
+    Sesion, consultas = entorno
+    resultados = []
+
+    def pedir():
+        with Sesion() as db:
+            resultados.append(KpiService.obtener_kpis(db))
+
+    hilos = [threading.Thread(target=pedir) for _ in range(20)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert len(consultas) == 1
+    assert all(r["total_ordenes"] == 5 for r in resultados)
+
+    # Una escritura marca cambios; el tick recalcula y /kpis lo ve sin consultar
+    with Sesion() as db:
+        OrdenService.crear_orden(db, OrdenCreate(titulo="Otra orden", descripcion="Orden para KPIs", creador="test"))
+        consultas.clear()
+        KpiService.refrescar_si_cambio(db)
+        KpiService.refrescar_si_cambio(db)  # Sin cambios nuevos: no consulta
+        assert KpiService.obtener_kpis(db)["total_ordenes"] == 6
+
+    assert len(consultas) == 1
+
+
+def test_contadores_siguen_transiciones_y_revierten_con_rollback(entorno):
+    Sesion, _ = entorno
+    with Sesion() as db:
+        area = Area(nombre="Soporte", responsable="ana")
+        db.add(area)
+        db.commit()
+
+        orden = OrdenService.crear_orden(db, OrdenCreate(titulo="Orden contadores", descripcion="Orden para contadores", creador="test"))
+        OrdenService.asignar_areas(db, orden.id, AsignacionCreate(area_ids=[area.id]))
+        OrdenService.cambiar_estado_parcial(
+            db, orden.id, area.id, CambioEstadoRequest(nuevo_estado='EN_PROGRESO')
+        )
+
+        # Una transición revertida no deja rastro en los contadores
+        ContadoresService.transicion_orden(db, 'EN_PROGRESO', 'COMPLETADA')
+        db.rollback()
+        db.commit()
+
+        assert ContadoresService.leer(db, 'estado_global')['EN_PROGRESO'] == 2
+        assert ContadoresService.leer(db, 'estado_parcial') == {'ASIGNADA': 0, 'EN_PROGRESO': 1}
+        assert ContadoresService.reconciliar(db) == {}
+
+
+def test_reconciliar_corrige_deriva(entorno):
+    Sesion, _ = entorno
+    with Sesion() as db:
+        ContadoresService.fijar(db, 'estado_global', 'VENCIDA', 40)
+        db.commit()
+
+        correcciones = ContadoresService.reconciliar(db)
+
+        assert correcciones == {"estado_global.VENCIDA": {"antes": 40, "real": 1}}
+        assert ContadoresService.leer(db, 'estado_global')['VENCIDA'] == 1
@@ -0,0 +1,88 @@
+"""
+Tests de las métricas en formato Prometheus (/metrics)
+"""
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from src.main import app
+from src.models import Historial
+from src.utils.cache import CacheTTL
+from src.utils.instrumentacion import registrar_tick
+from src.utils.metricas import RegistroMetricas
+
+
+def valor(texto: str, serie: str) -> float:
+    """Valor de una serie exacta (nombre{etiquetas}) en la exposición"""
+    for linea in texto.splitlines():
+        if linea.startswith(serie + " "):
+            return float(linea.rsplit(" ", 1)[1])
+    raise AssertionError(f"Serie no encontrada: {serie}")
+
+
+def test_formato_prometheus():
+    registro = RegistroMetricas()
+    peticiones = registro.contador("peticiones_total", "Peticiones", ("ruta",))
+    latencia = registro.histograma("latencia_segundos", "Latencia", limites=(0.1, 1.0))
+    registro.medidor("en_curso", "En curso").sumar(2)
+
+    peticiones.hijo('/a"b').incrementar(3)
+    latencia.observar(0.05)
+    latencia.observar(0.5)
+
+    texto = registro.exponer()
+    assert "# TYPE peticiones_total counter" in texto
+    assert valor(texto, 'peticiones_total{ruta="/a\\"b"}') == 3
+    assert valor(texto, 'latencia_segundos_bucket{le="0.1"}') == 1
+    assert valor(texto, 'latencia_segundos_bucket{le="+Inf"}') == 2
+    assert valor(texto, "latencia_segundos_count") == 2
+    assert valor(texto, "latencia_segundos_sum") == 0.55
+    assert valor(texto, "en_curso") == 2
+
+
+def test_metrics_por_ruta_y_content_type():
+    cliente = TestClient(app)
+    cliente.get("/ordenes/1")
+    cliente.get("/ordenes/2")
+
+    response = cliente.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    texto = response.text
+    # Se agrupa por plantilla, no por path
+    assert 'ruta="/ordenes/{orden_id}"' in texto
+    assert "/ordenes/1" not in texto
+    assert valor(texto, 'http_peticion_duracion_segundos_count{metodo="GET",ruta="/ordenes/{orden_id}"}') >= 2
+    assert valor(texto, "http_peticiones_en_curso") == 1  # el propio scrape
+
+
+def test_tick_historial_y_caches(db: Session):
+    texto = TestClient(app).get("/metrics").text
+    ticks = valor(texto, "temporizador_ticks_total")
+    timeouts = valor(texto, "temporizador_timeouts_total")
+    escritos = valor(texto, "historial_eventos_escritos_total")
+
+    registrar_tick(
+        {"areas_actualizadas": 4, "timeouts_aplicados": 1, "ordenes_recalculadas": [7], "errores": []},
+        0.02
+    )
+    db.add(Historial(orden_id=1, evento="CREADA", actor="test_metricas"))
+    db.flush()
+    db.rollback()  # Insertado en el flush pero revertido: no cuenta
+    db.add(Historial(orden_id=1, evento="CREADA", actor="test_metricas"))
+    db.commit()
+    db.query(Historial).filter(Historial.actor == "test_metricas").delete()
+    db.commit()
+
+    cache = CacheTTL(ttl_seg=60, nombre="test_metricas")
+    cache.obtener(lambda: 1)
+    cache.obtener(lambda: 1)
+    cache.obtener(lambda: 1)
+
+    texto = TestClient(app).get("/metrics").text
+    assert valor(texto, "temporizador_ticks_total") == ticks + 1
+    assert valor(texto, "temporizador_timeouts_total") == timeouts + 1
+    assert valor(texto, "historial_eventos_escritos_total") == escritos + 1
+    assert valor(texto, 'cache_aciertos_total{cache="test_metricas"}') == 2
+    assert valor(texto, 'cache_fallos_total{cache="test_metricas"}') == 1
+    assert abs(valor(texto, 'cache_tasa_aciertos{cache="test_metricas"}') - 2 / 3) < 1e-9
@@ -0,0 +1,128 @@
+"""
+Tests del runner de migraciones y de los índices del camino caliente
+
+Los planes se verifican con EXPLAIN QUERY PLAN sobre las sentencias que
+generan los servicios (capturadas del engine), en el backend SQLite de las
+pruebas, donde los índices salen de los modelos.
+"""
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import Session
+
+from src import migraciones
+from src.schemas.historial import FiltrosHistorial
+from src.services.historial_service import HistorialService
+from src.services.orden_service import OrdenService
+from src.services.temporizador_service import TemporizadorService
+
+
+@contextmanager
+def sentencias_capturadas(db: Session):
+    """Sentencias SQL (texto, parámetros) ejecutadas por la sesión"""
+    capturadas = []
+    engine = db.get_bind()
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            capturadas.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capturar)
+    try:
+        yield capturadas
+    finally:
+        event.remove(engine, "before_cursor_execute", capturar)
+
+
+def plan(db: Session, statement: str, parameters) -> str:
+    filas = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return "\n".join(fila[-1] for fila in filas)
+
+
+def test_runner_aplica_en_orden_y_registra_versiones(tmp_path):
+    (tmp_path / "001_base.sql").write_text(
+        "USE ordenes_multiarea;\nCREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT);\n", encoding="utf-8"
+    )
+    (tmp_path / "002_indice.sql").write_text(
+        "-- índice; con punto y coma en el comentario\nCREATE INDEX idx_t_v ON t (v);\n", encoding="utf-8"
+    )
+    (tmp_path / "notas.txt").write_text("no es una migración", encoding="utf-8")
+    engine = create_engine(f"sqlite:///{tmp_path / 'm.db'}")
+
+    assert [m.version for m in migraciones.pendientes(engine, tmp_path)] == ["001", "002"]
+    assert migraciones.aplicar(engine, tmp_path, hasta="001") == ["001"]
+    assert migraciones.aplicar(engine, tmp_path) == ["002"]
+    assert migraciones.aplicar(engine, tmp_path) == []
+
+    assert set(migraciones.aplicadas(engine)) == {"001", "002"}
+    assert [i["name"] for i in inspect(engine).get_indexes("t")] == ["idx_t_v"]
+    assert migraciones.modificadas(engine, tmp_path) == []
+
+    (tmp_path / "002_indice.sql").write_text("CREATE INDEX idx_t_v2 ON t (v);\n", encoding="utf-8")
+    assert migraciones.modificadas(engine, tmp_path) == ["002"]
+    engine.dispose()
+
+
+def test_runner_no_registra_migracion_fallida(tmp_path):
+    (tmp_path / "001_ok.sql").write_text("CREATE TABLE t (id INTEGER PRIMARY KEY);", encoding="utf-8")
+    (tmp_path / "002_rota.sql").write_text("CREATE TABLE t (id INTEGER PRIMARY KEY);", encoding="utf-8")
+    engine = create_engine(f"sqlite:///{tmp_path / 'm.db'}")
+
+    try:
+        migraciones.aplicar(engine, tmp_path)
+        assert False, "la migración 002 debía fallar"
+    except RuntimeError as e:
+        assert "002" in str(e)
+
+    assert set(migraciones.aplicadas(engine)) == {"001"}
+    assert migraciones.marcar(engine, tmp_path) == ["002"]
+    assert migraciones.pendientes(engine, tmp_path) == []
+    engine.dispose()
+
+
+def test_migraciones_del_repositorio_tienen_versiones_unicas():
+    versiones = [m.version for m in migraciones.descubrir()]
+    assert versiones == sorted(versiones)
+    assert "007" in versiones
+
+
+def test_tick_usa_indice_estado_seg(db: Session):
+    with sentencias_capturadas(db) as capturadas:
+        TemporizadorService._aplicar_timeouts(db)
+        TemporizadorService._obtener_ordenes_afectadas(db)
+    db.rollback()
+
+    consultas = [(s, p) for s, p in capturadas if "FROM orden_area" in s and "estado_parcial" in s]
+    assert len(consultas) == 2
+    for statement, parameters in consultas:
+        assert "idx_orden_area_estado_seg" in plan(db, statement, parameters)
+
+    # DISTINCT orden_id sale solo del índice
+    assert "COVERING INDEX idx_orden_area_estado_seg" in plan(db, *consultas[1])
+
+
+def test_listado_pagina_por_indice_sin_ordenar(db: Session):
+    with sentencias_capturadas(db) as capturadas:
+        OrdenService.listar_ordenes(db, estado="EN_PROGRESO", limit=20)
+        OrdenService.listar_ordenes(db, limit=20)
+
+    # La página sale del índice en orden; solo se ordenan las filas de la página
+    con_estado = plan(db, *capturadas[0])
+    assert "COVERING INDEX idx_ordenes_estado_actualizada" in con_estado
+    assert con_estado.count("TEMP B-TREE FOR ORDER BY") == 1
+
+    sin_estado = plan(db, *capturadas[1])
+    assert "idx_ordenes_actualizada_en" in sin_estado
+
+
+def test_listado_paginacion_consistente(db: Session):
+    todas = OrdenService.listar_ordenes(db, limit=1000)
+    pagina = OrdenService.listar_ordenes(db, skip=2, limit=3)
+    assert pagina == todas[2:5]
+    assert all(orden["num_areas"] >= 0 for orden in pagina)
+
+
+def test_timeline_historial_usa_indice_orden(db: Session):
+    consulta = HistorialService._consulta(db, 1, FiltrosHistorial())
+    compilada = consulta.statement.compile(db.get_bind())
+    detalle = plan(db, str(compilada), tuple(compilada.params[p] for p in compilada.positiontup))
+    assert "idx_historial_orden" in detalle
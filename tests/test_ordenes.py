@@ -2,17 +2,24 @@
 Tests básicos para endpoints de órdenes
 """
 import pytest
+import json
+import uuid
+from datetime import datetime, timedelta
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, DateTime, TIMESTAMP
 from sqlalchemy.orm import sessionmaker
 
 from src.main import app
-from src.database import Base, get_db
+from src.database import Base, get_db, get_read_db, DateTimeSegundos
 from src.config import settings
+from src.models import Historial
 
 # Base de datos de prueba (SQLite en memoria)
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+engine.dialect.colspecs = {
+    **engine.dialect.colspecs, DateTime: DateTimeSegundos, TIMESTAMP: DateTimeSegundos
+}
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Setup
@@ -28,6 +35,7 @@ def override_get_db():
 
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
 client = TestClient(app)
 
 
@@ -75,4 +83,264 @@ def test_obtener_orden_inexistente():
     assert "no encontrada" in response.json()["detail"]
 
 
-# Ejecutar con: pytest tests/test_ordenes.py -v
\ No newline at end of file
+def _crear_orden_con_areas(num_areas: int) -> int:
+    """Crea una orden y le asigna num_areas áreas nuevas (genera historial)"""
+    orden = client.post("/ordenes/", json={
+        "titulo": "Test - Orden con historial",
+        "descripcion": "Orden para probar la paginación del historial",
+        "creador": "test@empresa.com"
+    }).json()
+    
+    area_ids = []
+    for _ in range(num_areas):
+        area = client.post("/areas/", json={
+            "nombre": f"Área test {uuid.uuid4().hex[:8]}",
+            "responsable": "Responsable de prueba"
+        }).json()
+        area_ids.append(area["id"])
+    
+    client.post(f"/ordenes/{orden['id']}/asignaciones", json={"area_ids": area_ids})
+    return orden["id"]
+
+
+def _insertar_eventos(orden_id: int, eventos: list) -> list:
+    """Inserta eventos de historial (timestamp, actor) directamente; retorna sus ids"""
+    db = TestingSessionLocal()
+    try:
+        filas = [
+            Historial(orden_id=orden_id, evento="NOTA", timestamp=ts, actor=actor)
+            for ts, actor in eventos
+        ]
+        db.add_all(filas)
+        db.commit()
+        return [f.id for f in filas]
+    finally:
+        db.close()
+
+
+def _paginar(orden_id: int, limit: int, **params) -> list:
+    """Recorre todas las páginas del historial siguiendo X-Siguiente-Cursor"""
+    vistos = []
+    cursor = None
+    for _ in range(100):
+        query = {"limit": limit, **params}
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get(f"/ordenes/{orden_id}/historial", params=query)
+        assert response.status_code == 200
+        vistos.extend(e["id"] for e in response.json())
+        cursor = response.headers.get("X-Siguiente-Cursor")
+        if not cursor:
+            return vistos
+    pytest.fail("La paginación no terminó")
+
+
+def test_historial_paginado_por_cursor():
+    """Test: Recorrer el historial página a página sin repetir eventos"""
+    orden_id = _crear_orden_con_areas(3)
+    completo = client.get(f"/ordenes/{orden_id}/historial").json()
+    
+    vistos = _paginar(orden_id, limit=2)
+    
+    assert vistos == [e["id"] for e in completo]
+    assert len(set(vistos)) == len(completo) >= 4
+
+
+def test_historial_desempate_mismo_segundo():
+    """Test: Eventos del mismo segundo se paginan por id, sin saltos ni repeticiones"""
+    orden_id = _crear_orden_con_areas(0)
+    instante = datetime(2020, 1, 1, 12, 0, 0)
+    ids = _insertar_eventos(orden_id, [(instante, "ana")] * 5)
+    
+    vistos = _paginar(orden_id, limit=2, desde=instante.isoformat(), hasta=instante.isoformat())
+    
+    assert vistos == sorted(ids, reverse=True)
+
+
+def test_historial_filtros_rango_y_actor():
+    """Test: Filtros desde/hasta (inclusivos) y actor"""
+    orden_id = _crear_orden_con_areas(0)
+    base = datetime(2020, 1, 1, 12, 0, 0)
+    ids = _insertar_eventos(orden_id, [
+        (base - timedelta(hours=1), "ana"),
+        (base, "ana"),
+        (base + timedelta(hours=1), "luis"),
+        (base + timedelta(hours=2), "ana"),
+    ])
+    
+    rango = client.get(f"/ordenes/{orden_id}/historial", params={
+        "desde": base.isoformat(),
+        "hasta": (base + timedelta(hours=1)).isoformat()
+    }).json()
+    assert [e["id"] for e in rango] == [ids[2], ids[1]]
+    
+    por_actor = client.get(f"/ordenes/{orden_id}/historial", params={"actor": "ana"}).json()
+    assert [e["id"] for e in por_actor] == [ids[3], ids[1], ids[0]]
+
+
+def test_historial_filtro_y_export():
+    """Test: Filtro por evento y exportación NDJSON en el mismo orden que la API"""
+    orden_id = _crear_orden_con_areas(2)
+    _insertar_eventos(orden_id, [(datetime(2020, 1, 1, 12, 0, 0), "ana")] * 3)
+    
+    response = client.get(f"/ordenes/{orden_id}/historial", params={"evento": "AREA_ASIGNADA"})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert all(e["evento"] == "AREA_ASIGNADA" for e in response.json())
+    
+    response = client.get(f"/ordenes/{orden_id}/historial/export")
+    assert response.status_code == 200
+    lineas = [json.loads(l) for l in response.text.splitlines()]
+    assert [e["id"] for e in lineas] == _paginar(orden_id, limit=2)
+    
+    response = client.get(f"/ordenes/{orden_id}/historial/export", params={"actor": "ana"})
+    assert len(response.text.splitlines()) == 3
+
+
+def test_historial_orden_inexistente_y_cursor_invalido():
+    """Test: 404 para orden inexistente (también con cursor) y 400 con cursor inválido"""
+    orden_id = _crear_orden_con_areas(1)
+    response = client.get(f"/ordenes/{orden_id}/historial", params={"limit": 1})
+    cursor = response.headers["X-Siguiente-Cursor"]
+    
+    assert client.get("/ordenes/99999/historial", params={"cursor": cursor}).status_code == 404
+    assert client.get("/ordenes/99999/historial/export").status_code == 404
+    assert client.get(f"/ordenes/{orden_id}/historial", params={"cursor": "xx"}).status_code == 400
+
+
+def test_historial_estructurado_renderiza_detalle():
+    """Test: Los eventos guardan campos estructurados y el detalle se arma al leer"""
+    orden_id = _crear_orden_con_areas(1)
+    area_id = client.get(f"/ordenes/{orden_id}").json()["asignaciones"][0]["area_id"]
+    client.patch(f"/ordenes/{orden_id}/areas/{area_id}", json={"nuevo_estado": "EN_PROGRESO"})
+    
+    historial = client.get(f"/ordenes/{orden_id}/historial").json()
+    cambio = next(e for e in historial if e["evento"] == "CAMBIO_ESTADO_PARCIAL")
+    assert cambio["area_id"] == area_id
+    assert (cambio["estado_desde"], cambio["estado_hasta"]) == ("ASIGNADA", "EN_PROGRESO")
+    assert cambio["detalle"].startswith("Área Área test ")
+    assert cambio["detalle"].endswith(": ASIGNADA → EN_PROGRESO")
+    
+    creada = next(e for e in historial if e["evento"] == "CREADA")
+    assert creada["detalle"] == "Orden creada: Test - Orden con historial"
+    
+    # En la tabla no se guarda el texto renderizado
+    db = TestingSessionLocal()
+    try:
+        fila = db.query(Historial).filter(Historial.id == cambio["id"]).one()
+        assert fila.detalle_texto is None
+    finally:
+        db.close()
+    
+    transiciones = client.get("/reportes/transiciones", params={"area_id": area_id}).json()
+    assert transiciones == [{"estado_desde": "ASIGNADA", "estado_hasta": "EN_PROGRESO", "total": 1}]
+
+
+# Ejecutar con: pytest tests/test_ordenes.py -v
+
+def test_dashboard_combina_secciones(monkeypatch):
+    """Test: /dashboard devuelve todas las secciones, o solo las pedidas"""
+    monkeypatch.setattr("src.routers.dashboard.sesion_lectura_para", lambda request: TestingSessionLocal)
+    orden_id = _crear_orden_con_areas(1)
+
+    response = client.get("/dashboard")
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data) == {"kpis", "ordenes", "temporizador", "estadisticas_sla"}
+    assert orden_id in [o["id"] for o in data["ordenes"]]
+    assert data["temporizador"]["configuracion"]["sla_seg"] == settings.SLA_SEG
+
+    response = client.get("/dashboard?secciones=temporizador,estadisticas_sla")
+    assert set(response.json()) == {"temporizador", "estadisticas_sla"}
+
+    assert client.get("/dashboard?secciones=kpis,otra").status_code == 400
+
+
+def test_listado_y_detalle_respetan_esquemas():
+    """Test: la salida sin revalidar cumple OrdenListResponse / OrdenResponse"""
+    from src.schemas.orden import OrdenListResponse, OrdenResponse
+    orden_id = _crear_orden_con_areas(2)
+
+    response = client.get("/ordenes/?limit=500")
+    assert response.headers["content-type"] == "application/json"
+    fila = next(o for o in response.json() if o["id"] == orden_id)
+    assert OrdenListResponse.model_validate(fila).model_dump(mode="json") == fila
+    assert fila["num_areas"] == 2 and fila["areas_completadas"] == 0
+
+    detalle = client.get(f"/ordenes/{orden_id}").json()
+    assert OrdenResponse.model_validate(detalle).model_dump(mode="json") == detalle
+    assert all(a["area_nombre"] for a in detalle["asignaciones"])
+
+
+def test_export_ndjson_y_csv_con_asignaciones():
+    """Test: /ordenes/export coincide con el listado y agrega asignaciones"""
+    import csv
+    import io
+    orden_id = _crear_orden_con_areas(2)
+    sin_areas = client.post("/ordenes/", json={
+        "titulo": "Test - Orden sin áreas",
+        "descripcion": "Orden sin asignaciones para el export",
+        "creador": "test@empresa.com"
+    }).json()["id"]
+
+    listado = {o["id"]: o for o in client.get("/ordenes/?limit=500").json()}
+    lineas = [json.loads(l) for l in client.get("/ordenes/export").text.splitlines()]
+    ids = [o["id"] for o in lineas]
+    assert ids == sorted(ids) and set(ids) == set(listado)
+    assert next(o for o in lineas if o["id"] == orden_id) == listado[orden_id]
+
+    response = client.get("/ordenes/export?asignaciones=true")
+    ordenes = {o["id"]: o for o in map(json.loads, response.text.splitlines())}
+    assert len(ordenes[orden_id]["asignaciones"]) == ordenes[orden_id]["num_areas"] == 2
+    assert ordenes[sin_areas]["asignaciones"] == [] and ordenes[sin_areas]["total_segundos"] == 0
+
+    response = client.get("/ordenes/export?formato=csv&asignaciones=true&totales=false")
+    assert response.headers["content-type"].startswith("text/csv")
+    filas = list(csv.DictReader(io.StringIO(response.text)))
+    assert "num_areas" not in filas[0]
+    assert len([f for f in filas if f["id"] == str(orden_id)]) == 2
+    assert [f["asignacion_id"] for f in filas if f["id"] == str(sin_areas)] == [""]
+
+
+def test_importar_ndjson_y_csv_con_reporte_de_errores():
+    """Test: la importación carga por lotes y reporta las filas inválidas por línea"""
+    area_id = client.post("/areas/", json={
+        "nombre": f"Área import {uuid.uuid4().hex[:8]}",
+        "responsable": "Responsable de prueba"
+    }).json()["id"]
+    titulo = f"Importada {uuid.uuid4().hex[:8]}"
+
+    lineas = [
+        {"titulo": titulo, "descripcion": "Orden migrada del sistema anterior",
+         "creador": "legacy", "area_ids": [area_id, area_id], "asignada_a": "ana"},
+        {"titulo": "Corta", "descripcion": "corta", "creador": "legacy"},
+        {"titulo": titulo + " sin áreas", "descripcion": "Orden migrada sin áreas", "creador": "legacy"},
+    ]
+    cuerpo = "\n".join(json.dumps(l) for l in lineas) + "\n{no es json\n"
+    response = client.post(
+        "/ordenes/importar?lote=1",
+        files={"archivo": ("ordenes.ndjson", cuerpo.encode(), "application/x-ndjson")}
+    )
+    assert response.status_code == 200
+    reporte = response.json()
+    assert (reporte["procesadas"], reporte["ordenes"], reporte["asignaciones"]) == (4, 2, 1)
+    assert [e["linea"] for e in reporte["detalle_errores"]] == [2, 4]
+
+    importadas = [o for o in client.get("/ordenes/?limit=500").json() if o["titulo"].startswith(titulo)]
+    por_titulo = {o["titulo"]: o for o in importadas}
+    assert por_titulo[titulo]["estado_global"] == "ASIGNADA" and por_titulo[titulo]["num_areas"] == 1
+    assert por_titulo[titulo + " sin áreas"]["estado_global"] == "NUEVA"
+    historial = client.get(f"/ordenes/{por_titulo[titulo]['id']}/historial").json()
+    assert {e["evento"] for e in historial} == {"CREADA", "AREA_ASIGNADA", "CAMBIO_ESTADO_GLOBAL"}
+
+    csv_texto = (
+        "titulo,descripcion,creador,prioridad,area_ids\n"
+        f"{titulo} csv,Orden migrada desde CSV,legacy,ALTA,{area_id}\n"
+        f"{titulo} mala,Orden con área inexistente,legacy,,999999\n"
+    )
+    reporte = client.post(
+        "/ordenes/importar",
+        files={"archivo": ("ordenes.csv", csv_texto.encode(), "text/csv")}
+    ).json()
+    assert (reporte["ordenes"], reporte["errores"]) == (1, 1)
+    assert "999999" in reporte["detalle_errores"][0]["error"]
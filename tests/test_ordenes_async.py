@@ -0,0 +1,95 @@
+"""
+Tests de los servicios async de órdenes (AsyncSession + run_sync)
+"""
+import asyncio
+import importlib
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.config import settings
+from src.database import Base
+from src.database_async import get_async_db
+from src.models import Area
+from src.schemas.orden import OrdenCreate, AsignacionCreate, CambioEstadoRequest
+from src.services.orden_service import OrdenService
+
+
+def test_flujo_async_crear_asignar_y_cambiar_estado(tmp_path):
+    ruta = tmp_path / "async.db"
+    engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conexion:
+        conexion.execute(Area.__table__.insert(), [{"nombre": "Soporte async", "responsable": "Ana"}])
+
+    engine_async = create_async_engine(f"sqlite+aiosqlite:///{ruta}")
+    Sesion = async_sessionmaker(engine_async, expire_on_commit=False)
+
+    async def flujo():
+        async with Sesion() as db:
+            orden = await OrdenService.crear_orden_async(db, OrdenCreate(
+                titulo="Orden async", descripcion="Creada por la ruta async", creador="test"
+            ))
+            detalle = await OrdenService.asignar_areas_async(db, orden["id"], AsignacionCreate(area_ids=[1]))
+            asignacion = await OrdenService.cambiar_estado_parcial_async(
+                db, orden["id"], 1, CambioEstadoRequest(nuevo_estado="EN_PROGRESO")
+            )
+            listado = await OrdenService.listar_ordenes_async(db)
+            return orden, detalle, asignacion, listado
+
+    orden, detalle, asignacion, listado = asyncio.run(flujo())
+    asyncio.run(engine_async.dispose())
+    engine.dispose()
+
+    assert orden["estado_global"] == "NUEVA" and orden["asignaciones"] == []
+    assert detalle["asignaciones"][0]["area_nombre"] == "Soporte async"
+    assert asignacion["estado_parcial"] == "EN_PROGRESO"
+    assert listado[0]["estado_global"] == "EN_PROGRESO" and listado[0]["num_areas"] == 1
+
+
+@pytest.fixture
+def app_async(monkeypatch, tmp_path):
+    """La app armada con DB_ASYNC=True (rutas async sobre un SQLite temporal)"""
+    import src.main
+
+    ruta = tmp_path / "rutas_async.db"
+    engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(bind=engine)
+    engine_async = create_async_engine(f"sqlite+aiosqlite:///{ruta}")
+    Sesion = async_sessionmaker(engine_async, expire_on_commit=False)
+
+    async def get_async_db_prueba():
+        async with Sesion() as db:
+            yield db
+
+    monkeypatch.setattr(settings, "DB_ASYNC", True)
+    app = importlib.reload(src.main).app
+    app.dependency_overrides[get_async_db] = get_async_db_prueba
+    yield app
+
+    monkeypatch.setattr(settings, "DB_ASYNC", False)
+    importlib.reload(src.main)
+    asyncio.run(engine_async.dispose())
+    engine.dispose()
+
+
+def test_rutas_sync_no_quedan_tapadas_por_las_async(app_async, db):
+    orden_id = OrdenService.crear_orden(db, OrdenCreate(
+        titulo="Orden sync", descripcion="Vista por las rutas sync", creador="test"
+    )).id
+    cliente = TestClient(app_async)
+
+    # /ordenes/{orden_id:int} no captura los paths estáticos del router sync
+    response = cliente.get("/ordenes/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert cliente.get(f"/ordenes/{orden_id}/historial").status_code == 200
+
+    # El detalle lo atiende la ruta async, cuya base temporal está vacía
+    response = cliente.get(f"/ordenes/{orden_id}")
+    assert response.status_code == 404
@@ -0,0 +1,48 @@
+"""
+Pruebas de planificación de particiones mensuales de historial
+"""
+from datetime import datetime
+
+from src.services.particion_service import ParticionService
+
+
+PARTICIONES = [
+    {"nombre": "p_inicial", "limite": datetime(2026, 11, 1)},
+    {"nombre": "p_futuro", "limite": None},
+]
+
+
+def test_planifica_meses_faltantes_hasta_el_horizonte():
+    """Se crean particiones mensuales desde el último límite hasta cubrir N meses adelante"""
+    nuevas = ParticionService.planificar_nuevas(PARTICIONES, datetime(2026, 12, 15), 2)
+
+    assert nuevas == [
+        ("p202611", datetime(2026, 12, 1)),
+        ("p202612", datetime(2027, 1, 1)),
+        ("p202701", datetime(2027, 2, 1)),
+        ("p202702", datetime(2027, 3, 1)),
+    ]
+
+
+def test_no_planifica_si_ya_esta_cubierto():
+    """Sin trabajo cuando las particiones ya cubren el horizonte o la tabla no está particionada"""
+    particiones = PARTICIONES[:1] + [
+        {"nombre": "p202611", "limite": datetime(2026, 12, 1)},
+        {"nombre": "p202612", "limite": datetime(2027, 1, 1)},
+    ] + PARTICIONES[1:]
+
+    assert ParticionService.planificar_nuevas(particiones, datetime(2026, 11, 20), 1) == []
+    assert ParticionService.planificar_nuevas([], datetime(2026, 11, 20), 1) == []
+
+
+def test_expira_solo_particiones_completas_fuera_de_retencion():
+    """Una partición expira cuando su límite superior no supera el corte de retención"""
+    particiones = PARTICIONES[:1] + [
+        {"nombre": "p202611", "limite": datetime(2026, 12, 1)},
+        {"nombre": "p202612", "limite": datetime(2027, 1, 1)},
+    ] + PARTICIONES[1:]
+
+    assert ParticionService.planificar_expiradas(particiones, datetime(2027, 2, 10), 2) == [
+        "p_inicial", "p202611"
+    ]
+    assert ParticionService.planificar_expiradas(particiones, datetime(2027, 2, 10), 0) == []
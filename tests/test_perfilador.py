@@ -0,0 +1,77 @@
+"""
+Tests del perfilador por muestreo y de /admin/perfilador
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import time
+
+from src.config import settings
+from src.main import app
+from src.utils.perfilador import PerfiladorMiddleware, SesionPerfilado, codigos_de_ruta, perfilador
+
+
+def _trabajo_lento(segundos: float) -> int:
+    fin = time.perf_counter() + segundos
+    vueltas = 0
+    while time.perf_counter() < fin:
+        vueltas += 1
+    return vueltas
+
+
+def test_perfila_las_proximas_peticiones_de_la_ruta():
+    prueba = FastAPI()
+    prueba.add_middleware(PerfiladorMiddleware)
+
+    @prueba.get("/lenta/{n}")
+    def lenta(n: int):
+        return {"vueltas": _trabajo_lento(0.05)}
+
+    @prueba.get("/otra")
+    def otra():
+        return {"vueltas": _trabajo_lento(0.05)}
+
+    cliente = TestClient(prueba)
+    sesion = perfilador.iniciar(SesionPerfilado(
+        "ruta", "GET /lenta/{n}", codigos_de_ruta(prueba.routes, "/lenta/{n}", "GET"),
+        limite=2, intervalo_seg=0.002, timeout_seg=30, ruta="/lenta/{n}", metodo="GET"
+    ))
+
+    cliente.get("/otra")
+    cliente.get("/lenta/1")
+    assert sesion.activa
+    cliente.get("/lenta/2")
+    assert not sesion.activa and sesion.motivo_fin == "completada"
+
+    colapsado = sesion.colapsado()
+    assert sesion.total_muestras > 0
+    assert "test_perfilador.py:_trabajo_lento" in colapsado
+    assert "otra" not in colapsado  # solo pilas que pasan por el endpoint perfilado
+    assert all(linea.startswith("GET /lenta/{n};") for linea in colapsado.splitlines())
+
+    resumen = sesion.resumen()
+    assert "tests/test_perfilador.py:_trabajo_lento" in resumen
+
+
+def test_admin_perfilador(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secreto")
+    cliente = TestClient(app)
+    headers = {"X-Admin-Token": "secreto"}
+
+    assert cliente.post("/admin/perfilador/tick").status_code == 401
+    assert cliente.post(
+        "/admin/perfilador/ruta", params={"ruta": "/no/existe"}, headers=headers
+    ).status_code == 404
+
+    response = cliente.post(
+        "/admin/perfilador/ruta", params={"ruta": "/ordenes/{orden_id}", "peticiones": 5}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["activa"] is True
+    assert cliente.post("/admin/perfilador/tick", headers=headers).status_code == 409
+
+    response = cliente.delete("/admin/perfilador", headers=headers)
+    assert response.json()["motivo_fin"] == "cancelada"
+
+    response = cliente.get("/admin/perfilador/resultado", params={"formato": "resumen"}, headers=headers)
+    assert response.status_code == 200
+    assert response.text.startswith("GET /ordenes/{orden_id}:")
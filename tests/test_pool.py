@@ -0,0 +1,45 @@
+"""
+Tests del pool de conexiones instrumentado y /admin/pool
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc, text
+
+from src.main import app
+from src.config import settings
+from src.utils.pool import pool_medido, estado_pool
+
+
+def test_pool_medido_registra_checkouts_y_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=pool_medido("prueba"), pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    with engine.connect() as conexion:
+        conexion.execute(text("SELECT 1"))
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        assert estado_pool(engine)["actual"]["en_uso"] == 1
+
+    with engine.connect():
+        pass
+
+    estado = estado_pool(engine)
+    assert estado["configuracion"]["pool_size"] == 1
+    assert estado["totales"]["checkouts"] == 2
+    assert estado["totales"]["timeouts"] == 1
+    assert estado["totales"]["conexiones_creadas"] == 1
+    assert estado["latencia_checkout_seg"]["histograma"]["+Inf"] == 2
+    engine.dispose()
+
+
+def test_admin_pool_requiere_token(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "")
+    assert client.get("/admin/pool").status_code == 404
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secreto")
+    assert client.get("/admin/pool", headers={"X-Admin-Token": "otro"}).status_code == 401
+    response = client.get("/admin/pool", headers={"X-Admin-Token": "secreto"})
+    assert response.status_code == 200
+    assert "estado" in response.json()["principal"]
@@ -0,0 +1,54 @@
+"""
+Tests del enrutamiento de lecturas a la réplica con read-your-writes
+"""
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import src.database as database
+from src.utils.lectura import MarcaEscrituraMiddleware
+
+
+app = FastAPI()
+app.add_middleware(MarcaEscrituraMiddleware, ventana_seg=5)
+
+
+@app.post("/escribir")
+def escribir():
+    return {"ok": True}
+
+
+@app.post("/fallar", status_code=422)
+def fallar():
+    return {"ok": False}
+
+
+@app.get("/leer")
+def leer(request: Request):
+    fabrica = database.sesion_lectura_para(request)
+    return {"replica": fabrica is database.SessionLectura}
+
+
+def test_lecturas_van_al_primario_tras_escribir(monkeypatch):
+    monkeypatch.setattr(database, "engine_lectura", object())
+    client = TestClient(app)
+
+    assert client.get("/leer").json() == {"replica": True}
+
+    client.post("/fallar")
+    assert database.COOKIE_ESCRITURA not in client.cookies
+
+    response = client.post("/escribir")
+    assert "Max-Age=5" in response.headers["set-cookie"]
+    assert client.get("/leer").json() == {"replica": False}
+
+    # Marca vencida (la cookie aún no expiró en el cliente)
+    client.cookies.set(database.COOKIE_ESCRITURA, str(time.time() - 10))
+    assert client.get("/leer").json() == {"replica": True}
+
+
+def test_sin_replica_todo_va_al_primario(monkeypatch):
+    monkeypatch.setattr(database, "engine_lectura", None)
+    client = TestClient(app)
+    assert client.get("/leer").json() == {"replica": False}
@@ -0,0 +1,64 @@
+"""
+Pruebas de los rollups de KPIs por intervalo
+"""
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import text
+
+from src.services.rollup_service import RollupService, AcumuladorRollups, acumulador_rollups
+
+
+@pytest.fixture
+def db(sqlite_vacia):
+    acumulador_rollups.extraer()  # Descartar eventos de otras pruebas
+    db = sqlite_vacia()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def test_eventos_confirmados_se_vuelcan_y_suman(db):
+    # Los eventos acompañan a escrituras reales; aquí basta con abrir la transacción
+    db.execute(text("SELECT 1"))
+    RollupService.registrar(db, creadas=1)
+    RollupService.registrar(db, 3, vencidas=1, suma_seg=70, muestras=1)
+    db.commit()
+
+    db.execute(text("SELECT 1"))
+    RollupService.registrar(db, creadas=5)
+    db.rollback()  # No cuenta
+
+    assert RollupService.volcar(db) == 4  # 2 granularidades x 2 áreas
+
+    db.execute(text("SELECT 1"))
+    RollupService.registrar(db, creadas=1)
+    RollupService.registrar(db, 3, suma_seg=30, muestras=1)
+    db.commit()
+    RollupService.volcar(db)
+
+    ahora = datetime.utcnow()
+    totales = RollupService.obtener_tendencias(db, 'hora', ahora - timedelta(hours=1), ahora)
+    area = RollupService.obtener_tendencias(db, 'minuto', ahora - timedelta(minutes=5), ahora, 3)
+
+    assert [t["creadas"] for t in totales] == [2]
+    assert sum(t["vencidas"] for t in area) == 1
+    assert sum(t["creadas"] for t in area) == 0
+    if len(area) == 1:  # Ambos volcados cayeron en el mismo minuto
+        assert area[0]["promedio_seg"] == 50
+
+
+def test_volcado_fallido_devuelve_incrementos():
+    acumulador = AcumuladorRollups()
+    momento = datetime(2026, 10, 19, 10, 30, 15)
+    acumulador.sumar(momento, 0, {"creadas": 2})
+
+    pendientes = acumulador.extraer()
+    assert acumulador.extraer() == {}
+    acumulador.devolver(pendientes)
+    acumulador.sumar(momento, 0, {"creadas": 1})
+
+    assert acumulador.extraer() == {
+        ('minuto', datetime(2026, 10, 19, 10, 30), 0): {"creadas": 3},
+        ('hora', datetime(2026, 10, 19, 10, 0), 0): {"creadas": 3},
+    }
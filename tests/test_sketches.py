@@ -0,0 +1,109 @@
+"""
+Pruebas de los sketches de percentiles SLA
+"""
+import json
+import random
+import pytest
+
+from src.config import settings
+from src.models import Area, SlaSketch
+from src.schemas.orden import OrdenCreate, AsignacionCreate, CambioEstadoRequest
+from src.services.orden_service import OrdenService
+from src.services.sketch_service import SketchService, registro_sketches
+from src.utils.ddsketch import DDSketch
+
+
+@pytest.fixture
+def db(sqlite_vacia):
+    registro_sketches.extraer()  # Descartar valores de otras pruebas
+    db = sqlite_vacia()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def test_cuantiles_con_error_relativo_y_merge():
+    aleatorio = random.Random(7)
+    valores = [aleatorio.expovariate(1 / 300) for _ in range(5000)]
+    mitad_a, mitad_b = DDSketch(), DDSketch()
+    for i, valor in enumerate(valores):
+        (mitad_a if i % 2 else mitad_b).agregar(valor)
+
+    # Combinar por partes equivale a un solo sketch (también serializado)
+    combinado = DDSketch.desde_dict(mitad_a.a_dict())
+    combinado.combinar(mitad_b)
+
+    ordenados = sorted(valores)
+    for q in (0.5, 0.9, 0.99):
+        real = ordenados[int(q * (len(ordenados) - 1))]
+        assert abs(combinado.cuantil(q) - real) <= real * 0.011
+    assert combinado.total == 5000
+
+
+def test_percentiles_por_area_tras_persistir(db):
+    area = Area(nombre="Soporte", responsable="ana")
+    db.add(area)
+    db.commit()
+
+    for segundos in (10, 20, 30, 40):
+        orden = OrdenService.crear_orden(db, OrdenCreate(
+            titulo="Orden sketch", descripcion="Orden para percentiles", creador="test"
+        ))
+        OrdenService.asignar_areas(db, orden.id, AsignacionCreate(area_ids=[area.id]))
+        asignacion = orden.asignaciones[0]
+        asignacion.seg_acumulados = segundos
+        db.commit()
+        OrdenService.cambiar_estado_parcial(
+            db, orden.id, area.id, CambioEstadoRequest(nuevo_estado='COMPLETADA')
+        )
+
+    # Antes de persistir, la consulta ya incluye lo pendiente en memoria
+    antes = SketchService.obtener_percentiles(db, 'seg_acumulados', 'area')
+    assert SketchService.persistir(db) == 6  # 2 métricas x (área, prioridad, total)
+    despues = SketchService.obtener_percentiles(db, 'seg_acumulados', 'area')
+
+    assert antes == despues
+    assert despues[0]["muestras"] == 4
+    assert despues[0]["promedio"] == 25
+    assert abs(despues[0]["p50"] - 20) <= 0.2
+    assert SketchService.obtener_percentiles(db, 'tiempo_completar', 'prioridad')[0]["prioridad"] == "MEDIA"
+
+
+def test_reconstruir_desde_orden_area(db):
+    area = Area(nombre="Redes", responsable="luis")
+    db.add(area)
+    db.commit()
+    orden = OrdenService.crear_orden(db, OrdenCreate(
+        titulo="Orden cerrada", descripcion="Cerrada antes del sketch", creador="test"
+    ))
+    OrdenService.asignar_areas(db, orden.id, AsignacionCreate(area_ids=[area.id]))
+    OrdenService.cambiar_estado_parcial(
+        db, orden.id, area.id, CambioEstadoRequest(nuevo_estado='CERRADA_SIN_SOLUCION')
+    )
+    registro_sketches.extraer()  # Como si el proceso hubiera reiniciado
+
+    assert SketchService.reconstruir_si_vacio(db) == 1
+    assert SketchService.reconstruir_si_vacio(db) == 0
+    assert SketchService.obtener_percentiles(db, 'seg_acumulados', 'total')[0]["muestras"] == 1
+
+
+def test_cambio_de_alpha_re_agrupa_el_sketch_guardado(db, monkeypatch):
+    for segundos in range(1, 101):
+        registro_sketches.agregar('seg_acumulados', 1, 'ALTA', segundos)
+    SketchService.persistir(db)
+
+    # Con otro alpha, los valores nuevos se fusionan en lugar de volver a la cola
+    monkeypatch.setattr(settings, "SLA_SKETCH_ALPHA", 0.02)
+    for segundos in range(101, 201):
+        registro_sketches.agregar('seg_acumulados', 1, 'ALTA', segundos)
+    assert SketchService.persistir(db) == 3
+    assert registro_sketches.extraer() == {}
+
+    fila = db.query(SlaSketch).filter(SlaSketch.dimension == 'total').one()
+    assert json.loads(fila.datos)["alpha"] == 0.02 and fila.total == 200
+
+    total = SketchService.obtener_percentiles(db, 'seg_acumulados', 'total')[0]
+    assert total["muestras"] == 200 and total["promedio"] == 100.5
+    assert abs(total["p50"] - 100) <= 100 * 0.03
+    assert abs(total["p99"] - 198) <= 198 * 0.03
@@ -0,0 +1,45 @@
+"""
+Tests del backend SQLite y del divisor de scripts SQL
+"""
+from sqlalchemy.orm import Session
+
+from src.models import Area, Orden, OrdenArea
+from src.services.contadores_service import ContadoresService
+from src.utils.sql import dividir_sentencias, mysql_a_sqlite
+
+
+def test_dividir_sentencias_respeta_comillas_comentarios_y_delimiter():
+    script = """
+    -- comentario; con punto y coma
+    INSERT INTO t VALUES ('a;b', "c\\"d");
+    /* bloque; */ SELECT 1;
+    DELIMITER $$
+    CREATE TRIGGER tr BEFORE INSERT ON t FOR EACH ROW
+    BEGIN
+        SET NEW.x = 1;
+    END$$
+    DELIMITER ;
+    SELECT 2
+    """
+    sentencias = list(dividir_sentencias(script))
+    assert sentencias[0] == """INSERT INTO t VALUES ('a;b', "c\\"d")"""
+    assert sentencias[1] == "SELECT 1"
+    assert sentencias[2].startswith("CREATE TRIGGER") and sentencias[2].endswith("END")
+    assert "SET NEW.x = 1;" in sentencias[2]
+    assert sentencias[3] == "SELECT 2"
+
+
+def test_mysql_a_sqlite_adapta_fechas_y_descarta_otras_sentencias():
+    assert mysql_a_sqlite("TRUNCATE TABLE areas") is None
+    assert mysql_a_sqlite("INSERT INTO t VALUES (DATE_SUB(NOW(), INTERVAL 2 HOUR), NOW())") == (
+        "INSERT INTO t VALUES (datetime('now', '-2 hours'), datetime('now'))"
+    )
+
+
+def test_seeds_cargados_con_contadores_reconciliados(db: Session):
+    assert db.query(Area).count() >= 5
+    assert db.query(Orden).filter(Orden.id <= 8).count() == 8
+    assert db.query(OrdenArea).filter(OrdenArea.orden_id <= 8).count() > 8
+
+    contadores = ContadoresService.leer(db, 'estado_global')
+    assert sum(contadores.values()) >= 8
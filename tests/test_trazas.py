@@ -0,0 +1,118 @@
+"""
+Tests de las trazas locales (spans OTLP JSON) y de /admin/trazas
+"""
+import json
+import pytest
+from fastapi.testclient import TestClient
+
+from src.config import settings
+from src.database import SessionLocal
+from src.main import app
+from src.services.estado_service import EstadoService
+from src.services.orden_service import OrdenService
+from src.services.temporizador_service import TemporizadorService
+from src.utils import trazas
+
+
+@pytest.fixture
+def colector(tmp_path):
+    colector = trazas.instalar_trazas(
+        maximo=10, archivo=str(tmp_path / "trazas.jsonl"), servicios=(OrdenService, EstadoService)
+    )
+    yield colector
+    trazas.desinstalar_trazas()
+
+
+def _por_nombre(spans):
+    return {span["name"]: span for span in spans}
+
+
+def test_traza_de_asignacion_de_punta_a_punta(colector):
+    cliente = TestClient(trazas.TrazasMiddleware(app))
+    orden = cliente.post("/ordenes/", json={
+        "titulo": "Orden trazada", "descripcion": "Traza de punta a punta", "creador": "test@empresa.com"
+    }).json()
+    area_id = cliente.get("/areas/").json()[0]["id"]
+
+    response = cliente.post(f"/ordenes/{orden['id']}/asignaciones", json={"area_ids": [area_id]})
+    assert response.status_code == 200
+    trace_id = response.headers["X-Trace-Id"]
+
+    spans = trazas.traza_a_otlp(colector.buscar(trace_id))["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert all(span["traceId"] == trace_id for span in spans)
+    nombres = _por_nombre(spans)
+
+    raiz = nombres["POST /ordenes/{orden_id}/asignaciones"]
+    assert raiz["kind"] == trazas.SERVIDOR and "parentSpanId" not in raiz
+    servicio = nombres["OrdenService.asignar_areas"]
+    assert servicio["parentSpanId"] == raiz["spanId"]
+    assert nombres["EstadoService.recalcular_estado_global"]["parentSpanId"] == servicio["spanId"]
+
+    sql = [span for span in spans if span["kind"] == trazas.CLIENTE]
+    assert any(span["parentSpanId"] == servicio["spanId"] and span["name"].startswith("SQL") for span in sql)
+    ids = {span["spanId"] for span in spans}
+    assert all(span["parentSpanId"] in ids for span in spans if span is not raiz)
+
+    # Archivo: una línea OTLP JSON por traza (crear orden, listar áreas, asignar)
+    with open(colector.archivo, encoding="utf-8") as archivo:
+        lineas = [json.loads(linea) for linea in archivo]
+    assert len(lineas) == 3
+    assert lineas[-1]["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["traceId"] == trace_id
+
+
+def test_traceparent_entrante(colector):
+    cliente = TestClient(trazas.TrazasMiddleware(app))
+    trace_id, padre = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+
+    response = cliente.get("/ordenes/?limit=1", headers={"traceparent": f"00-{trace_id}-{padre}-01"})
+    assert response.headers["X-Trace-Id"] == trace_id
+    raiz = colector.buscar(trace_id).raiz
+    assert raiz.padre_id == padre and raiz.nombre == "GET /ordenes/"
+
+    # No muestreada por el llamador: no se traza nada
+    response = cliente.get("/ordenes/?limit=1", headers={"traceparent": f"00-{'1' * 32}-{padre}-00"})
+    assert "X-Trace-Id" not in response.headers
+    assert colector.buscar("1" * 32) is None
+
+
+def test_fases_del_tick(colector):
+    db = SessionLocal()
+    try:
+        with trazas.span("tick"):
+            TemporizadorService.ejecutar_tick(db)
+    finally:
+        db.close()
+
+    traza = colector.trazas[-1]
+    assert traza.raiz.nombre == "tick"
+    fases = [s for s in traza.spans if s.padre_id == traza.raiz.span_id]
+    assert [s.nombre for s in fases][:4] == [
+        "tick.incrementar_segundos", "tick.aplicar_timeouts", "tick.recalcular_estados", "tick.commit"
+    ]
+    assert any(s.nombre.startswith("SQL UPDATE") and s.padre_id == fases[0].span_id for s in traza.spans)
+
+
+def test_deshabilitadas_sin_costo_y_admin(monkeypatch):
+    with trazas.span("nada") as nada:
+        assert nada is None
+    assert "_trazado" not in vars(OrdenService.asignar_areas)
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secreto")
+    assert TestClient(app).get("/admin/trazas", headers={"X-Admin-Token": "secreto"}).status_code == 404
+
+
+def test_admin_trazas(colector, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secreto")
+    headers = {"X-Admin-Token": "secreto"}
+    cliente = TestClient(trazas.TrazasMiddleware(app))
+
+    trace_id = cliente.get("/ordenes/?limit=1").headers["X-Trace-Id"]
+    resumen = cliente.get("/admin/trazas", headers=headers).json()
+    assert any(t["trace_id"] == trace_id and t["raiz"] == "GET /ordenes/" for t in resumen)
+
+    otlp = cliente.get(f"/admin/trazas/{trace_id}", headers=headers).json()
+    assert otlp["resourceSpans"][0]["resource"]["attributes"][0]["value"]["stringValue"] == trazas.NOMBRE_SERVICIO
+    assert cliente.get(f"/admin/trazas/{'0' * 32}", headers=headers).status_code == 404
+
+    assert cliente.delete("/admin/trazas", headers=headers).status_code == 200
+    assert [t["raiz"] for t in colector.resumen()] == ["DELETE /admin/trazas"]